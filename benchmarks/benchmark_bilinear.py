@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+"""
+Step time and graph size of ``BilinearInteraction`` over the number of fields for every ``bilinear_type``, next to
+the former one product per field pair.
+
+    python benchmarks/benchmark_bilinear.py --batch_size 1024 --embedding_size 16
+"""
+
+import argparse
+import itertools
+
+import tensorflow as tf
+from keras.initializers import glorot_normal
+
+from deepctr.layers import BilinearInteraction
+from timing import count_graph_ops, time_layer
+
+
+class PerPairBilinearInteraction(BilinearInteraction):
+    """The one weight, tensordot and multiply per field pair used by ``BilinearInteraction`` before the stacked
+    weights."""
+
+    def build(self, input_shape):
+        embedding_size = int(input_shape[0][-1])
+        if self.bilinear_type == "all":
+            self.W = self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
+                seed=self.seed), name="bilinear_weight")
+        elif self.bilinear_type == "each":
+            self.W_list = [self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
+                seed=self.seed), name="bilinear_weight" + str(i)) for i in range(len(input_shape) - 1)]
+        else:
+            self.W_list = [self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
+                seed=self.seed), name="bilinear_weight" + str(i) + '_' + str(j)) for i, j in
+                           itertools.combinations(range(len(input_shape)), 2)]
+        self.built = True
+
+    def call(self, inputs, **kwargs):
+        n = len(inputs)
+        if self.bilinear_type == "all":
+            vidots = [tf.tensordot(inputs[i], self.W, axes=(-1, 0)) for i in range(n)]
+            p = [tf.multiply(vidots[i], inputs[j]) for i, j in itertools.combinations(range(n), 2)]
+        elif self.bilinear_type == "each":
+            vidots = [tf.tensordot(inputs[i], self.W_list[i], axes=(-1, 0)) for i in range(n - 1)]
+            p = [tf.multiply(vidots[i], inputs[j]) for i, j in itertools.combinations(range(n), 2)]
+        else:
+            p = [tf.multiply(tf.tensordot(v[0], w, axes=(-1, 0)), v[1])
+                 for v, w in zip(itertools.combinations(inputs, 2), self.W_list)]
+        return tf.concat(p, axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=16)
+    parser.add_argument('--num_fields', type=int, nargs='+', default=[10, 20, 40])
+    args = parser.parse_args()
+
+    print('%12s %8s %12s %12s %12s %12s' % ('type', 'fields', 'per-pair ms', 'stacked ms', 'per-pair ops', 'stacked ops'))
+    for bilinear_type in ['all', 'each', 'interaction']:
+        for num_fields in args.num_fields:
+            inputs = [tf.random.normal((args.batch_size, 1, args.embedding_size)) for _ in range(num_fields)]
+            per_pair = PerPairBilinearInteraction(bilinear_type)
+            stacked = BilinearInteraction(bilinear_type)
+            print('%12s %8d %12.3f %12.3f %12d %12d' % (
+                bilinear_type, num_fields, time_layer(per_pair, inputs) * 1000, time_layer(stacked, inputs) * 1000,
+                count_graph_ops(per_pair, inputs), count_graph_ops(stacked, inputs)))
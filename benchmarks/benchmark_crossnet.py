@@ -0,0 +1,52 @@
+# -*- coding:utf-8 -*-
+"""
+Parameters and training step time of ``CrossNet`` on wide inputs for every parameterization, next to the former
+layer that ran the cross layers on ``(batch_size, dim, 1)`` tensors.
+
+    python benchmarks/benchmark_crossnet.py --batch_size 1024 --dim 416 1040 --low_rank 32
+"""
+
+import argparse
+
+import tensorflow as tf
+
+from deepctr.layers import CrossNet
+from timing import count_graph_ops, time_layer
+
+
+class ExpandedCrossNet(CrossNet):
+    """The ``expand_dims``, ``einsum`` and ``squeeze`` of ``CrossNet`` before the cross layers ran on 2D tensors."""
+
+    def call(self, inputs, **kwargs):
+        x_0 = tf.expand_dims(inputs, axis=2)
+        x_l = x_0
+        for i in range(self.layer_num):
+            if self.parameterization == 'vector':
+                xl_w = tf.tensordot(x_l, self.kernels[i], axes=(1, 0))
+                dot_ = tf.matmul(x_0, xl_w)
+                x_l = dot_ + self.bias[i] + x_l
+            else:
+                xl_w = tf.einsum('ij,bjk->bik', self.kernels[i], x_l)
+                x_l = x_0 * (xl_w + self.bias[i]) + x_l
+        return tf.squeeze(x_l, axis=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--dim', type=int, nargs='+', default=[416, 1040])
+    parser.add_argument('--layer_num', type=int, default=3)
+    parser.add_argument('--low_rank', type=int, default=32)
+    args = parser.parse_args()
+
+    variants = [('3d vector', ExpandedCrossNet, 'vector'), ('2d vector', CrossNet, 'vector'),
+                ('3d matrix', ExpandedCrossNet, 'matrix'), ('2d matrix', CrossNet, 'matrix'),
+                ('low_rank', CrossNet, 'low_rank')]
+    print('%6s %10s %10s %6s %10s' % ('dim', 'variant', 'params', 'ops', 'train ms'))
+    for dim in args.dim:
+        inputs = tf.random.normal((args.batch_size, dim))
+        for name, cls, parameterization in variants:
+            layer = cls(args.layer_num, parameterization=parameterization, low_rank=args.low_rank)
+            ops = count_graph_ops(layer, inputs)
+            print('%6d %10s %10d %6d %10.3f' % (dim, name, layer.count_params(), ops,
+                                                time_layer(layer, inputs) * 1000))
@@ -0,0 +1,59 @@
+# -*- coding:utf-8 -*-
+"""
+Step time of ``CrossNetMix`` over the number of experts, next to the former loop over the experts.
+
+    python benchmarks/benchmark_crossnetmix.py --batch_size 1024 --dim 416 --num_experts 1 2 4 8 16
+"""
+
+import argparse
+
+import tensorflow as tf
+from keras.layers import Dense
+
+from deepctr.layers import CrossNetMix
+from timing import count_graph_ops, time_layer
+
+
+class ExpertLoopCrossNetMix(CrossNetMix):
+    """The per expert gating ``Dense`` and einsums on ``(bs, dim, 1)`` used by ``CrossNetMix`` before the batched
+    experts."""
+
+    def build(self, input_shape):
+        super(ExpertLoopCrossNetMix, self).build(input_shape)
+        self.gating = [Dense(1, use_bias=False) for _ in range(self.num_experts)]
+
+    def call(self, inputs, **kwargs):
+        x_0 = tf.expand_dims(inputs, axis=2)
+        x_l = x_0
+        for i in range(self.layer_num):
+            output_of_experts = []
+            gating_score_of_experts = []
+            for expert_id in range(self.num_experts):
+                gating_score_of_experts.append(self.gating[expert_id](tf.squeeze(x_l, axis=2)))
+                v_x = tf.nn.tanh(tf.einsum('ij,bjk->bik', tf.transpose(self.V_list[i][expert_id]), x_l))
+                v_x = tf.nn.tanh(tf.einsum('ij,bjk->bik', self.C_list[i][expert_id], v_x))
+                uv_x = tf.einsum('ij,bjk->bik', self.U_list[i][expert_id], v_x)
+                output_of_experts.append(tf.squeeze(x_0 * (uv_x + self.bias[i]), axis=2))
+            output_of_experts = tf.stack(output_of_experts, 2)
+            gating_score_of_experts = tf.stack(gating_score_of_experts, 1)
+            x_l = tf.matmul(output_of_experts, tf.nn.softmax(gating_score_of_experts, 1)) + x_l
+        return tf.squeeze(x_l, axis=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--dim', type=int, default=416)
+    parser.add_argument('--low_rank', type=int, default=32)
+    parser.add_argument('--layer_num', type=int, default=2)
+    parser.add_argument('--num_experts', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    inputs = tf.random.normal((args.batch_size, args.dim))
+    print('%8s %12s %12s %10s %10s' % ('experts', 'loop ms', 'batched ms', 'loop ops', 'batched ops'))
+    for num_experts in args.num_experts:
+        kwargs = dict(low_rank=args.low_rank, num_experts=num_experts, layer_num=args.layer_num)
+        loop, batched = ExpertLoopCrossNetMix(**kwargs), CrossNetMix(**kwargs)
+        print('%8d %12.3f %12.3f %10d %10d' % (
+            num_experts, time_layer(loop, inputs) * 1000, time_layer(batched, inputs) * 1000,
+            count_graph_ops(loop, inputs), count_graph_ops(batched, inputs)))
@@ -0,0 +1,59 @@
+# -*- coding:utf-8 -*-
+"""
+Build time and step time of ``FEFMLayer`` over the number of fields, next to the former one weight per pair layout.
+
+    python benchmarks/benchmark_fefm.py --batch_size 1024 --embedding_size 16
+"""
+
+import argparse
+import itertools
+import time
+
+import tensorflow as tf
+from keras.initializers import TruncatedNormal
+
+from deepctr.layers import FEFMLayer
+from timing import count_graph_ops, time_layer
+
+
+class PerPairFEFMLayer(FEFMLayer):
+    """The one weight and one tensordot per field pair used by ``FEFMLayer`` before the stacked weight."""
+
+    def build(self, input_shape):
+        embedding_size = int(input_shape[2])
+        self.pairs = list(itertools.combinations(range(int(input_shape[1])), 2))
+        self.pair_weights = [self.add_weight(name='field_embeddings' + str(fi) + "-" + str(fj),
+                                             shape=(embedding_size, embedding_size), initializer=TruncatedNormal())
+                             for fi, fj in self.pairs]
+        self.built = True
+
+    def call(self, inputs, **kwargs):
+        outputs = []
+        for (fi, fj), w in zip(self.pairs, self.pair_weights):
+            feat_embed_i_tr = tf.matmul(inputs[:, fi], w + tf.transpose(w))
+            outputs.append(tf.reduce_sum(feat_embed_i_tr * inputs[:, fj], axis=-1, keepdims=True))
+        return tf.concat(outputs, axis=1)
+
+
+def time_build(layer_cls, inputs):
+    start = time.time()
+    layer_cls(regularizer=0.0).build(inputs.shape)
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=16)
+    parser.add_argument('--num_fields', type=int, nargs='+', default=[10, 20, 50])
+    args = parser.parse_args()
+
+    print('%8s %14s %14s %12s %12s %10s %10s' % ('fields', 'per-pair build', 'stacked build', 'per-pair ms',
+                                                 'stacked ms', 'per-pair ops', 'stacked ops'))
+    for num_fields in args.num_fields:
+        inputs = tf.random.normal((args.batch_size, num_fields, args.embedding_size))
+        per_pair, stacked = PerPairFEFMLayer(regularizer=0.0), FEFMLayer(regularizer=0.0)
+        print('%8d %14.3f %14.3f %12.3f %12.3f %10d %10d' % (
+            num_fields, time_build(PerPairFEFMLayer, inputs), time_build(FEFMLayer, inputs),
+            time_layer(per_pair, inputs) * 1000, time_layer(stacked, inputs) * 1000,
+            count_graph_ops(per_pair, inputs), count_graph_ops(stacked, inputs)))
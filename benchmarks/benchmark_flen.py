@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+"""
+Step time and graph size of ``FieldWiseBiInteraction`` over the number of field groups, next to the former per
+group list comprehensions and pair gathers.
+
+    python benchmarks/benchmark_flen.py --batch_size 1024 --embedding_size 16 --features_per_group 4
+"""
+
+import argparse
+import itertools
+
+import tensorflow as tf
+
+from deepctr.layers import FieldWiseBiInteraction
+from timing import count_graph_ops, time_layer
+
+
+class PerGroupFieldWiseBiInteraction(FieldWiseBiInteraction):
+    """The per group reductions and pair gathers used by ``FieldWiseBiInteraction`` before the segment sums."""
+
+    def call(self, inputs, **kwargs):
+        field_wise_vectors = tf.concat([tf.reduce_sum(group, axis=1, keepdims=True) for group in inputs], 1)
+        left, right = zip(*itertools.combinations(range(self.num_fields), 2))
+        embeddings_prod = tf.gather(field_wise_vectors, left, axis=1) * tf.gather(field_wise_vectors, right, axis=1)
+        h_mf = tf.nn.bias_add(tf.reduce_sum(embeddings_prod * self.kernel_mf, axis=1), self.bias_mf)
+        field_fm = tf.concat([tf.square(tf.reduce_sum(group, axis=1, keepdims=True)) -
+                              tf.reduce_sum(group * group, axis=1, keepdims=True) for group in inputs], 1)
+        h_fm = tf.nn.bias_add(tf.reduce_sum(field_fm * self.kernel_fm, axis=1), self.bias_fm)
+        return h_mf + h_fm
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=16)
+    parser.add_argument('--features_per_group', type=int, default=4)
+    parser.add_argument('--num_groups', type=int, nargs='+', default=[4, 16, 64])
+    args = parser.parse_args()
+
+    print('%8s %12s %14s %10s %12s' % ('groups', 'per-group ms', 'segment ms', 'group ops', 'segment ops'))
+    for num_groups in args.num_groups:
+        inputs = [tf.random.normal((args.batch_size, args.features_per_group, args.embedding_size))
+                  for _ in range(num_groups)]
+        per_group, segment = PerGroupFieldWiseBiInteraction(), FieldWiseBiInteraction()
+        print('%8d %12.3f %14.3f %10d %12d' % (
+            num_groups, time_layer(per_group, inputs) * 1000, time_layer(segment, inputs) * 1000,
+            count_graph_ops(per_group, inputs), count_graph_ops(segment, inputs)))
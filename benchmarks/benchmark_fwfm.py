@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+"""
+Step time of ``FwFMLayer`` over the number of fields, next to the former per-pair loop.
+
+    python benchmarks/benchmark_fwfm.py --batch_size 1024 --embedding_size 16
+"""
+
+import argparse
+import itertools
+
+import tensorflow as tf
+
+from deepctr.layers import FwFMLayer
+from timing import count_graph_ops, time_layer
+
+
+class PairwiseLoopFwFMLayer(FwFMLayer):
+    """The per-pair loop used by ``FwFMLayer`` before the einsum version."""
+
+    def call(self, inputs, **kwargs):
+        pairwise_inner_prods = []
+        for fi, fj in itertools.combinations(range(self.num_fields), 2):
+            r_ij = self.field_strengths[fi, fj]
+            feat_embed_i = tf.squeeze(inputs[0:, fi:fi + 1, 0:], axis=1)
+            feat_embed_j = tf.squeeze(inputs[0:, fj:fj + 1, 0:], axis=1)
+            pairwise_inner_prods.append(tf.scalar_mul(r_ij, tf.keras.backend.batch_dot(feat_embed_i, feat_embed_j,
+                                                                                       axes=1)))
+        return tf.add_n(pairwise_inner_prods)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=16)
+    parser.add_argument('--num_fields', type=int, nargs='+', default=[10, 20, 40, 80])
+    args = parser.parse_args()
+
+    print('%8s %12s %12s %10s %10s' % ('fields', 'loop ms', 'einsum ms', 'loop ops', 'einsum ops'))
+    for num_fields in args.num_fields:
+        inputs = tf.random.normal((args.batch_size, num_fields, args.embedding_size))
+        loop, einsum = PairwiseLoopFwFMLayer(num_fields), FwFMLayer(num_fields)
+        print('%8d %12.3f %12.3f %10d %10d' % (
+            num_fields, time_layer(loop, inputs) * 1000, time_layer(einsum, inputs) * 1000,
+            count_graph_ops(loop, inputs), count_graph_ops(einsum, inputs)))
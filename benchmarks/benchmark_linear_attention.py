@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+"""
+Activation memory, training step and serving latency of the BST ``Transformer`` with ``scaled_dot_product`` and
+``linear`` attention over the history length.
+
+    python benchmarks/benchmark_linear_attention.py --batch_size 16 --maxlen 50 200 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from deepctr.layers import Transformer
+from timing import time_layer, total_tensor_bytes
+
+
+def serve_latency(layer, inputs, warmup=3, repeat=20):
+    """Average seconds of one forward pass of ``layer`` on ``inputs`` inside a ``tf.function``."""
+    forward = tf.function(lambda x: layer(x, training=False))
+    for _ in range(warmup):
+        forward(inputs)
+    start = time.time()
+    for _ in range(repeat):
+        forward(inputs)
+    return (time.time() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=16)
+    parser.add_argument('--maxlen', type=int, nargs='+', default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    print('%8s %20s %10s %10s %10s' % ('maxlen', 'attention_type', 'act MB', 'train ms', 'serve ms'))
+    for maxlen in args.maxlen:
+        seq = tf.random.normal((args.batch_size, maxlen, 64))
+        lengths = tf.constant(np.random.randint(1, maxlen + 1, (args.batch_size, 1)))
+        inputs = [seq, seq, lengths, lengths]
+        for attention_type in ('scaled_dot_product', 'linear'):
+            layer = Transformer(att_embedding_size=8, head_num=8, use_positional_encoding=True, use_layer_norm=True,
+                                blinding=False, supports_masking=False, output_type=None, max_len=maxlen,
+                                attention_type=attention_type)
+            print('%8d %20s %10.1f %10.3f %10.3f' % (
+                maxlen, attention_type, total_tensor_bytes(layer, inputs) / 2. ** 20,
+                time_layer(layer, inputs) * 1000, serve_latency(layer, inputs) * 1000))
@@ -0,0 +1,76 @@
+# -*- coding:utf-8 -*-
+"""
+Parameters, build time and training throughput of MLR over the number of regions, next to the former model that
+called ``get_linear_logit`` once per region for both the region and the learner scores.
+
+    python benchmarks/benchmark_mlr.py --batch_size 1024 --num_fields 26 --region_num 4 12 24
+"""
+
+import argparse
+import time
+
+from keras.layers import Activation
+
+import deepctr.models.mlr as mlr_module
+from deepctr.data import SyntheticDataGenerator
+from deepctr.feature_column import SparseFeat, get_linear_logit
+from deepctr.layers.core import PredictionLayer
+from deepctr.layers.utils import concat_func
+from deepctr.models import MLR
+
+
+def per_region_region_score(features, feature_columns, region_number, l2_reg, seed, prefix='region_',
+                            seq_mask_zero=True):
+    region_logit = concat_func([get_linear_logit(features, feature_columns, seed=seed + i,
+                                                 prefix=prefix + str(i + 1), l2_reg=l2_reg) for i in
+                                range(region_number)])
+    return Activation('softmax')(region_logit)
+
+
+def per_region_learner_score(features, feature_columns, region_number, l2_reg, seed, prefix='learner_',
+                             seq_mask_zero=True, task='binary'):
+    return concat_func([PredictionLayer(task=task, use_bias=False)(
+        get_linear_logit(features, feature_columns, seed=seed + i, prefix=prefix + str(i + 1), l2_reg=l2_reg))
+        for i in range(region_number)])
+
+
+def build(per_region, feature_columns, region_num):
+    region_score, learner_score = mlr_module.get_region_score, mlr_module.get_learner_score
+    if per_region:
+        mlr_module.get_region_score, mlr_module.get_learner_score = per_region_region_score, per_region_learner_score
+    try:
+        return MLR(feature_columns, region_num=region_num)
+    finally:
+        mlr_module.get_region_score, mlr_module.get_learner_score = region_score, learner_score
+
+
+def throughput(model, x, y, batch_size, steps=10):
+    model.compile('adam', 'binary_crossentropy')
+    for _ in range(2):
+        model.train_on_batch(x, y)
+    start = time.time()
+    for _ in range(steps):
+        model.train_on_batch(x, y)
+    return batch_size * steps / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--num_fields', type=int, default=26)
+    parser.add_argument('--region_num', type=int, nargs='+', default=[4, 12, 24])
+    args = parser.parse_args()
+
+    feature_columns = [SparseFeat('C%d' % i, 10000) for i in range(args.num_fields)]
+    chunk = SyntheticDataGenerator(feature_columns, num_rows=args.batch_size).generate_chunk(0, args.batch_size)
+    x, y = dict((fc.name, chunk[fc.name]) for fc in feature_columns), chunk['label']
+
+    print('%8s %12s %10s %10s %10s %12s' % ('regions', 'variant', 'tables', 'params', 'build s', 'train smp/s'))
+    for region_num in args.region_num:
+        for name, per_region in (('per region', True), ('single', False)):
+            start = time.time()
+            model = build(per_region, feature_columns, region_num)
+            build_time = time.time() - start
+            tables = len([w for w in model.weights if 'emb' in w.name])
+            print('%8d %12s %10d %10d %10.2f %12.0f' % (region_num, name, tables, model.count_params(), build_time,
+                                                       throughput(model, x, y, args.batch_size)))
@@ -0,0 +1,109 @@
+# -*- coding:utf-8 -*-
+"""
+Training throughput of MMoE and PLE over the number of experts, next to the former models that built one ``DNN`` per
+expert and per gate and stacked their outputs.
+
+    python benchmarks/benchmark_mmoe.py --batch_size 1024 --num_experts 4 8 16
+"""
+
+import argparse
+import time
+
+import tensorflow as tf
+from keras.layers import Dense, Lambda
+from keras.models import Model
+
+from deepctr.data import SyntheticDataGenerator
+from deepctr.feature_column import SparseFeat, DenseFeat, build_input_features, input_from_feature_columns
+from deepctr.layers.core import DNN, PredictionLayer
+from deepctr.layers.utils import combined_dnn_input, reduce_sum
+from deepctr.models.multitask import MMOE, PLE
+
+EXPERT_UNITS = (256, 128)
+TOWER_UNITS = (64,)
+TASK_NAMES = ('ctr', 'ctcvr')
+
+
+def mixture(experts, gate_input, name):
+    """Softmax gate over the stacked ``experts`` as built by the former models."""
+    expert_concat = Lambda(lambda x: tf.stack(x, axis=1))(experts)
+    gate_out = Dense(len(experts), use_bias=False, activation='softmax', name=name + 'gate_softmax')(gate_input)
+    gate_out = Lambda(lambda x: tf.expand_dims(x, axis=-1))(gate_out)
+    return Lambda(lambda x: reduce_sum(x[0] * x[1], axis=1, keep_dims=False))([expert_concat, gate_out])
+
+
+def towers(outs):
+    return [PredictionLayer('binary', name=name)(Dense(1, use_bias=False)(DNN(TOWER_UNITS, name='tower_' + name)(out)))
+            for name, out in zip(TASK_NAMES, outs)]
+
+
+def dnn_inputs(feature_columns):
+    features = build_input_features(feature_columns)
+    sparse_embedding_list, dense_value_list = input_from_feature_columns(features, feature_columns, 1e-5, 1024)
+    return list(features.values()), combined_dnn_input(sparse_embedding_list, dense_value_list)
+
+
+def per_expert_mmoe(feature_columns, num_experts):
+    inputs_list, dnn_input = dnn_inputs(feature_columns)
+    experts = [DNN(EXPERT_UNITS, name='expert_' + str(i))(dnn_input) for i in range(num_experts)]
+    return Model(inputs_list, towers([mixture(experts, dnn_input, name) for name in TASK_NAMES]))
+
+
+def per_expert_ple(feature_columns, num_experts, num_levels=2):
+    inputs_list, dnn_input = dnn_inputs(feature_columns)
+    specific_expert_num = shared_expert_num = num_experts // 3
+    inputs = [dnn_input] * 3
+    for level in range(num_levels):
+        prefix = 'level_%d_' % level
+        specific = [[DNN(EXPERT_UNITS[:1], name=prefix + name + '_expert_' + str(j))(inputs[i])
+                     for j in range(specific_expert_num)] for i, name in enumerate(TASK_NAMES)]
+        shared = [DNN(EXPERT_UNITS[:1], name=prefix + 'shared_expert_' + str(k))(inputs[-1])
+                  for k in range(shared_expert_num)]
+        outs = [mixture(specific[i] + shared, inputs[i], prefix + name) for i, name in enumerate(TASK_NAMES)]
+        if level < num_levels - 1:
+            outs.append(mixture(specific[0] + specific[1] + shared, inputs[-1], prefix + 'shared'))
+        inputs = outs
+    return Model(inputs_list, towers(inputs))
+
+
+def count_model_ops(model, x):
+    """Number of operations in the graph of one forward pass of ``model``."""
+    concrete = tf.function(lambda inputs: model(inputs)).get_concrete_function(
+        dict((name, tf.TensorSpec((None,) + value.shape[1:], tf.as_dtype(value.dtype))) for name, value in x.items()))
+    return len(concrete.graph.get_operations())
+
+
+def throughput(model, x, y_list, batch_size, steps=30):
+    model.compile('adam', ['binary_crossentropy'] * len(TASK_NAMES))
+    for _ in range(2):
+        model.train_on_batch(x, y_list)
+    start = time.time()
+    for _ in range(steps):
+        model.train_on_batch(x, y_list)
+    return batch_size * steps / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--num_experts', type=int, nargs='+', default=[4, 8, 16])
+    args = parser.parse_args()
+
+    feature_columns = [SparseFeat('C%d' % i, 1000, embedding_dim=16) for i in range(26)] + \
+                      [DenseFeat('I%d' % i, 1) for i in range(13)]
+    chunk = SyntheticDataGenerator(feature_columns, num_rows=args.batch_size).generate_chunk(0, args.batch_size)
+    x = dict((fc.name, chunk[fc.name]) for fc in feature_columns)
+    y_list = [chunk['label']] * len(TASK_NAMES)
+
+    print('%8s %6s %14s %14s %16s %16s' % ('experts', 'model', 'per expert ops', 'batched ops', 'per expert smp/s',
+                                            'batched smp/s'))
+    for num_experts in args.num_experts:
+        per_level = num_experts // 3
+        models = [('MMoE', per_expert_mmoe(feature_columns, num_experts),
+                   MMOE(feature_columns, num_experts, EXPERT_UNITS, TOWER_UNITS, task_names=TASK_NAMES)),
+                  ('PLE', per_expert_ple(feature_columns, num_experts),
+                   PLE(feature_columns, per_level, per_level, 2, EXPERT_UNITS[:1], TOWER_UNITS, task_names=TASK_NAMES))]
+        for name, per_expert, batched in models:
+            print('%8d %6s %14d %14d %16.0f %16.0f' % (
+                num_experts, name, count_model_ops(per_expert, x), count_model_ops(batched, x),
+                throughput(per_expert, x, y_list, args.batch_size), throughput(batched, x, y_list, args.batch_size)))
@@ -0,0 +1,105 @@
+# -*- coding:utf-8 -*-
+"""
+Build time and graph size of ONN over the number of fields, for the former one ``Embedding`` layer per feature pair
+and the stacked field-aware tables, and the largest difference of their predictions with the same weights.
+
+    python benchmarks/benchmark_onn.py --num_fields 10 20 40
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+import tensorflow as tf
+from keras import backend as K
+from keras.layers import BatchNormalization, Dense, Embedding, Flatten, Lambda, multiply
+from keras.models import Model
+from keras.regularizers import l2
+
+from deepctr.data import SyntheticDataGenerator
+from deepctr.feature_column import SparseFeat, VarLenSparseFeat, build_input_features, get_linear_logit
+from deepctr.layers import DNN, NoMask, PredictionLayer, SequencePoolingLayer
+from deepctr.layers.utils import add_func, concat_func
+from deepctr.models import ONN
+
+
+def PerPairONN(feature_columns, dnn_hidden_units=(256, 128, 64), l2_reg_embedding=1e-5, reduce_sum=False):
+    """The ONN of the former one ``Embedding`` layer per (feature, other feature) pair."""
+    features = build_input_features(feature_columns)
+    linear_logit = get_linear_logit(features, feature_columns, prefix='linear')
+    columns = [fc for fc in feature_columns if isinstance(fc, (SparseFeat, VarLenSparseFeat))]
+    embeddings = dict((fc_i.name, dict((fc_j.name, Embedding(
+        fc_i.vocabulary_size, fc_i.embedding_dim, embeddings_initializer=fc_i.embeddings_initializer,
+        embeddings_regularizer=l2(l2_reg_embedding), mask_zero=isinstance(fc_i, VarLenSparseFeat),
+        name='sparse_emb_' + fc_i.name + '_' + fc_j.name)) for fc_j in columns)) for fc_i in columns)
+
+    def feature_embedding(fc_i, fc_j):
+        embed = embeddings[fc_i.name][fc_j.name](features[fc_i.name])
+        if isinstance(fc_i, SparseFeat):
+            return NoMask()(embed)
+        return SequencePoolingLayer(fc_i.combiner, supports_masking=True)(embed)
+
+    embed_list = []
+    for fc_i, fc_j in itertools.combinations(columns, 2):
+        element_wise_prod = multiply([feature_embedding(fc_i, fc_j), feature_embedding(fc_j, fc_i)])
+        if reduce_sum:
+            element_wise_prod = Lambda(lambda x: K.sum(x, axis=-1))(element_wise_prod)
+        embed_list.append(element_wise_prod)
+    ffm_out = BatchNormalization()(Flatten()(concat_func(embed_list, axis=1)))
+    dnn_logit = Dense(1, use_bias=False)(DNN(dnn_hidden_units)(ffm_out))
+    output = PredictionLayer('binary')(add_func([dnn_logit, linear_logit]))
+    return Model(inputs=list(features.values()), outputs=output)
+
+
+def build(model_fn, feature_columns):
+    K.clear_session()
+    start = time.time()
+    model = model_fn(feature_columns)
+    return model, time.time() - start
+
+
+def copy_weights(per_pair, stacked, feature_columns):
+    """Load the weights of ``per_pair`` into ``stacked``, the per pair tables become the copies of the stacked
+    tables."""
+    for layer in stacked.layers:
+        if layer.name == 'field_aware_embedding':
+            # the copy of a feature for itself is not used by the pairs
+            names = [fc.name for fc in feature_columns]
+            tables = layer.get_weights()
+            for i, name_i in enumerate(names):
+                for j, name_j in enumerate(names):
+                    if i != j:
+                        tables[i][:, j] = per_pair.get_layer('sparse_emb_%s_%s' % (name_i, name_j)).get_weights()[0]
+            layer.set_weights(tables)
+        elif layer.weights:
+            layer.set_weights(per_pair.get_layer(layer.name).get_weights())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=4)
+    parser.add_argument('--num_fields', type=int, nargs='+', default=[10, 20, 40])
+    args = parser.parse_args()
+
+    print('%8s %14s %14s %10s %12s %12s' % ('fields', 'per-pair build', 'stacked build', 'per-pair ops',
+                                            'stacked ops', 'max |diff|'))
+    for num_fields in args.num_fields:
+        feature_columns = [SparseFeat('C%d' % i, 100, embedding_dim=args.embedding_size) for i in range(num_fields)]
+        per_pair, per_pair_time = build(PerPairONN, feature_columns)
+        stacked, stacked_time = build(lambda columns: ONN(columns, columns), feature_columns)
+        # embeddings of unit scale, the default initializer makes both outputs almost constant
+        for layer in per_pair.layers:
+            if isinstance(layer, Embedding):
+                layer.set_weights([np.random.normal(size=w.shape) for w in layer.get_weights()])
+        copy_weights(per_pair, stacked, feature_columns)
+
+        chunk = SyntheticDataGenerator(feature_columns, num_rows=args.batch_size).generate_chunk(0, args.batch_size)
+        x = dict((fc.name, chunk[fc.name]) for fc in feature_columns)
+        diff = np.abs(per_pair.predict(x, batch_size=args.batch_size, verbose=0) -
+                      stacked.predict(x, batch_size=args.batch_size, verbose=0)).max()
+        ops = [len(tf.function(model).get_concrete_function(
+            dict((name, tf.TensorSpec(inp.shape, inp.dtype)) for name, inp in zip(model.input_names, model.inputs))
+        ).graph.get_operations()) for model in (per_pair, stacked)]
+        print('%8d %14.2f %14.2f %10d %12d %12.2e' % (num_fields, per_pair_time, stacked_time, ops[0], ops[1], diff))
@@ -0,0 +1,72 @@
+# -*- coding:utf-8 -*-
+"""
+Memory and throughput of PNN with ``use_outter=True`` over the number of fields, next to the former ``mat`` kernel
+that built a ``batch * k * pair * k`` intermediate.
+
+    python benchmarks/benchmark_pnn.py --batch_size 1024 --embedding_size 8 --num_fields 30 40
+"""
+
+import argparse
+import time
+
+import tensorflow as tf
+
+import deepctr.models.pnn as pnn_module
+from deepctr.data import SyntheticDataGenerator
+from deepctr.feature_column import SparseFeat
+from deepctr.layers import OutterProductLayer
+from deepctr.models import PNN
+from timing import largest_tensor_bytes, time_layer
+
+
+class ConcatOutterProductLayer(OutterProductLayer):
+    """The list concatenation of the pairs and the 4D ``mat`` product used by ``OutterProductLayer`` before the
+    gathers."""
+
+    def call(self, inputs, **kwargs):
+        p = tf.concat([inputs[i] for i in self.pair_rows], axis=1)  # batch * pair * k
+        q = tf.concat([inputs[j] for j in self.pair_cols], axis=1)
+        if self.kernel_type == 'mat':
+            # batch * k * pair * k
+            pk = tf.reduce_sum(tf.multiply(tf.expand_dims(p, 1), self.kernel), -1)
+            return tf.reduce_sum(tf.transpose(pk, [0, 2, 1]) * q, -1)
+        return tf.reduce_sum(p * q * tf.expand_dims(self.kernel, 0), -1)
+
+
+def train_throughput(layer_cls, num_fields, batch_size, embedding_size, steps=10):
+    """Samples per second of ``train_on_batch`` of PNN using ``layer_cls`` as outer product layer."""
+    feature_columns = [SparseFeat('C%d' % i, 1000, embedding_dim=embedding_size) for i in range(num_fields)]
+    pnn_module.OutterProductLayer = layer_cls
+    try:
+        model = PNN(feature_columns, use_inner=False, use_outter=True)
+    finally:
+        pnn_module.OutterProductLayer = OutterProductLayer
+    model.compile('adam', 'binary_crossentropy')
+    chunk = SyntheticDataGenerator(feature_columns, num_rows=batch_size).generate_chunk(0, batch_size)
+    x, y = dict((fc.name, chunk[fc.name]) for fc in feature_columns), chunk['label']
+    for _ in range(2):
+        model.train_on_batch(x, y)
+    start = time.time()
+    for _ in range(steps):
+        model.train_on_batch(x, y)
+    return batch_size * steps / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=8)
+    parser.add_argument('--num_fields', type=int, nargs='+', default=[30, 40])
+    args = parser.parse_args()
+
+    print('%8s %14s %14s %12s %12s %14s %14s' % ('fields', 'concat MB', 'gather MB', 'concat ms', 'gather ms',
+                                                 'concat smp/s', 'gather smp/s'))
+    for num_fields in args.num_fields:
+        inputs = [tf.random.normal((args.batch_size, 1, args.embedding_size)) for _ in range(num_fields)]
+        concat, gather = ConcatOutterProductLayer('mat'), OutterProductLayer('mat')
+        print('%8d %14.1f %14.1f %12.3f %12.3f %14.0f %14.0f' % (
+            num_fields, largest_tensor_bytes(concat, inputs) / 2.0 ** 20,
+            largest_tensor_bytes(gather, inputs) / 2.0 ** 20,
+            time_layer(concat, inputs) * 1000, time_layer(gather, inputs) * 1000,
+            train_throughput(ConcatOutterProductLayer, num_fields, args.batch_size, args.embedding_size),
+            train_throughput(OutterProductLayer, num_fields, args.batch_size, args.embedding_size)))
@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+"""
+Activation memory and training step time of the masked sequence layers, next to the former layers that tiled the
+masks to the embedding size and allocated full padding tensors.
+
+    python benchmarks/benchmark_sequence_pooling.py --batch_size 1024 --maxlen 50 200 --embedding_size 32
+"""
+
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from deepctr.layers import AttentionSequencePoolingLayer, SequencePoolingLayer, WeightedSequenceLayer
+from deepctr.layers.utils import div, reduce_max, reduce_sum, softmax
+from timing import time_layer, total_tensor_bytes
+
+
+class TiledSequencePoolingLayer(SequencePoolingLayer):
+    """The tiled mask of ``SequencePoolingLayer`` before the masked reductions, for ``supports_masking=False``."""
+
+    def call(self, seq_value_len_list, mask=None, **kwargs):
+        uiseq_embed_list, user_behavior_length = seq_value_len_list
+        mask = tf.sequence_mask(user_behavior_length, tf.shape(uiseq_embed_list)[1], dtype=tf.float32)
+        mask = tf.tile(tf.transpose(mask, (0, 2, 1)), [1, 1, uiseq_embed_list.shape[-1]])
+        if self.mode == "max":
+            return reduce_max(uiseq_embed_list - (1 - mask) * 1e9, 1, keep_dims=True)
+        hist = reduce_sum(uiseq_embed_list * mask, 1, keep_dims=False)
+        if self.mode == "mean":
+            hist = div(hist, tf.cast(user_behavior_length, tf.float32) + self.eps)
+        return tf.expand_dims(hist, axis=1)
+
+
+class PaddedWeightedSequenceLayer(WeightedSequenceLayer):
+    """The padding tensors of ``WeightedSequenceLayer`` before the masked fill, for ``supports_masking=False``."""
+
+    def call(self, input_list, mask=None, **kwargs):
+        key_input, key_length_input, value_input = input_list
+        mask = tf.transpose(tf.sequence_mask(key_length_input, tf.shape(key_input)[1], dtype=tf.bool), (0, 2, 1))
+        if self.weight_normalization:
+            paddings = tf.ones_like(value_input) * (-2 ** 32 + 1)
+        else:
+            paddings = tf.zeros_like(value_input)
+        value_input = tf.where(mask, value_input, paddings)
+        if self.weight_normalization:
+            value_input = softmax(value_input, dim=1)
+        return tf.multiply(key_input, value_input)
+
+
+class PaddedAttentionSequencePoolingLayer(AttentionSequencePoolingLayer):
+    """The padding tensor of ``AttentionSequencePoolingLayer`` before the masked fill, for
+    ``supports_masking=False``."""
+
+    def call(self, inputs, mask=None, training=None, **kwargs):
+        queries, keys, keys_length = inputs
+        key_masks = tf.sequence_mask(keys_length, tf.shape(keys)[1])
+        outputs = tf.transpose(self.local_att([queries, keys], training=training), (0, 2, 1))
+        if self.weight_normalization:
+            paddings = tf.ones_like(outputs) * (-2 ** 32 + 1)
+        else:
+            paddings = tf.zeros_like(outputs)
+        outputs = tf.where(key_masks, outputs, paddings)
+        if self.weight_normalization:
+            outputs = softmax(outputs)
+        return tf.matmul(outputs, keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--maxlen', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--embedding_size', type=int, default=32)
+    args = parser.parse_args()
+
+    print('%8s %22s %10s %10s %10s %10s' % ('maxlen', 'layer', 'former MB', 'MB', 'former ms', 'ms'))
+    for maxlen in args.maxlen:
+        seq = tf.random.normal((args.batch_size, maxlen, args.embedding_size))
+        lengths = tf.constant(np.random.randint(0, maxlen + 1, (args.batch_size, 1)))
+        weights = tf.random.normal((args.batch_size, maxlen, 1))
+        query = tf.random.normal((args.batch_size, 1, args.embedding_size))
+        cases = [('pooling ' + mode, TiledSequencePoolingLayer(mode), SequencePoolingLayer(mode), [seq, lengths])
+                 for mode in ('sum', 'mean', 'max')]
+        cases += [('weighted', PaddedWeightedSequenceLayer(), WeightedSequenceLayer(), [seq, lengths, weights]),
+                  ('attention pooling', PaddedAttentionSequencePoolingLayer(weight_normalization=True),
+                   AttentionSequencePoolingLayer(weight_normalization=True), [query, seq, lengths])]
+        for name, former, layer, inputs in cases:
+            former_out = former(inputs)
+            layer(inputs)
+            layer.set_weights(former.get_weights())
+            np.testing.assert_allclose(former_out.numpy(), layer(inputs).numpy(), rtol=1e-4, atol=1e-4)
+            print('%8d %22s %10.1f %10.1f %10.3f %10.3f' % (
+                maxlen, name, total_tensor_bytes(former, inputs) / 2. ** 20,
+                total_tensor_bytes(layer, inputs) / 2. ** 20, time_layer(former, inputs) * 1000,
+                time_layer(layer, inputs) * 1000))
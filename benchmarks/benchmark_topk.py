@@ -0,0 +1,64 @@
+# -*- coding:utf-8 -*-
+"""
+Serving throughput and operation count of MMoE and DCN-Mix with dense gates, where every expert runs on every sample,
+next to ``top_k`` sparse gates, where every expert only runs on the samples routed to it.
+
+    python benchmarks/benchmark_topk.py --batch_size 1024 --num_experts 8 16 --top_k 2
+"""
+
+import argparse
+import time
+
+import tensorflow as tf
+
+from deepctr.data import SyntheticDataGenerator
+from deepctr.feature_column import SparseFeat, DenseFeat
+from deepctr.layers import CrossNetMix
+from deepctr.models import DCNMix
+from deepctr.models.multitask import MMOE
+from timing import count_graph_ops, time_layer
+
+EXPERT_UNITS = (256, 128)
+
+
+def serving_throughput(model, x, batch_size, steps=20):
+    for _ in range(2):
+        model.predict_on_batch(x)
+    start = time.time()
+    for _ in range(steps):
+        model.predict_on_batch(x)
+    return batch_size * steps / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--num_experts', type=int, nargs='+', default=[8, 16])
+    parser.add_argument('--top_k', type=int, default=2)
+    args = parser.parse_args()
+
+    feature_columns = [SparseFeat('C%d' % i, 1000, embedding_dim=16) for i in range(26)] + \
+                      [DenseFeat('I%d' % i, 1) for i in range(13)]
+    chunk = SyntheticDataGenerator(feature_columns, num_rows=args.batch_size).generate_chunk(0, args.batch_size)
+    x = dict((fc.name, chunk[fc.name]) for fc in feature_columns)
+    cross_inputs = tf.random.normal((args.batch_size, 26 * 16 + 13))
+
+    print('%8s %8s %6s %10s %10s %12s' % ('experts', 'model', 'top_k', 'layer ops', 'layer ms', 'serve smp/s'))
+    for num_experts in args.num_experts:
+        for top_k in (None, args.top_k):
+            mmoe = MMOE(feature_columns, num_experts, EXPERT_UNITS, gate_top_k=top_k)
+            experts = mmoe.get_layer('experts')
+            expert_inputs = cross_inputs
+            if top_k is not None:
+                expert_inputs = [cross_inputs, mmoe.get_layer('gate_softmax')(cross_inputs)]
+            print('%8d %8s %6s %10d %10.3f %12.0f' % (
+                num_experts, 'MMoE', top_k, count_graph_ops(experts, expert_inputs),
+                time_layer(experts, expert_inputs, training=False) * 1000,
+                serving_throughput(mmoe, x, args.batch_size)))
+
+            dcn_mix = DCNMix(feature_columns, feature_columns, num_experts=num_experts, gate_top_k=top_k)
+            cross = CrossNetMix(num_experts=num_experts, layer_num=2, top_k=top_k)
+            print('%8d %8s %6s %10d %10.3f %12.0f' % (
+                num_experts, 'DCNMix', top_k, count_graph_ops(cross, cross_inputs),
+                time_layer(cross, cross_inputs, training=False) * 1000,
+                serving_throughput(dcn_mix, x, args.batch_size)))
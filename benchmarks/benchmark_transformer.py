@@ -0,0 +1,92 @@
+# -*- coding:utf-8 -*-
+"""
+Activation memory and step time of the BST ``Transformer`` over the history length, next to the former layer that
+stacked the heads on the batch axis and tiled the masks to ``(head_num * batch_size, T_q, T_k)``.
+
+    python benchmarks/benchmark_transformer.py --batch_size 256 --maxlen 50 100 200
+"""
+
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from deepctr.layers import Transformer
+from deepctr.layers.utils import reduce_max, reduce_mean, softmax
+from timing import time_layer, total_tensor_bytes
+
+
+class TiledMaskTransformer(Transformer):
+    """The attention of ``Transformer`` before the broadcast masks and the ``(N, h, T, D)`` heads, for
+    ``attention_type='scaled_dot_product'`` and ``supports_masking=False``."""
+
+    def call(self, inputs, mask=None, training=None, **kwargs):
+        queries, keys, query_masks, key_masks = inputs
+        query_masks = tf.squeeze(tf.sequence_mask(query_masks, tf.shape(queries)[1], dtype=tf.float32), axis=1)
+        key_masks = tf.squeeze(tf.sequence_mask(key_masks, tf.shape(keys)[1], dtype=tf.float32), axis=1)
+        if self.use_positional_encoding:
+            queries = self.query_pe(queries)
+            keys = self.key_pe(keys)
+
+        Q_ = tf.concat(tf.split(tf.tensordot(queries, self.W_Query, axes=(-1, 0)), self.head_num, axis=2), axis=0)
+        K_ = tf.concat(tf.split(tf.tensordot(keys, self.W_key, axes=(-1, 0)), self.head_num, axis=2), axis=0)
+        V_ = tf.concat(tf.split(tf.tensordot(keys, self.W_Value, axes=(-1, 0)), self.head_num, axis=2), axis=0)
+        outputs = tf.matmul(Q_, K_, transpose_b=True) / (K_.get_shape().as_list()[-1] ** 0.5)
+
+        key_masks = tf.tile(tf.expand_dims(tf.tile(key_masks, [self.head_num, 1]), 1), [1, tf.shape(queries)[1], 1])
+        paddings = tf.ones_like(outputs) * (-2 ** 32 + 1)
+        outputs = tf.where(tf.equal(key_masks, 1), outputs, paddings, )
+        if self.blinding:
+            outputs = tf.linalg.set_diag(outputs, tf.ones_like(outputs)[:, :, 0] * (-2 ** 32 + 1))
+        outputs -= reduce_max(outputs, axis=-1, keep_dims=True)
+        outputs = softmax(outputs)
+        query_masks = tf.tile(tf.expand_dims(tf.tile(query_masks, [self.head_num, 1]), -1),
+                              [1, 1, tf.shape(keys)[1]])
+        outputs *= query_masks
+        outputs = self.dropout(outputs, training=training)
+        result = tf.concat(tf.split(tf.matmul(outputs, V_), self.head_num, axis=0), axis=2)
+
+        if self.use_res:
+            result += queries
+        if self.use_layer_norm:
+            result = self.ln(result)
+        if self.use_feed_forward:
+            fw2 = tf.tensordot(tf.nn.relu(tf.tensordot(result, self.fw1, axes=[-1, 0])), self.fw2, axes=[-1, 0])
+            if self.use_res:
+                result += fw2
+            if self.use_layer_norm:
+                result = self.ln(result)
+        if self.output_type == "mean":
+            return reduce_mean(result, axis=1, keep_dims=True)
+        return result
+
+
+def bst_transformer(cls, maxlen, blinding=False, **kwargs):
+    return cls(att_embedding_size=8, head_num=8, use_positional_encoding=True, use_layer_norm=True,
+               blinding=blinding, supports_masking=False, output_type=None, max_len=maxlen, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--maxlen', type=int, nargs='+', default=[50, 100, 200])
+    args = parser.parse_args()
+
+    print('%8s %10s %12s %10s' % ('maxlen', 'variant', 'act MB', 'train ms'))
+    for maxlen in args.maxlen:
+        seq = tf.random.normal((args.batch_size, maxlen, 64))
+        lengths = tf.constant(np.random.randint(1, maxlen + 1, (args.batch_size, 1)))
+        inputs = [seq, seq, lengths, lengths]
+
+        # same outputs with the same weights, blinding included
+        tiled, broadcast = bst_transformer(TiledMaskTransformer, maxlen, True), bst_transformer(Transformer, maxlen, True)
+        tiled_out = tiled(inputs)
+        broadcast(inputs)
+        broadcast.set_weights(tiled.get_weights())
+        np.testing.assert_allclose(tiled_out.numpy(), broadcast(inputs).numpy(), rtol=1e-4, atol=1e-4)
+
+        for name, layer in (('tiled', bst_transformer(TiledMaskTransformer, maxlen)),
+                            ('broadcast', bst_transformer(Transformer, maxlen)),
+                            ('fused', bst_transformer(Transformer, maxlen, fused_qkv=True))):
+            print('%8d %10s %12.1f %10.3f' % (maxlen, name, total_tensor_bytes(layer, inputs) / 2. ** 20,
+                                              time_layer(layer, inputs) * 1000))
@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+"""
+Throughput and peak memory of xDeepFM with ``cin_layer_size=(256, 256)``, for the former split, matmul and conv1d
+CIN, the einsum CIN and the low rank filters.
+
+    python benchmarks/benchmark_xdeepfm.py --batch_size 1024 --embedding_size 8 --filter_rank 4
+"""
+
+import argparse
+import time
+
+import tensorflow as tf
+
+import deepctr.models.xdeepfm as xdeepfm_module
+from deepctr.data import SyntheticDataGenerator, criteo_feature_columns
+from deepctr.layers import CIN
+from deepctr.models import xDeepFM
+from timing import largest_tensor_bytes, time_layer
+
+
+class Conv1DCIN(CIN):
+    """The split, batched matmul, transposes and ``conv1d`` used by ``CIN`` before the einsum."""
+
+    def call(self, inputs, **kwargs):
+        dim = int(inputs.get_shape()[-1])
+        hidden_nn_layers = [inputs]
+        final_result = []
+        split_tensor0 = tf.split(hidden_nn_layers[0], dim * [1], 2)
+        for idx, layer_size in enumerate(self.layer_size):
+            split_tensor = tf.split(hidden_nn_layers[-1], dim * [1], 2)
+            dot_result_m = tf.matmul(split_tensor0, split_tensor, transpose_b=True)
+            dot_result_o = tf.reshape(dot_result_m, shape=[dim, -1, self.field_nums[0] * self.field_nums[idx]])
+            dot_result = tf.transpose(dot_result_o, perm=[1, 0, 2])
+            curr_out = tf.nn.conv1d(dot_result, filters=self.filters[idx], stride=1, padding='VALID')
+            curr_out = self.activation_layers[idx](tf.nn.bias_add(curr_out, self.bias[idx]))
+            curr_out = tf.transpose(curr_out, perm=[0, 2, 1])
+            if self.split_half and idx != len(self.layer_size) - 1:
+                next_hidden, direct_connect = tf.split(curr_out, 2 * [layer_size // 2], 1)
+            elif self.split_half:
+                direct_connect, next_hidden = curr_out, 0
+            else:
+                direct_connect, next_hidden = curr_out, curr_out
+            final_result.append(direct_connect)
+            hidden_nn_layers.append(next_hidden)
+        return tf.reduce_sum(tf.concat(final_result, axis=1), -1)
+
+
+def train_throughput(cin_cls, batch_size, embedding_size, filter_rank=None, steps=10):
+    """Samples per second of ``train_on_batch`` of xDeepFM on Criteo shaped data using ``cin_cls`` as CIN."""
+    feature_columns = criteo_feature_columns(embedding_size, vocabulary_scale=0.001)
+    xdeepfm_module.CIN = cin_cls
+    try:
+        model = xDeepFM(feature_columns, feature_columns, cin_layer_size=(256, 256), cin_filter_rank=filter_rank)
+    finally:
+        xdeepfm_module.CIN = CIN
+    model.compile('adam', 'binary_crossentropy')
+    chunk = SyntheticDataGenerator(feature_columns, num_rows=batch_size).generate_chunk(0, batch_size)
+    x, y = dict((fc.name, chunk[fc.name]) for fc in feature_columns), chunk['label']
+    for _ in range(2):
+        model.train_on_batch(x, y)
+    start = time.time()
+    for _ in range(steps):
+        model.train_on_batch(x, y)
+    return batch_size * steps / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, default=1024)
+    parser.add_argument('--embedding_size', type=int, default=8)
+    parser.add_argument('--num_fields', type=int, default=26)
+    parser.add_argument('--filter_rank', type=int, default=4)
+    args = parser.parse_args()
+
+    inputs = tf.random.normal((args.batch_size, args.num_fields, args.embedding_size))
+    print('%12s %12s %12s %14s' % ('CIN', 'largest MB', 'layer ms', 'xDeepFM smp/s'))
+    for name, cin_cls, filter_rank in [('conv1d', Conv1DCIN, None), ('einsum', CIN, None),
+                                       ('rank %d' % args.filter_rank, CIN, args.filter_rank)]:
+        print('%12s %12.1f %12.3f %14.0f' % (
+            name, largest_tensor_bytes(cin_cls((256, 256), filter_rank=filter_rank), inputs) / 2.0 ** 20,
+            time_layer(cin_cls((256, 256), filter_rank=filter_rank), inputs) * 1000,
+            train_throughput(cin_cls, args.batch_size, args.embedding_size, filter_rank)))
@@ -0,0 +1,69 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import time
+
+import tensorflow as tf
+
+
+def time_layer(layer, inputs, training=True, warmup=3, repeat=20):
+    """Average seconds of one forward and backward pass of ``layer`` on ``inputs`` inside a ``tf.function``.
+
+    The loss is the sum of squares of the output and is returned with the gradients, with a plain sum grappler
+    prunes the parts of the forward pass its gradients do not depend on, e.g. the products of the pairs."""
+    layer(inputs)
+
+    @tf.function
+    def step(x):
+        with tf.GradientTape() as tape:
+            tape.watch(x)
+            loss = tf.reduce_sum(tf.square(layer(x, training=training)))
+        return loss, tape.gradient(loss, [x] + layer.trainable_weights)
+
+    for _ in range(warmup):
+        step(inputs)
+    start = time.time()
+    for _ in range(repeat):
+        step(inputs)
+    return (time.time() - start) / repeat
+
+
+def count_graph_ops(layer, inputs):
+    """Number of operations in the graph of one forward pass of ``layer``."""
+    layer(inputs)
+    concrete = tf.function(lambda x: layer(x)).get_concrete_function(
+        tf.nest.map_structure(lambda t: tf.TensorSpec(t.shape, t.dtype), inputs))
+    return len(concrete.graph.get_operations())
+
+
+def largest_tensor_bytes(layer, inputs):
+    """Size in bytes of the largest intermediate tensor of one forward pass of ``layer`` at the batch size of
+    ``inputs``."""
+    layer(inputs)
+    concrete = tf.function(lambda x: layer(x)).get_concrete_function(
+        tf.nest.map_structure(lambda t: tf.TensorSpec(t.shape, t.dtype), inputs))
+    largest = 0
+    for op in concrete.graph.get_operations():
+        for output in op.outputs:
+            if output.shape.is_fully_defined() and output.dtype.size > 0:
+                largest = max(largest, output.shape.num_elements() * output.dtype.size)
+    return largest
+
+
+def total_tensor_bytes(layer, inputs):
+    """Sum of the sizes in bytes of the intermediate tensors of one forward pass of ``layer`` at the batch size of
+    ``inputs``, an upper bound of its activation memory."""
+    layer(inputs)
+    concrete = tf.function(lambda x: layer(x)).get_concrete_function(
+        tf.nest.map_structure(lambda t: tf.TensorSpec(t.shape, t.dtype), inputs))
+    total = 0
+    for op in concrete.graph.get_operations():
+        for output in op.outputs:
+            if output.shape.is_fully_defined() and output.dtype.size > 0:
+                total += output.shape.num_elements() * output.dtype.size
+    return total
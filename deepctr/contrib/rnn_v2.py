@@ -81,6 +81,10 @@ try:
     _like_rnncell = rnn_cell_impl._like_rnncell
 except:
     _like_rnncell = _like_rnncell_
+try:
+    _is_nested = nest.is_nested
+except AttributeError:  # nest.is_sequence was renamed and then removed
+    _is_nested = nest.is_sequence
 
 
 # pylint: enable=protected-access
@@ -219,7 +223,7 @@ def _infer_state_dtype(explicit_dtype, state):
 
         return explicit_dtype
 
-    elif nest.is_sequence(state):
+    elif _is_nested(state):
 
         inferred_dtypes = [element.dtype for element in nest.flatten(state)]
 
@@ -520,7 +524,7 @@ def _reverse_seq(input_seq, lengths):
 
         # Join into (time, batch_size, depth)
 
-        s_joined = array_ops.stack(sequence)
+        s_joined = tf.stack(sequence)
 
         # Reverse along dimension 0
 
@@ -528,7 +532,7 @@ def _reverse_seq(input_seq, lengths):
 
         # Split again into list
 
-        result = array_ops.unstack(s_reversed)
+        result = tf.unstack(s_reversed)
 
         for r, flat_result in zip(result, flat_results):
             r.set_shape(input_shape)
@@ -1059,12 +1063,6 @@ def dynamic_rnn(cell, inputs, att_scores=None, sequence_length=None, initial_sta
 
             sequence_length, name="sequence_length")
 
-    # Create a new scope in which the caching device is either
-
-    # determined by the parent scope, or is set to place the cached
-
-    # Variable using the same placement as for the rest of the RNN.
-
     try:
         resue = tf.AUTO_REUSE
     except:
@@ -1072,9 +1070,6 @@ def dynamic_rnn(cell, inputs, att_scores=None, sequence_length=None, initial_sta
 
     with vs.variable_scope(scope or "rnn",reuse=resue) as varscope:#TODO:user defined reuse
 
-        if varscope.caching_device is None:
-            varscope.set_caching_device(lambda op: op.device)
-
         batch_size = _best_effort_input_batch_size(flat_input)
 
         if initial_state is not None:
@@ -1092,7 +1087,7 @@ def dynamic_rnn(cell, inputs, att_scores=None, sequence_length=None, initial_sta
 
             x_shape = array_ops.shape(x)
 
-            packed_shape = array_ops.stack(shape)
+            packed_shape = tf.stack(shape)
 
             return control_flow_ops.Assert(
 
@@ -1278,7 +1273,7 @@ def _dynamic_rnn_loop(cell,
 
         return array_ops.zeros(
 
-            array_ops.stack(size), _infer_state_dtype(dtype, state))
+            tf.stack(size), _infer_state_dtype(dtype, state))
 
     flat_zero_output = tuple(_create_zero_arrays(output)
 
@@ -10,6 +10,11 @@ _BIAS_VARIABLE_NAME = "bias"
 
 _WEIGHTS_VARIABLE_NAME = "kernel"
 
+try:
+    _is_nested = nest.is_nested
+except AttributeError:  # nest.is_sequence was renamed and then removed
+    _is_nested = nest.is_sequence
+
 
 class _Linear_(object):
     """Linear map: sum_i(args[i] * W[i]), where W[i] is a variable.
@@ -54,10 +59,10 @@ class _Linear_(object):
 
         self._build_bias = build_bias
 
-        if args is None or (nest.is_sequence(args) and not args):
+        if args is None or (_is_nested(args) and not args):
             raise ValueError("`args` must be specified")
 
-        if not nest.is_sequence(args):
+        if not _is_nested(args):
 
             args = [args]
 
@@ -191,10 +196,6 @@ class QAAttGRUCell(RNNCell):
 
         self._bias_initializer = bias_initializer
 
-        self._gate_linear = None
-
-        self._candidate_linear = None
-
     @property
     def state_size(self):
 
@@ -205,56 +206,56 @@ class QAAttGRUCell(RNNCell):
 
         return self._num_units
 
-    def __call__(self, inputs, state, att_score):
-
-        return self.call(inputs, state, att_score)
-
-    def call(self, inputs, state, att_score=None):
-        """Gated recurrent unit (GRU) with nunits cells."""
-
-        if self._gate_linear is None:
+    def build(self, inputs_shape):
+        # the weights are created here as in GRUCell so that the layers holding the cell track and save them
 
-            bias_ones = self._bias_initializer
+        input_depth = int(inputs_shape[-1])
 
-            if self._bias_initializer is None:
-                bias_ones = init_ops.constant_initializer(
-                    1.0, dtype=inputs.dtype)
+        bias_ones = self._bias_initializer
 
-            with vs.variable_scope("gates"):  # Reset gate and update gate.
+        if self._bias_initializer is None:
+            bias_ones = init_ops.constant_initializer(1.0, dtype=self.dtype)
 
-                self._gate_linear = _Linear(
+        bias_zeros = self._bias_initializer
 
-                    [inputs, state],
+        if self._bias_initializer is None:
+            bias_zeros = init_ops.constant_initializer(0.0, dtype=self.dtype)
 
-                    2 * self._num_units,
+        self._gate_kernel = self.add_weight(
+            "gates/%s" % _WEIGHTS_VARIABLE_NAME, shape=[input_depth + self._num_units, 2 * self._num_units],
+            initializer=self._kernel_initializer)
 
-                    True,
+        self._gate_bias = self.add_weight(
+            "gates/%s" % _BIAS_VARIABLE_NAME, shape=[2 * self._num_units], initializer=bias_ones)
 
-                    bias_initializer=bias_ones,
+        self._candidate_kernel = self.add_weight(
+            "candidate/%s" % _WEIGHTS_VARIABLE_NAME, shape=[input_depth + self._num_units, self._num_units],
+            initializer=self._kernel_initializer)
 
-                    kernel_initializer=self._kernel_initializer)
+        self._candidate_bias = self.add_weight(
+            "candidate/%s" % _BIAS_VARIABLE_NAME, shape=[self._num_units], initializer=bias_zeros)
 
-        value = math_ops.sigmoid(self._gate_linear([inputs, state]))
+        self.built = True
 
-        r, u = array_ops.split(value=value, num_or_size_splits=2, axis=1)
+    def __call__(self, inputs, state, att_score=None):
 
-        r_state = r * state
+        # skip the scope of RNNCell.__call__, which has no room for att_score
+        return super(RNNCell, self).__call__(inputs, state, att_score=att_score)
 
-        if self._candidate_linear is None:
-            with vs.variable_scope("candidate"):
-                self._candidate_linear = _Linear(
+    def call(self, inputs, state, att_score=None):
+        """Gated recurrent unit (GRU) with nunits cells."""
 
-                    [inputs, r_state],
+        gate_inputs = math_ops.matmul(array_ops.concat([inputs, state], 1), self._gate_kernel)
 
-                    self._num_units,
+        value = math_ops.sigmoid(nn_ops.bias_add(gate_inputs, self._gate_bias))
 
-                    True,
+        r, u = array_ops.split(value=value, num_or_size_splits=2, axis=1)
 
-                    bias_initializer=self._bias_initializer,
+        r_state = r * state
 
-                    kernel_initializer=self._kernel_initializer)
+        candidate = math_ops.matmul(array_ops.concat([inputs, r_state], 1), self._candidate_kernel)
 
-        c = self._activation(self._candidate_linear([inputs, r_state]))
+        c = self._activation(nn_ops.bias_add(candidate, self._candidate_bias))
 
         new_h = (1. - att_score) * state + att_score * c
 
@@ -306,10 +307,6 @@ class VecAttGRUCell(RNNCell):
 
         self._bias_initializer = bias_initializer
 
-        self._gate_linear = None
-
-        self._candidate_linear = None
-
     @property
     def state_size(self):
 
@@ -320,56 +317,56 @@ class VecAttGRUCell(RNNCell):
 
         return self._num_units
 
-    def __call__(self, inputs, state, att_score):
-
-        return self.call(inputs, state, att_score)
-
-    def call(self, inputs, state, att_score=None):
-        """Gated recurrent unit (GRU) with nunits cells."""
-
-        if self._gate_linear is None:
+    def build(self, inputs_shape):
+        # the weights are created here as in GRUCell so that the layers holding the cell track and save them
 
-            bias_ones = self._bias_initializer
+        input_depth = int(inputs_shape[-1])
 
-            if self._bias_initializer is None:
-                bias_ones = init_ops.constant_initializer(
-                    1.0, dtype=inputs.dtype)
+        bias_ones = self._bias_initializer
 
-            with vs.variable_scope("gates"):  # Reset gate and update gate.
+        if self._bias_initializer is None:
+            bias_ones = init_ops.constant_initializer(1.0, dtype=self.dtype)
 
-                self._gate_linear = _Linear(
+        bias_zeros = self._bias_initializer
 
-                    [inputs, state],
+        if self._bias_initializer is None:
+            bias_zeros = init_ops.constant_initializer(0.0, dtype=self.dtype)
 
-                    2 * self._num_units,
+        self._gate_kernel = self.add_weight(
+            "gates/%s" % _WEIGHTS_VARIABLE_NAME, shape=[input_depth + self._num_units, 2 * self._num_units],
+            initializer=self._kernel_initializer)
 
-                    True,
+        self._gate_bias = self.add_weight(
+            "gates/%s" % _BIAS_VARIABLE_NAME, shape=[2 * self._num_units], initializer=bias_ones)
 
-                    bias_initializer=bias_ones,
+        self._candidate_kernel = self.add_weight(
+            "candidate/%s" % _WEIGHTS_VARIABLE_NAME, shape=[input_depth + self._num_units, self._num_units],
+            initializer=self._kernel_initializer)
 
-                    kernel_initializer=self._kernel_initializer)
+        self._candidate_bias = self.add_weight(
+            "candidate/%s" % _BIAS_VARIABLE_NAME, shape=[self._num_units], initializer=bias_zeros)
 
-        value = math_ops.sigmoid(self._gate_linear([inputs, state]))
+        self.built = True
 
-        r, u = array_ops.split(value=value, num_or_size_splits=2, axis=1)
+    def __call__(self, inputs, state, att_score=None):
 
-        r_state = r * state
+        # skip the scope of RNNCell.__call__, which has no room for att_score
+        return super(RNNCell, self).__call__(inputs, state, att_score=att_score)
 
-        if self._candidate_linear is None:
-            with vs.variable_scope("candidate"):
-                self._candidate_linear = _Linear(
+    def call(self, inputs, state, att_score=None):
+        """Gated recurrent unit (GRU) with nunits cells."""
 
-                    [inputs, r_state],
+        gate_inputs = math_ops.matmul(array_ops.concat([inputs, state], 1), self._gate_kernel)
 
-                    self._num_units,
+        value = math_ops.sigmoid(nn_ops.bias_add(gate_inputs, self._gate_bias))
 
-                    True,
+        r, u = array_ops.split(value=value, num_or_size_splits=2, axis=1)
 
-                    bias_initializer=self._bias_initializer,
+        r_state = r * state
 
-                    kernel_initializer=self._kernel_initializer)
+        candidate = math_ops.matmul(array_ops.concat([inputs, r_state], 1), self._candidate_kernel)
 
-        c = self._activation(self._candidate_linear([inputs, r_state]))
+        c = self._activation(nn_ops.bias_add(candidate, self._candidate_bias))
 
         u = (1.0 - att_score) * u
 
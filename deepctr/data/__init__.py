@@ -0,0 +1,9 @@
+from .bucketing import LengthBucketBatcher
+from .cache import PreprocessedCache, fingerprint
+from .packer import ColumnarPacker, InputSpec, PackReport, get_input_specs
+from .shuffle import ExternalShuffler
+from .statistics import DenseStatistics
+from .synthetic import SyntheticDataGenerator, avazu_feature_columns, behavior_feature_columns, \
+    criteo_feature_columns, movielens_feature_columns
+from .vocabulary import VocabularyInfo, build_vocabulary, count_features
+from .workers import SharedMemoryBatchLoader, benchmark_throughput
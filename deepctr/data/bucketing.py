@@ -0,0 +1,153 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import tensorflow as tf
+
+from ..feature_column import VarLenSparseFeat
+from .packer import ColumnarPacker
+
+
+def sequence_lengths(sequences):
+    """Valid length of every row of a post-padded ``(n, maxlen)`` array, i.e. the position of its last non-zero
+    element plus one."""
+    non_zero = np.asarray(sequences) != 0
+    if non_zero.ndim > 2:
+        non_zero = non_zero.reshape(non_zero.shape[:2] + (-1,)).any(axis=-1)
+    maxlen = non_zero.shape[1]
+    return np.where(non_zero.any(axis=1), maxlen - np.argmax(non_zero[:, ::-1], axis=1), 0)
+
+
+def length_boundaries(lengths, num_buckets):
+    """Upper bounds of ``num_buckets`` buckets holding about the same number of sequences."""
+    lengths = np.sort(np.asarray(lengths).ravel())
+    ranks = np.ceil(np.arange(1, num_buckets + 1) * len(lengths) / float(num_buckets)).astype(np.int64) - 1
+    return np.unique(np.maximum(lengths[np.clip(ranks, 0, len(lengths) - 1)], 1)).astype(np.int64).tolist()
+
+
+class LengthBucketBatcher(object):
+    """Groups samples of similar sequence length into the same batches and pads every batch only to the upper bound
+    of its bucket, so the cost of attention, GRU and Transformer layers follows the actual histories instead of
+    ``maxlen``.
+
+    Bucket ``i`` holds the samples whose length is in ``(bucket_boundaries[i-1], bucket_boundaries[i]]`` and its
+    batches keep the first ``bucket_boundaries[i]`` positions of every sequence input, so sequences must be padded at
+    the end (``pad_sequences(..., padding='post')``). Only the inputs of ``VarLenSparseFeat(dynamic_length=True)``
+    are cut, the model accepts their variable length without being rebuilt.
+
+    Each epoch shuffles the samples inside every bucket and the order of the batches with the seed ``seed + epoch``.
+
+    >>> batcher = LengthBucketBatcher(x, y, feature_columns, lengths=x['seq_length'], batch_size=256)
+    >>> model.fit(batcher.to_dataset(), epochs=10)
+
+    :param x: pandas DataFrame or dict, holding a column for every input name, packed with ``ColumnarPacker``.
+    :param y: numpy.ndarray or None, the labels.
+    :param feature_columns: An iterable containing all the features used by the model.
+    :param lengths: array-like, str or None. Length of every sample, the name of an input of ``x`` holding it, or
+        ``None`` to take the longest non-zero prefix over the dynamic sequence inputs.
+    :param bucket_boundaries: sorted list of int or None. Upper bounds of the buckets, the last bucket is extended to
+        the padded width of the inputs. If ``None`` ``num_buckets`` buckets of equal size are used.
+    :param num_buckets: int, number of buckets used when ``bucket_boundaries`` is ``None``.
+    :param batch_size: int, maximum number of samples of a batch.
+    :param shuffle: bool, whether to shuffle the samples and the batches.
+    :param seed: int, base random seed.
+    :param drop_remainder: bool, whether to drop the last incomplete batch of every bucket.
+    """
+
+    def __init__(self, x, y, feature_columns, lengths=None, bucket_boundaries=None, num_buckets=8, batch_size=256,
+                 shuffle=True, seed=1024, drop_remainder=False):
+        self.packer = ColumnarPacker(feature_columns)
+        self.x = self.packer.pack(x)
+        self.y = np.asarray(y) if y is not None else None
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_remainder = drop_remainder
+        self.epoch = 0
+
+        self.dynamic_names = []
+        for fc in feature_columns:
+            if isinstance(fc, VarLenSparseFeat) and fc.dynamic_length:
+                self.dynamic_names.append(fc.name)
+                if fc.weight_name is not None:
+                    self.dynamic_names.append(fc.weight_name)
+        if not self.dynamic_names:
+            raise ValueError("no VarLenSparseFeat with dynamic_length=True in feature_columns")
+        self.maxlen = max(self.x[name].shape[1] for name in self.dynamic_names)
+
+        if lengths is None:
+            lengths = np.max([sequence_lengths(self.x[name]) for name in self.dynamic_names], axis=0)
+        elif isinstance(lengths, str):
+            lengths = self.x[lengths]
+        self.lengths = np.minimum(np.asarray(lengths).ravel(), self.maxlen)
+
+        if bucket_boundaries is None:
+            bucket_boundaries = length_boundaries(self.lengths, num_buckets)
+        if list(bucket_boundaries) != sorted(bucket_boundaries):
+            raise ValueError("bucket_boundaries must be sorted")
+        bucket_boundaries = [b for b in bucket_boundaries if b < self.maxlen]
+        self.bucket_boundaries = bucket_boundaries + [self.maxlen]
+        bucket_ids = np.searchsorted(self.bucket_boundaries, self.lengths, side='left')
+        self.buckets = [np.flatnonzero(bucket_ids == i) for i in range(len(self.bucket_boundaries))]
+
+    def __len__(self):
+        if self.drop_remainder:
+            return sum(len(bucket) // self.batch_size for bucket in self.buckets)
+        return sum((len(bucket) + self.batch_size - 1) // self.batch_size for bucket in self.buckets)
+
+    def padded_positions(self):
+        """Number of sequence positions computed per epoch with bucketing and with every batch padded to
+        ``maxlen``."""
+        bucketed = sum(len(bucket) * max(padded_len, 1) for bucket, padded_len in
+                       zip(self.buckets, self.bucket_boundaries))
+        return bucketed, len(self.lengths) * self.maxlen
+
+    def batch_indices(self, epoch=None):
+        """List of ``(padded_len, indices)`` of the batches of ``epoch``, defaults to the next epoch."""
+        if epoch is None:
+            epoch = self.epoch
+            self.epoch += 1
+        rng = np.random.RandomState(self.seed + epoch)
+        batches = []
+        for bucket, padded_len in zip(self.buckets, self.bucket_boundaries):
+            if self.shuffle:
+                bucket = bucket[rng.permutation(len(bucket))]
+            end = len(bucket) // self.batch_size * self.batch_size if self.drop_remainder else len(bucket)
+            for start in range(0, end, self.batch_size):
+                batches.append((max(padded_len, 1), bucket[start:start + self.batch_size]))
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def iter_batches(self, epoch=None):
+        """Yield the ``(x, y)`` batches of one epoch, or ``x`` if there is no label."""
+        for padded_len, indices in self.batch_indices(epoch):
+            x = OrderedDict()
+            for name, value in self.x.items():
+                value = value[indices]
+                if name in self.dynamic_names:
+                    value = value[:, :padded_len]
+                x[name] = value
+            yield x if self.y is None else (x, self.y[indices])
+
+    def to_dataset(self):
+        """Wrap ``iter_batches`` as a ``tf.data.Dataset`` whose sequence inputs have an unknown time dimension,
+        every iteration over the dataset is a new epoch."""
+        x_spec = OrderedDict()
+        for name, spec in self.packer.input_specs.items():
+            shape = (None,) + tuple(spec.shape)
+            if name in self.dynamic_names:
+                shape = (None, None) + shape[2:]
+            x_spec[name] = tf.TensorSpec(shape, tf.as_dtype(spec.dtype))
+        if self.y is None:
+            signature = x_spec
+        else:
+            signature = (x_spec, tf.TensorSpec((None,) + self.y.shape[1:], tf.as_dtype(self.y.dtype)))
+        return tf.data.Dataset.from_generator(self.iter_batches, output_signature=signature)
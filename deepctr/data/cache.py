@@ -0,0 +1,142 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from .packer import ColumnarPacker
+
+META_FILE = 'meta.json'
+
+
+def _file_digest(path, hash_content, block_size=1 << 20):
+    if not hash_content:
+        stat = os.stat(path)
+        return '%s:%d:%d' % (os.path.abspath(path), stat.st_size, int(stat.st_mtime * 1e6))
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def fingerprint(filenames, feature_columns, label_names=(), extra=None, hash_content=False):
+    """Fingerprint of raw input files plus the model inputs declared by the feature columns.
+
+    :param filenames: str or list of str, the raw input files.
+    :param feature_columns: An iterable containing all the features used by the model.
+    :param label_names: list of str, label columns stored along with the model inputs.
+    :param extra: json serializable object describing the preprocessing, e.g. a version string or the parameters of
+        the scalers, so that changing the preprocessing code invalidates the cache.
+    :param hash_content: bool. If ``True`` the content of the files is hashed, otherwise only their path, size and
+        modification time are used, which is enough to detect a changed file and free for hundreds of GB.
+    :return: str, hex digest.
+    """
+    if not isinstance(filenames, (list, tuple)):
+        filenames = [filenames]
+    packer = ColumnarPacker(feature_columns)
+    spec = {
+        'files': [_file_digest(path, hash_content) for path in filenames],
+        'inputs': [[spec.name, list(spec.shape), np.dtype(spec.dtype).name]
+                   for spec in packer.input_specs.values()],
+        'labels': list(label_names),
+        'extra': extra,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class PreprocessedCache(object):
+    """On-disk cache of packed model-ready arrays, so the label encoding, scaling and sequence padding of a raw
+    dataset are computed once and every later job opens the arrays as memory-mapped ``.npy`` files.
+
+    Each entry lives in ``<cache_dir>/<fingerprint>/`` with one ``<input_name>.npy`` per model input and label.
+    Entries are written to a temporary directory and renamed at the end, so an interrupted or concurrent
+    job never sees a partial entry.
+
+    >>> cache = PreprocessedCache('./cache', linear_feature_columns + dnn_feature_columns, label_names=['label'])
+    >>> data = cache.load('./criteo_sample.txt', preprocess, extra='v1')
+    >>> model.fit({name: data[name] for name in cache.feature_names}, data['label'], epochs=10)
+
+    :param cache_dir: str, root directory of the cache.
+    :param feature_columns: An iterable containing all the features used by the model.
+    :param label_names: list of str, label columns stored along with the model inputs.
+    """
+
+    def __init__(self, cache_dir, feature_columns, label_names=()):
+        self.cache_dir = cache_dir
+        self.feature_columns = feature_columns
+        self.label_names = list(label_names)
+        self.packer = ColumnarPacker(feature_columns)
+
+    @property
+    def feature_names(self):
+        return self.packer.feature_names
+
+    def entry_dir(self, filenames, extra=None, hash_content=False):
+        key = fingerprint(filenames, self.feature_columns, self.label_names, extra, hash_content)
+        return os.path.join(self.cache_dir, key)
+
+    def exists(self, filenames, extra=None, hash_content=False):
+        return os.path.exists(os.path.join(self.entry_dir(filenames, extra, hash_content), META_FILE))
+
+    def save(self, path, data):
+        """Pack ``data`` and write it as the cache entry ``path``."""
+        arrays = self.packer.pack(data)
+        for name in self.label_names:
+            arrays[name] = np.ascontiguousarray(np.asarray(data[name]))
+        for name, array in arrays.items():
+            if array.dtype == np.object_:
+                raise ValueError("column %s has object dtype and can not be memory-mapped" % name)
+
+        parent = os.path.dirname(path)
+        if not os.path.exists(parent):
+            os.makedirs(parent)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp_')
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, name + '.npy'), array)
+            meta = OrderedDict((name, [list(array.shape), array.dtype.str]) for name, array in arrays.items())
+            with io.open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+                f.write(json.dumps(meta))
+            os.rename(tmp_dir, path)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(os.path.join(path, META_FILE)):  # not written by a concurrent job
+                raise
+
+    def open(self, path, mmap_mode='r'):
+        """Open the cache entry ``path``.
+
+        :return: OrderedDict, ``{name: numpy.memmap}`` holding the model inputs and labels.
+        """
+        with io.open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.loads(f.read(), object_pairs_hook=OrderedDict)
+        return OrderedDict((name, np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)) for name in meta)
+
+    def load(self, filenames, build_fn, extra=None, mmap_mode='r', hash_content=False):
+        """Return the packed arrays of ``filenames``, calling ``build_fn`` only if they are not cached yet.
+
+        :param filenames: str or list of str, the raw input files.
+        :param build_fn: callable, ``build_fn(filenames)`` returns a pandas DataFrame or a dict holding the
+            preprocessed columns of every model input and label.
+        :param extra: json serializable object describing the preprocessing, part of the fingerprint.
+        :param mmap_mode: ``mmap_mode`` passed to ``numpy.load``, ``None`` reads the arrays into memory.
+        :param hash_content: bool, whether to fingerprint the content of the files.
+        :return: OrderedDict, ``{name: numpy.ndarray}`` holding the model inputs and labels.
+        """
+        path = self.entry_dir(filenames, extra, hash_content)
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            self.save(path, build_fn(filenames))
+        return self.open(path, mmap_mode)
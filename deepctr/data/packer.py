@@ -0,0 +1,136 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import tensorflow as tf
+
+from ..feature_column import SparseFeat, VarLenSparseFeat, DenseFeat
+
+
+class InputSpec(namedtuple('InputSpec', ['name', 'shape', 'dtype'])):
+    """ Shape (without batch dimension) and numpy dtype of one model input.
+    """
+    __slots__ = ()
+
+
+class PackReport(namedtuple('PackReport', ['original_bytes', 'packed_bytes'])):
+    """ Memory used by the columns before and after ``ColumnarPacker.pack``.
+    """
+    __slots__ = ()
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - self.packed_bytes
+
+
+def _numpy_dtype(dtype):
+    dtype = tf.as_dtype(dtype)
+    if dtype == tf.string:
+        return np.str_
+    return dtype.as_numpy_dtype
+
+
+def get_input_specs(feature_columns):
+    """Return the ``InputSpec`` of every model input, in the same order and with the same shapes as
+    ``build_input_features``.
+
+    :param feature_columns: An iterable containing all the features used by the model.
+    :return: OrderedDict, ``{input_name: InputSpec}``.
+    """
+    specs = OrderedDict()
+    for fc in feature_columns:
+        if isinstance(fc, SparseFeat):
+            specs[fc.name] = InputSpec(fc.name, (1,), _numpy_dtype(fc.dtype))
+        elif isinstance(fc, DenseFeat):
+            specs[fc.name] = InputSpec(fc.name, (fc.dimension,), _numpy_dtype(fc.dtype))
+        elif isinstance(fc, VarLenSparseFeat):
+            specs[fc.name] = InputSpec(fc.name, (fc.maxlen,), _numpy_dtype(fc.dtype))
+            if fc.weight_name is not None:
+                specs[fc.weight_name] = InputSpec(fc.weight_name, (fc.maxlen, 1), np.float32)
+            if fc.length_name is not None:
+                specs[fc.length_name] = InputSpec(fc.length_name, (1,), np.int32)
+        else:
+            raise TypeError("Invalid feature column type,got", type(fc))
+    return specs
+
+
+def _nbytes(values):
+    if hasattr(values, 'memory_usage'):  # pandas Series
+        return int(values.memory_usage(deep=True, index=False))
+    return np.asarray(values).nbytes
+
+
+def _pad(sequences, maxlen, dtype):
+    if dtype == np.str_:
+        padded = np.full((len(sequences), maxlen), '0', dtype=np.object_)
+    else:
+        padded = np.zeros((len(sequences), maxlen), dtype=dtype)
+    for i, seq in enumerate(sequences):
+        seq = np.asarray(seq)[:maxlen]
+        padded[i, :len(seq)] = seq
+    return padded
+
+
+def pack_column(values, spec):
+    """Convert one column into a C-contiguous array of ``spec.dtype`` with shape ``(batch_size,) + spec.shape``.
+
+    Columns holding one sequence per row (e.g. a DataFrame column of lists) are stacked, sequences shorter than
+    ``spec.shape[0]`` are post-padded with ``0`` and longer ones are truncated.
+    """
+    if hasattr(values, 'values'):  # pandas Series
+        values = values.values
+    values = np.asarray(values)
+    if values.dtype == np.object_ and values.ndim == 1 and len(values) > 0 and \
+            isinstance(values[0], (list, tuple, np.ndarray)):
+        values = _pad(values, spec.shape[0], spec.dtype)
+    values = values.astype(spec.dtype, copy=False).reshape((-1,) + tuple(spec.shape))
+    return np.ascontiguousarray(values)
+
+
+class ColumnarPacker(object):
+    """Converts a DataFrame (or a dict of arrays) once into the exact arrays consumed by a DeepCTR model, so that
+    ``model.fit`` and ``model.predict`` do not convert, copy or upcast the inputs on every call.
+
+    Every input declared by the feature columns is packed into a C-contiguous numpy array with the ``dtype`` of
+    its ``SparseFeat`` / ``DenseFeat`` / ``VarLenSparseFeat`` and the shape of the corresponding ``Input``.
+    The packed dict can be passed to ``fit``/``evaluate``/``predict`` as many times as needed.
+
+    >>> packer = ColumnarPacker(linear_feature_columns + dnn_feature_columns)
+    >>> train_model_input = packer.pack(train)
+    >>> packer.report.bytes_saved
+
+    :param feature_columns: An iterable containing all the features used by the model.
+    """
+
+    def __init__(self, feature_columns):
+        self.input_specs = get_input_specs(feature_columns)
+        self.report = None
+
+    @property
+    def feature_names(self):
+        return list(self.input_specs.keys())
+
+    def pack(self, data):
+        """Pack ``data`` and update ``self.report``.
+
+        :param data: pandas DataFrame or dict, holding a column for every input name.
+        :return: OrderedDict, ``{input_name: numpy.ndarray}``.
+        """
+        model_input = OrderedDict()
+        original_bytes = 0
+        for name, spec in self.input_specs.items():
+            try:
+                values = data[name]
+            except KeyError:
+                raise KeyError("input %s is declared by feature columns but missing in data" % name)
+            original_bytes += _nbytes(values)
+            model_input[name] = pack_column(values, spec)
+        self.report = PackReport(original_bytes, sum(v.nbytes for v in model_input.values()))
+        return model_input
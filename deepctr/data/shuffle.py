@@ -0,0 +1,175 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import io
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+
+from .packer import ColumnarPacker
+
+
+class ExternalShuffler(object):
+    """Shuffles csv files larger than memory in two passes.
+
+    ``scatter`` streams the raw lines of the input files and appends every line to one of ``num_buckets`` bucket
+    files on disk picked at random. An epoch then visits the buckets in a random order, loads one bucket at a time
+    and shuffles its rows in memory, so only one bucket has to fit in memory. ``num_buckets`` should be chosen
+    so that ``total size / num_buckets`` fits comfortably in memory.
+
+    Every epoch uses the seed ``seed + epoch`` for the bucket order and the in-bucket shuffle. With
+    ``rescatter=True`` the lines are also redistributed over the buckets at the start of every epoch, which costs
+    one more pass over the data but removes the fixed bucket membership.
+
+    >>> shuffler = ExternalShuffler('./train.csv', './shuffle_tmp', num_buckets=256, dtype={'label': 'float32'})
+    >>> dataset = shuffler.to_dataset(feature_columns, ['label'], batch_size=256, preprocess_fn=encode)
+    >>> model.fit(dataset, epochs=10)
+
+    :param filenames: str or list of str, paths of plain text csv files sharing the same columns.
+    :param work_dir: str, directory of the bucket files.
+    :param num_buckets: int, number of buckets.
+    :param seed: int, base random seed.
+    :param names: list of str or None. Column names of headerless files, if ``None`` the first line of each file is
+        used as header.
+    :param rescatter: bool, whether to redistribute the lines over the buckets in every epoch.
+    :param chunksize: int, number of lines read at once when scattering.
+    :param read_csv_kwargs: keyword arguments passed to ``pandas.read_csv`` when a bucket is loaded, e.g. ``sep``
+        or ``dtype``. Set ``dtype`` so that every bucket is parsed the same way.
+    """
+
+    def __init__(self, filenames, work_dir, num_buckets=64, seed=1024, names=None, rescatter=False, chunksize=100000,
+                 **read_csv_kwargs):
+        if not isinstance(filenames, (list, tuple)):
+            filenames = [filenames]
+        self.filenames = list(filenames)
+        self.work_dir = work_dir
+        self.num_buckets = num_buckets
+        self.seed = seed
+        self.names = names
+        self.rescatter = rescatter
+        self.chunksize = chunksize
+        self.read_csv_kwargs = read_csv_kwargs
+        self.epoch = 0
+        self._scattered_epoch = None
+
+    def bucket_path(self, bucket):
+        return os.path.join(self.work_dir, 'bucket_%05d.csv' % bucket)
+
+    def _header(self):
+        if self.names is not None:
+            return list(self.names)
+        import pandas as pd
+        with io.open(self.filenames[0], 'r', encoding='utf-8') as f:
+            return pd.read_csv(io.StringIO(f.readline()), **self.read_csv_kwargs).columns.tolist()
+
+    def scatter(self, epoch=0):
+        """Distribute the lines of the input files over the bucket files."""
+        if os.path.exists(self.work_dir):
+            shutil.rmtree(self.work_dir)
+        os.makedirs(self.work_dir)
+        rng = np.random.RandomState(self.seed + epoch)
+        buckets = [open(self.bucket_path(i), 'wb') for i in range(self.num_buckets)]
+        try:
+            for path in self.filenames:
+                with open(path, 'rb') as f:
+                    if self.names is None:
+                        f.readline()
+                    while True:
+                        lines = f.readlines(self.chunksize * 128)
+                        if not lines:
+                            break
+                        if not lines[-1].endswith(b'\n'):
+                            lines[-1] += b'\n'
+                        for line, bucket in zip(lines, rng.randint(0, self.num_buckets, len(lines))):
+                            buckets[bucket].write(line)
+        finally:
+            for bucket in buckets:
+                bucket.close()
+        self._scattered_epoch = epoch
+
+    def iter_chunks(self, epoch=None):
+        """Yield one shuffled DataFrame per bucket for ``epoch``, defaults to the next epoch."""
+        if epoch is None:
+            epoch = self.epoch
+            self.epoch += 1
+        if self._scattered_epoch is None or (self.rescatter and self._scattered_epoch != epoch):
+            self.scatter(epoch)
+
+        import pandas as pd
+        header = self._header()
+        rng = np.random.RandomState(self.seed + epoch)
+        for bucket in rng.permutation(self.num_buckets):
+            path = self.bucket_path(bucket)
+            if os.path.getsize(path) == 0:
+                continue
+            chunk = pd.read_csv(path, header=None, names=header, **self.read_csv_kwargs)
+            yield chunk.iloc[rng.permutation(len(chunk))].reset_index(drop=True)
+
+    def iter_batches(self, feature_columns, label_names=(), batch_size=256, preprocess_fn=None, epoch=None):
+        """Yield the shuffled data of one epoch as ``(x, y)`` batches of packed model inputs.
+
+        :param feature_columns: An iterable containing all the features used by the model.
+        :param label_names: list of str, label columns, ``y`` is omitted if empty.
+        :param batch_size: int, number of rows per batch, only the last batch of the epoch may be smaller.
+        :param preprocess_fn: callable or None, applied to every bucket DataFrame before packing, e.g. to encode
+            sparse features with encoders fitted beforehand.
+        :param epoch: int or None, defaults to the next epoch.
+        """
+        packer = ColumnarPacker(feature_columns)
+        label_names = list(label_names)
+        buffered = []
+        num_buffered = 0
+
+        def split(arrays, start, end):
+            x = dict((name, arrays[name][start:end]) for name in packer.feature_names)
+            if not label_names:
+                return x
+            y = arrays[label_names[0]] if len(label_names) == 1 else np.stack(
+                [arrays[name] for name in label_names], axis=1)
+            return x, y[start:end]
+
+        for chunk in self.iter_chunks(epoch):
+            if preprocess_fn is not None:
+                chunk = preprocess_fn(chunk)
+            arrays = packer.pack(chunk)
+            for name in label_names:
+                arrays[name] = np.asarray(chunk[name])
+            buffered.append(arrays)
+            num_buffered += len(chunk)
+            if num_buffered < batch_size:
+                continue
+            arrays = dict((name, np.concatenate([b[name] for b in buffered])) for name in buffered[0])
+            num_full = num_buffered // batch_size * batch_size
+            for start in range(0, num_full, batch_size):
+                yield split(arrays, start, start + batch_size)
+            buffered = [dict((name, value[num_full:]) for name, value in arrays.items())]
+            num_buffered -= num_full
+        if num_buffered > 0:
+            arrays = dict((name, np.concatenate([b[name] for b in buffered])) for name in buffered[0])
+            yield split(arrays, 0, num_buffered)
+
+    def to_dataset(self, feature_columns, label_names=(), batch_size=256, preprocess_fn=None):
+        """Wrap ``iter_batches`` as a ``tf.data.Dataset``, every iteration over the dataset is a new epoch."""
+        packer = ColumnarPacker(feature_columns)
+        x_spec = dict((name, tf.TensorSpec((None,) + tuple(spec.shape), tf.as_dtype(spec.dtype)))
+                      for name, spec in packer.input_specs.items())
+        if label_names:
+            y_shape = (None,) if len(label_names) == 1 else (None, len(label_names))
+            signature = (x_spec, tf.TensorSpec(y_shape, tf.float32))
+        else:
+            signature = x_spec
+
+        def generator():
+            for batch in self.iter_batches(feature_columns, label_names, batch_size, preprocess_fn):
+                if label_names:
+                    batch = (batch[0], batch[1].astype(np.float32))
+                yield batch
+
+        return tf.data.Dataset.from_generator(generator, output_signature=signature)
@@ -0,0 +1,136 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import numpy as np
+
+from ..layers.preprocessing import DenseTransform
+
+
+class DenseStatistics(object):
+    """Streaming statistics of a dense feature, used to build a ``DenseTransform`` layer without loading the whole
+    column in memory.
+
+    Count, mean and variance are merged chunk by chunk with the parallel algorithm of Chan et al., min and max are
+    exact, quantiles are estimated from a uniform reservoir sample of ``sample_size`` values. Two collectors of the
+    same feature, e.g. computed by different processes, can be combined with ``merge``.
+
+    The ``log1p``, ``clip_min`` and ``clip_max`` steps are applied before the values are collected, so the statistics
+    describe the values seen by the normalization step of the layer.
+
+    >>> stats = DenseStatistics(log1p=True)
+    >>> for chunk in pd.read_csv('./criteo.txt', usecols=['I1'], chunksize=100000):
+    ...     stats.update(chunk['I1'].fillna(0).values)
+    >>> DenseFeat('I1', 1, transform_fn=stats.build_layer(normalization='standard'))
+
+    :param log1p: bool, whether to apply ``log(1 + max(x, 0))``.
+    :param clip_min: float or None, lower bound of the values.
+    :param clip_max: float or None, upper bound of the values.
+    :param sample_size: int, size of the reservoir sample used for quantiles.
+    :param seed: int, random seed of the reservoir sample.
+    """
+
+    def __init__(self, log1p=False, clip_min=None, clip_max=None, sample_size=100000, seed=1024):
+        self.log1p = log1p
+        self.clip_min = clip_min
+        self.clip_max = clip_max
+        self.sample_size = sample_size
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sample = np.empty((0,), dtype=np.float64)
+        self._rng = np.random.RandomState(seed)
+
+    def transform(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if self.log1p:
+            values = np.log1p(np.maximum(values, 0.0))
+        if self.clip_min is not None or self.clip_max is not None:
+            values = np.clip(values, self.clip_min, self.clip_max)
+        return values
+
+    def _combine(self, count, mean, m2, min_, max_, sample):
+        total = self.count + count
+        if count == 0:
+            return
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+
+        # keep each of the values seen so far in the sample with the same probability
+        sample = np.concatenate([self.sample, sample])
+        if len(sample) > self.sample_size:
+            weights = np.concatenate([np.full(len(self.sample), self.count / float(max(len(self.sample), 1))),
+                                      np.full(len(sample) - len(self.sample), count / float(len(sample) -
+                                                                                             len(self.sample)))])
+            sample = self._rng.choice(sample, self.sample_size, replace=False, p=weights / weights.sum())
+        self.sample = sample
+        self.count = total
+        self.min = min(self.min, min_)
+        self.max = max(self.max, max_)
+
+    def update(self, values):
+        """Add a chunk of raw values."""
+        values = self.transform(values)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        sample = values
+        if len(values) > self.sample_size:
+            sample = self._rng.choice(values, self.sample_size, replace=False)
+        self._combine(len(values), values.mean(), ((values - values.mean()) ** 2).sum(), values.min(), values.max(),
+                      sample)
+        return self
+
+    def merge(self, other):
+        """Add the statistics collected by ``other``."""
+        self._combine(other.count, other.mean, other.m2, other.min, other.max, other.sample)
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count > 0 else 0.0
+
+    def quantile_boundaries(self, num_buckets):
+        """Approximate boundaries splitting the values into ``num_buckets`` buckets of equal frequency, duplicated
+        boundaries of heavily repeated values are removed."""
+        if len(self.sample) == 0:
+            raise ValueError("no value has been collected")
+        quantiles = np.quantile(self.sample, np.arange(1, num_buckets) / float(num_buckets))
+        return np.unique(quantiles).tolist()
+
+    def build_layer(self, normalization=None, num_buckets=None, boundaries=None, bucket_output='index', **kwargs):
+        """Build the ``DenseTransform`` holding the collected statistics as constants.
+
+        :param normalization: None, ``"standard"`` for ``(x - mean) / std`` or ``"minmax"`` for
+            ``(x - min) / (max - min)``.
+        :param num_buckets: int or None, bucketize into ``num_buckets`` quantile buckets.
+        :param boundaries: list of float or None, explicit bucket boundaries in the scale of the raw values after
+            log and clip, used instead of ``num_buckets``.
+        :param bucket_output: str, ``"index"`` or ``"one_hot"``.
+        :return: A ``DenseTransform`` layer.
+        """
+        offset, scale = None, None
+        if normalization == 'standard':
+            offset, scale = self.mean, self.std
+        elif normalization == 'minmax':
+            offset, scale = self.min, self.max - self.min
+        elif normalization is not None:
+            raise ValueError("normalization must be None, standard or minmax")
+        if scale is not None and scale == 0:
+            scale = 1.0
+
+        if boundaries is None and num_buckets is not None:
+            boundaries = self.quantile_boundaries(num_buckets)
+        if boundaries is not None and offset is not None:
+            # bucketization runs after normalization inside the layer
+            boundaries = [(b - offset) / scale for b in boundaries]
+
+        return DenseTransform(log1p=self.log1p, clip_min=self.clip_min, clip_max=self.clip_max, offset=offset,
+                              scale=scale, boundaries=boundaries, bucket_output=bucket_output, **kwargs)
@@ -0,0 +1,241 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import tensorflow as tf
+
+from ..feature_column import SparseFeat, VarLenSparseFeat, DenseFeat
+from .packer import get_input_specs
+
+# approximate number of distinct values of the public datasets
+CRITEO_VOCABULARY_SIZES = [1460, 583, 10131227, 2202608, 305, 24, 12517, 633, 3, 93145, 5683, 8351593, 3194, 27,
+                           14992, 5461306, 10, 5652, 2173, 4, 7046547, 18, 15, 286181, 105, 142572]
+AVAZU_VOCABULARY_SIZES = OrderedDict([
+    ('hour', 24), ('C1', 7), ('banner_pos', 7), ('site_id', 4737), ('site_domain', 7745), ('site_category', 26),
+    ('app_id', 8552), ('app_domain', 559), ('app_category', 36), ('device_id', 2686408), ('device_ip', 6729486),
+    ('device_model', 8251), ('device_type', 5), ('device_conn_type', 4), ('C14', 2626), ('C15', 8), ('C16', 9),
+    ('C17', 435), ('C18', 4), ('C19', 68), ('C20', 172), ('C21', 60)])
+MOVIELENS_VOCABULARY_SIZES = OrderedDict([
+    ('user_id', 6041), ('movie_id', 3953), ('gender', 2), ('age', 7), ('occupation', 21), ('zip', 3439)])
+MOVIELENS_NUM_GENRES = 18
+
+
+def _scaled(vocabulary_size, vocabulary_scale):
+    return max(2, int(vocabulary_size * vocabulary_scale))
+
+
+def criteo_feature_columns(embedding_dim=4, vocabulary_scale=1.0):
+    """Feature columns shaped like the Criteo display advertising dataset, 13 dense and 26 sparse features.
+
+    :param embedding_dim: int, embedding size of the sparse features.
+    :param vocabulary_scale: float, multiplier of the vocabulary sizes, e.g. ``0.01`` for a laptop-sized model.
+    """
+    return [SparseFeat('C%d' % (i + 1), _scaled(size, vocabulary_scale), embedding_dim=embedding_dim)
+            for i, size in enumerate(CRITEO_VOCABULARY_SIZES)] + [DenseFeat('I%d' % (i + 1), 1) for i in range(13)]
+
+
+def avazu_feature_columns(embedding_dim=4, vocabulary_scale=1.0):
+    """Feature columns shaped like the Avazu click-through dataset, 22 sparse features.
+
+    :param embedding_dim: int, embedding size of the sparse features.
+    :param vocabulary_scale: float, multiplier of the vocabulary sizes.
+    """
+    return [SparseFeat(name, _scaled(size, vocabulary_scale), embedding_dim=embedding_dim)
+            for name, size in AVAZU_VOCABULARY_SIZES.items()]
+
+
+def movielens_feature_columns(embedding_dim=4, vocabulary_scale=1.0, maxlen=5):
+    """Feature columns shaped like MovieLens-1M, the user and movie profile plus the multi-valued ``genres``.
+
+    :param embedding_dim: int, embedding size of the sparse features.
+    :param vocabulary_scale: float, multiplier of the vocabulary sizes.
+    :param maxlen: int, maximum number of genres of a movie.
+    """
+    return [SparseFeat(name, _scaled(size, vocabulary_scale), embedding_dim=embedding_dim)
+            for name, size in MOVIELENS_VOCABULARY_SIZES.items()] + [
+               VarLenSparseFeat(SparseFeat('genres', MOVIELENS_NUM_GENRES + 1, embedding_dim=embedding_dim),
+                                maxlen=maxlen, combiner='mean')]
+
+
+def behavior_feature_columns(num_users=100000, num_items=1000000, num_cates=1000, embedding_dim=8, maxlen=50,
+                             use_neg=False, dynamic_length=False):
+    """Feature columns of a user behavior dataset for DIN, DIEN and BST, with ``hist_`` (and ``neg_hist_``)
+    sequences sharing the ``seq_length`` input.
+
+    :param num_users: int, number of users.
+    :param num_items: int, number of items.
+    :param num_cates: int, number of item categories.
+    :param embedding_dim: int, embedding size.
+    :param maxlen: int, maximum length of the behavior sequences.
+    :param use_neg: bool, whether to add the negative sampled sequences used by DIEN.
+    :param dynamic_length: bool, ``dynamic_length`` of the sequence features.
+    :return: ``(feature_columns, behavior_feature_list)``.
+    """
+    feature_columns = [SparseFeat('user', num_users, embedding_dim=embedding_dim),
+                       SparseFeat('item_id', num_items + 1, embedding_dim=embedding_dim),
+                       SparseFeat('cate_id', num_cates + 1, embedding_dim=embedding_dim)]
+    prefixes = ['hist_', 'neg_hist_'] if use_neg else ['hist_']
+    for prefix in prefixes:
+        feature_columns += [
+            VarLenSparseFeat(SparseFeat(prefix + 'item_id', num_items + 1, embedding_dim=embedding_dim,
+                                        embedding_name='item_id'), maxlen=maxlen, length_name='seq_length',
+                             dynamic_length=dynamic_length),
+            VarLenSparseFeat(SparseFeat(prefix + 'cate_id', num_cates + 1, embedding_dim=embedding_dim,
+                                        embedding_name='cate_id'), maxlen=maxlen, length_name='seq_length',
+                             dynamic_length=dynamic_length)]
+    return feature_columns, ['item_id', 'cate_id']
+
+
+def zipf_ids(rng, size, num_ids, a):
+    """Draw ids in ``[0, num_ids)`` whose frequencies follow a power law of exponent ``a``, ``0`` being the most
+    frequent. The continuous inverse CDF is used so no table of ``num_ids`` probabilities is built."""
+    u = rng.random_sample(size)
+    if a == 0:
+        ranks = u * num_ids
+    elif a == 1:
+        ranks = np.power(num_ids + 1.0, u) - 1
+    else:
+        ranks = np.power((np.power(num_ids + 1.0, 1 - a) - 1) * u + 1, 1.0 / (1 - a)) - 1
+    return np.minimum(ranks.astype(np.int64), num_ids - 1)
+
+
+class SyntheticDataGenerator(object):
+    """Streams random model inputs of any size for a feature column spec, to load-test input pipelines and training
+    without the real data.
+
+    Sparse ids follow a Zipfian distribution of exponent ``zipf_a`` (``0`` for uniform ids), so the hot rows of the
+    embedding tables and the vocabulary statistics look like production traffic. Sequences are post-padded with
+    ``0``, their ids are in ``[1, vocabulary_size)`` and their lengths are drawn from ``length_distribution``.
+    Sequences sharing a ``length_name``, like the ``hist_`` and ``neg_hist_`` inputs of DIN and DIEN, share their
+    lengths. Labels are Bernoulli draws of probability ``ctr``.
+
+    Every chunk uses the seed ``seed + chunk index``, so the stream is reproducible and chunks can be generated by
+    several workers.
+
+    >>> feature_columns = criteo_feature_columns(vocabulary_scale=0.01)
+    >>> generator = SyntheticDataGenerator(feature_columns, num_rows=100000000)
+    >>> model.fit(generator.to_dataset(batch_size=4096), steps_per_epoch=1000)
+
+    :param feature_columns: An iterable containing all the features used by the model.
+    :param num_rows: int or None, number of rows of the stream, ``None`` for an endless stream.
+    :param chunk_size: int, number of rows generated at once.
+    :param label_names: list of str, names of the binary labels, none if empty.
+    :param ctr: float, probability of a positive label.
+    :param zipf_a: float or dict, exponent of the id distribution, or ``{feature_name: exponent}`` with
+        ``"default"`` as fallback key.
+    :param length_distribution: str, distribution of the sequence lengths in ``[1, maxlen]``. ``"uniform"``,
+        ``"geometric"`` of mean ``mean_length``, or ``"full"`` for sequences of length ``maxlen``.
+    :param mean_length: float or None, mean of the geometric lengths, defaults to ``maxlen / 4``.
+    :param seed: int, base random seed.
+    """
+
+    def __init__(self, feature_columns, num_rows=None, chunk_size=100000, label_names=('label',), ctr=0.25,
+                 zipf_a=1.1, length_distribution='geometric', mean_length=None, seed=1024):
+        if length_distribution not in ('uniform', 'geometric', 'full'):
+            raise ValueError("length_distribution must be uniform, geometric or full")
+        self.feature_columns = list(feature_columns)
+        self.input_specs = get_input_specs(self.feature_columns)
+        self.num_rows = num_rows
+        self.chunk_size = chunk_size
+        self.label_names = list(label_names)
+        self.ctr = ctr
+        self.zipf_a = zipf_a
+        self.length_distribution = length_distribution
+        self.mean_length = mean_length
+        self.seed = seed
+
+    @property
+    def feature_names(self):
+        return list(self.input_specs.keys())
+
+    def _exponent(self, name):
+        if isinstance(self.zipf_a, dict):
+            return self.zipf_a.get(name, self.zipf_a.get('default', 1.1))
+        return self.zipf_a
+
+    def _ids(self, rng, fc, size, offset=0):
+        ids = zipf_ids(rng, size, fc.vocabulary_size - offset, self._exponent(fc.name)) + offset
+        if self.input_specs[fc.name].dtype == np.str_:
+            return ids.astype(np.str_)
+        return ids.astype(self.input_specs[fc.name].dtype)
+
+    def _lengths(self, rng, maxlen, rows):
+        if self.length_distribution == 'full':
+            return np.full(rows, maxlen, dtype=np.int64)
+        if self.length_distribution == 'uniform':
+            return rng.randint(1, maxlen + 1, rows)
+        mean_length = self.mean_length if self.mean_length is not None else max(maxlen / 4.0, 1.0)
+        return np.minimum(rng.geometric(min(1.0 / mean_length, 1.0), rows), maxlen)
+
+    def generate_chunk(self, index, rows=None):
+        """Return chunk ``index`` as an OrderedDict ``{name: numpy.ndarray}`` of packed model inputs and labels."""
+        rows = rows or self.chunk_size
+        rng = np.random.RandomState(self.seed + index)
+        chunk = OrderedDict()
+        lengths = {}
+        for fc in self.feature_columns:
+            if isinstance(fc, SparseFeat):
+                chunk[fc.name] = self._ids(rng, fc, (rows, 1))
+            elif isinstance(fc, DenseFeat):
+                chunk[fc.name] = rng.exponential(1.0, (rows, fc.dimension)).astype(self.input_specs[fc.name].dtype)
+            elif isinstance(fc, VarLenSparseFeat):
+                key = fc.length_name if fc.length_name is not None else fc.name
+                if key not in lengths:
+                    lengths[key] = self._lengths(rng, fc.maxlen, rows)
+                padding = np.arange(fc.maxlen)[None, :] >= lengths[key][:, None]
+                values = self._ids(rng, fc, (rows, fc.maxlen), offset=1)
+                values[padding] = '0' if values.dtype.kind == 'U' else 0
+                chunk[fc.name] = values
+                if fc.weight_name is not None:
+                    weights = rng.random_sample((rows, fc.maxlen, 1)).astype(np.float32)
+                    weights[padding] = 0
+                    chunk[fc.weight_name] = weights
+                if fc.length_name is not None:
+                    chunk[fc.length_name] = lengths[key].astype(np.int32).reshape((-1, 1))
+        for name in self.label_names:
+            chunk[name] = (rng.random_sample(rows) < self.ctr).astype(np.float32)
+        return chunk
+
+    def iter_chunks(self):
+        """Yield the chunks of the stream."""
+        index = 0
+        remaining = self.num_rows
+        while remaining is None or remaining > 0:
+            rows = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            yield self.generate_chunk(index, rows)
+            index += 1
+            if remaining is not None:
+                remaining -= rows
+
+    def iter_batches(self, batch_size=256):
+        """Yield the stream as ``(x, y)`` batches, or ``x`` if there is no label."""
+        for chunk in self.iter_chunks():
+            for start in range(0, len(chunk[self.feature_names[0]]), batch_size):
+                x = OrderedDict((name, chunk[name][start:start + batch_size]) for name in self.feature_names)
+                if not self.label_names:
+                    yield x
+                elif len(self.label_names) == 1:
+                    yield x, chunk[self.label_names[0]][start:start + batch_size]
+                else:
+                    yield x, tuple(chunk[name][start:start + batch_size] for name in self.label_names)
+
+    def to_dataset(self, batch_size=256):
+        """Wrap ``iter_batches`` as a ``tf.data.Dataset``."""
+        x_spec = OrderedDict((name, tf.TensorSpec((None,) + tuple(spec.shape),
+                                                  tf.string if spec.dtype == np.str_ else tf.as_dtype(spec.dtype)))
+                             for name, spec in self.input_specs.items())
+        y_spec = tf.TensorSpec((None,), tf.float32)
+        if not self.label_names:
+            signature = x_spec
+        elif len(self.label_names) == 1:
+            signature = (x_spec, y_spec)
+        else:
+            signature = (x_spec, tuple(y_spec for _ in self.label_names))
+        return tf.data.Dataset.from_generator(lambda: self.iter_batches(batch_size), output_signature=signature)
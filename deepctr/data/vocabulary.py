@@ -0,0 +1,209 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+from collections import Counter, OrderedDict, namedtuple
+
+
+class VocabularyInfo(namedtuple('VocabularyInfo',
+                                ['name', 'vocabulary_path', 'vocabulary_size', 'num_unique', 'num_dropped'])):
+    """ Result of ``build_vocabulary`` for one feature.
+    Args:
+        name: feature name.
+        vocabulary_path: path of the ``value,key`` csv file which can be passed to ``SparseFeat(vocabulary_path=...)``.
+        vocabulary_size: recommended ``vocabulary_size`` of the ``SparseFeat``, kept keys + 1 since ``0`` is reserved
+            for missing keys.
+        num_unique: number of unique keys seen in the input.
+        num_dropped: number of unique keys removed by the ``min_freq`` / ``top_k`` cutoffs.
+    """
+    __slots__ = ()
+
+
+def _split_file(path, num_shards, skip_header):
+    """Split a text file into ``num_shards`` byte ranges. Range boundaries are aligned to lines by the reader."""
+    size = os.path.getsize(path)
+    start = 0
+    if skip_header:
+        with open(path, 'rb') as f:
+            f.readline()
+            start = f.tell()
+    step = max(1, (size - start + num_shards - 1) // num_shards)
+    return [(path, offset, min(offset + step, size)) for offset in range(start, size, step)]
+
+
+def _iter_lines(path, start, end):
+    """Yield the lines whose first byte lies in ``[start, end)``."""
+    with open(path, 'rb') as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                f.readline()  # the partial line belongs to the previous range
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode('utf-8').rstrip('\r\n')
+
+
+def _count_range(args):
+    (path, start, end), columns, multi_value_sep, delimiter, chunksize = args
+    counters = OrderedDict((name, Counter()) for name in columns)
+    lines = []
+
+    def flush():
+        for row in csv.reader(lines, delimiter=delimiter):
+            for name, idx in columns.items():
+                if idx >= len(row):
+                    continue
+                value = row[idx]
+                sep = multi_value_sep.get(name)
+                if sep is not None:
+                    counters[name].update(key for key in value.split(sep) if key)
+                elif value:
+                    counters[name][value] += 1
+        del lines[:]
+
+    for line in _iter_lines(path, start, end):
+        lines.append(line)
+        if len(lines) >= chunksize:
+            flush()
+    flush()
+    return counters
+
+
+def _read_header(path, delimiter):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return next(csv.reader([f.readline().rstrip('\r\n')], delimiter=delimiter))
+
+
+def count_features(filenames, features, names=None, multi_value_sep=None, delimiter=',', num_workers=None,
+                   chunksize=100000, shards_per_worker=4):
+    """Count the frequency of every key of ``features`` in one or more csv files.
+
+    Every file is split into byte ranges which are scanned by a process pool, each worker keeps one
+    ``collections.Counter`` per feature and the partial counters are merged by the caller, so memory only grows
+    with the number of unique keys and never with the size of the input.
+
+    :param filenames: str or list of str, paths of plain text csv files sharing the same columns.
+    :param features: list of str, the columns to count.
+    :param names: list of str or None. Column names of headerless files, if ``None`` the first line of each file is
+        used as header.
+    :param multi_value_sep: dict, ``{feature_name: separator}`` for multi-value columns like ``genres`` in
+        movielens, e.g. ``{'genres': '|'}``.
+    :param delimiter: str, the csv delimiter.
+    :param num_workers: int, number of worker processes. Defaults to ``multiprocessing.cpu_count()``, ``1`` scans
+        in the current process.
+    :param chunksize: int, number of lines parsed at once by a worker.
+    :param shards_per_worker: int, number of byte ranges per worker, more ranges balance the load better.
+    :return: OrderedDict, ``{feature_name: collections.Counter}``.
+    """
+    if not isinstance(filenames, (list, tuple)):
+        filenames = [filenames]
+    multi_value_sep = multi_value_sep or {}
+    num_workers = num_workers or multiprocessing.cpu_count()
+
+    tasks = []
+    for path in filenames:
+        header = list(names) if names is not None else _read_header(path, delimiter)
+        missing = [name for name in features if name not in header]
+        if missing:
+            raise ValueError("features %s not found in columns of %s" % (missing, path))
+        columns = OrderedDict((name, header.index(name)) for name in features)
+        for byte_range in _split_file(path, num_workers * shards_per_worker, skip_header=names is None):
+            tasks.append((byte_range, columns, multi_value_sep, delimiter, chunksize))
+
+    total = OrderedDict((name, Counter()) for name in features)
+    if num_workers <= 1:
+        results = map(_count_range, tasks)
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        results = pool.imap_unordered(_count_range, tasks)
+    try:
+        for counters in results:
+            for name, counter in counters.items():
+                total[name].update(counter)
+    finally:
+        if num_workers > 1:
+            pool.close()
+            pool.join()
+    return total
+
+
+def select_keys(counter, min_freq=1, top_k=None):
+    """Apply the ``min_freq`` and ``top_k`` cutoffs to a counter.
+
+    :return: list of keys sorted by descending frequency, ties are broken by key so the result is deterministic.
+    """
+    keys = [(key, cnt) for key, cnt in counter.items() if cnt >= min_freq]
+    keys.sort(key=lambda x: (-x[1], x[0]))
+    if top_k is not None:
+        keys = keys[:top_k]
+    return [key for key, _ in keys]
+
+
+def write_vocabulary(keys, path):
+    """Write ``keys`` as the ``value,key`` csv read by ``Hash(vocabulary_path=...)``, values start from 1 since
+    ``0`` is used for missing keys. Keys containing a comma or a line break can not be represented and are skipped.
+
+    :return: number of keys written.
+    """
+    num = 0
+    with io.open(path, 'w', encoding='utf-8') as f:
+        for key in keys:
+            if ',' in key or '\n' in key or '\r' in key:
+                continue
+            num += 1
+            f.write(u'%d,%s\n' % (num, key))
+    return num
+
+
+def build_vocabulary(filenames, features, output_dir, min_freq=1, top_k=None, names=None, multi_value_sep=None,
+                     delimiter=',', num_workers=None, chunksize=100000):
+    """Build the vocabulary files of ``features`` from csv files which may be far larger than memory.
+
+    For each feature ``<output_dir>/<feature>_vocabulary.csv`` is written, together with
+    ``<output_dir>/vocabulary_size.json`` which holds the recommended ``vocabulary_size`` of every feature.
+
+    :param filenames: str or list of str, paths of plain text csv files sharing the same columns.
+    :param features: list of str, the columns to build vocabulary for.
+    :param output_dir: str, directory of the vocabulary files, created if it does not exist.
+    :param min_freq: int or dict ``{feature_name: int}``, keys appearing less than ``min_freq`` times are dropped.
+    :param top_k: int, dict ``{feature_name: int}`` or None, only keep the ``top_k`` most frequent keys.
+    :param names: list of str or None. Column names of headerless files.
+    :param multi_value_sep: dict, ``{feature_name: separator}`` for multi-value columns.
+    :param delimiter: str, the csv delimiter.
+    :param num_workers: int, number of worker processes.
+    :param chunksize: int, number of lines parsed at once by a worker.
+    :return: OrderedDict, ``{feature_name: VocabularyInfo}``.
+    """
+    counters = count_features(filenames, features, names=names, multi_value_sep=multi_value_sep,
+                              delimiter=delimiter, num_workers=num_workers, chunksize=chunksize)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    vocabulary = OrderedDict()
+    for name, counter in counters.items():
+        feat_min_freq = min_freq.get(name, 1) if isinstance(min_freq, dict) else min_freq
+        feat_top_k = top_k.get(name) if isinstance(top_k, dict) else top_k
+        keys = select_keys(counter, feat_min_freq, feat_top_k)
+        path = os.path.join(output_dir, name + '_vocabulary.csv')
+        num_keys = write_vocabulary(keys, path)
+        if num_keys < len(keys):
+            logging.warning("%d keys of feature %s contain comma or line break and are skipped",
+                            len(keys) - num_keys, name)
+        vocabulary[name] = VocabularyInfo(name, path, num_keys + 1, len(counter), len(counter) - num_keys)
+
+    with io.open(os.path.join(output_dir, 'vocabulary_size.json'), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(OrderedDict((name, info.vocabulary_size) for name, info in vocabulary.items()),
+                           indent=2))
+    return vocabulary
@@ -0,0 +1,297 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import multiprocessing
+import time
+import traceback
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+
+import numpy as np
+import tensorflow as tf
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # python < 3.8
+    SharedMemory = None
+
+from .packer import InputSpec, get_input_specs
+
+_ALIGNMENT = 64
+_POLL_INTERVAL = 0.1
+
+
+def _build_layout(input_specs, batch_size):
+    """Byte offset of every array inside a slot, and the size of a slot."""
+    layout = []
+    offset = 0
+    for spec in input_specs.values():
+        dtype = np.dtype(spec.dtype)
+        if dtype.kind not in 'biuf':
+            raise ValueError("input %s has dtype %s, only numeric inputs can be placed in shared memory, "
+                             "hash or encode strings inside the workers" % (spec.name, dtype))
+        shape = (batch_size,) + tuple(spec.shape)
+        layout.append((spec.name, shape, dtype.str, offset))
+        offset += int(np.prod(shape)) * dtype.itemsize
+        offset = (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+    return layout, offset
+
+
+def _slot_views(buf, layout, slot_bytes, num_slots):
+    return [OrderedDict((name, np.ndarray(shape, dtype, buffer=buf, offset=slot * slot_bytes + offset))
+                        for name, shape, dtype, offset in layout) for slot in range(num_slots)]
+
+
+def _get(q, stop_event):
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return None
+
+
+def _write(arrays, x, y, label_name):
+    rows = 0
+    for name, array in arrays.items():
+        value = y if name == label_name else x[name]
+        value = np.asarray(value).reshape((-1,) + array.shape[1:])
+        rows = len(value)
+        array[:rows] = value
+    return rows
+
+
+def _worker_loop(worker_id, num_workers, batch_fn, num_batches, num_epochs, shm_name, layout, slot_bytes, num_slots,
+                 label_name, free_queue, ready_queue, stop_event):
+    shm = SharedMemory(name=shm_name)
+    slots = _slot_views(shm.buf, layout, slot_bytes, num_slots)
+    try:
+        epoch = 0
+        while num_epochs is None or epoch < num_epochs:
+            for index in range(worker_id, num_batches, num_workers):
+                x, y = batch_fn(epoch, index)
+                slot = _get(free_queue, stop_event)
+                if slot is None:
+                    return
+                rows = _write(slots[slot], x, y, label_name)
+                ready_queue.put((slot, epoch * num_batches + index, rows))
+            epoch += 1
+    except Exception:
+        ready_queue.put((-1, worker_id, traceback.format_exc()))
+    finally:
+        del slots
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+class SharedMemoryBatchLoader(object):
+    """Produces model-ready batches in ``num_workers`` processes and hands them to the trainer through a ring
+    buffer of ``num_slots`` batches in shared memory, so that GIL-bound preprocessing (string parsing, hashing,
+    padding) runs in parallel and batches are never pickled.
+
+    ``batch_fn(epoch, index)`` runs in the workers and returns ``(x, y)`` for batch ``index`` in
+    ``range(num_batches)``, where ``x`` is a dict keyed like ``build_input_features`` and both hold at most
+    ``batch_size`` rows. Batch ``index`` is produced by worker ``index % num_workers``.
+
+    Every worker owns ``num_slots // num_workers`` slots and blocks when all of them are waiting for the trainer,
+    which bounds memory and applies backpressure. With ``ordered=True`` batches are returned in index order,
+    otherwise in completion order, in which case a slow batch may be returned during the next epoch.
+
+    >>> loader = SharedMemoryBatchLoader(batch_fn, num_batches, batch_size, feature_columns, num_workers=8)
+    >>> model.fit(loader.to_dataset(), steps_per_epoch=num_batches, epochs=10)
+    >>> loader.close()
+
+    :param batch_fn: callable, ``batch_fn(epoch, index)`` returns ``(x, y)``. It must be picklable when the
+        ``spawn`` start method is used.
+    :param num_batches: int, number of batches per epoch.
+    :param batch_size: int, maximum number of rows of a batch.
+    :param feature_columns: An iterable containing all the features used by the model. Inputs must be numeric.
+    :param label_shape: tuple, shape of the label of one sample, ``None`` if ``batch_fn`` returns no label.
+    :param label_dtype: dtype of the label.
+    :param num_workers: int, number of worker processes.
+    :param num_slots: int, number of batches in the ring buffer, at least ``num_workers``.
+    :param ordered: bool, whether batches are returned in index order.
+    :param num_epochs: int or None, number of epochs produced by the workers, ``None`` for unlimited.
+    :param copy: bool. If ``True`` each batch returned by ``next_batch`` is copied out of shared memory and its
+        slot is released at once. If ``False`` ``next_batch`` returns views of shared memory, which are only valid
+        until the next call, when their slot is released and refilled by the workers. ``generator`` and
+        ``to_dataset`` always copy, since ``tf.data`` may wrap the arrays without copying and keep them, e.g. in
+        ``prefetch``, ``shuffle`` or ``cache``.
+    """
+
+    def __init__(self, batch_fn, num_batches, batch_size, feature_columns, label_shape=(), label_dtype='float32',
+                 num_workers=4, num_slots=None, ordered=True, num_epochs=None, copy=True):
+        if SharedMemory is None:
+            raise ImportError("SharedMemoryBatchLoader requires python >= 3.8")
+        num_slots = num_slots or 2 * num_workers
+        if num_slots < num_workers:
+            raise ValueError("num_slots must be greater than or equal to num_workers")
+        self.num_batches = num_batches
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.num_slots = num_slots
+        self.ordered = ordered
+        self.copy = copy
+
+        self.input_specs = get_input_specs(feature_columns)
+        self.label_name = None
+        specs = OrderedDict(self.input_specs)
+        if label_shape is not None:
+            self.label_name = '__label__'
+            specs[self.label_name] = InputSpec(self.label_name, tuple(label_shape), np.dtype(label_dtype).type)
+        layout, self._slot_bytes = _build_layout(specs, batch_size)
+
+        self._shm = SharedMemory(create=True, size=max(1, self._slot_bytes * num_slots))
+        self._slots = _slot_views(self._shm.buf, layout, self._slot_bytes, num_slots)
+        self._stop_event = multiprocessing.Event()
+        self._ready_queue = multiprocessing.Queue()
+        self._free_queues = [multiprocessing.Queue() for _ in range(num_workers)]
+        for slot in range(num_slots):
+            self._free_queues[slot % num_workers].put(slot)
+
+        self._workers = []
+        for worker_id in range(num_workers):
+            worker = multiprocessing.Process(
+                target=_worker_loop,
+                args=(worker_id, num_workers, batch_fn, num_batches, num_epochs, self._shm.name, layout,
+                      self._slot_bytes, num_slots, self.label_name, self._free_queues[worker_id],
+                      self._ready_queue, self._stop_event))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+        self._pending = {}
+        self._next_id = 0
+        self._held_slot = None
+        self._closed = False
+
+    def __len__(self):
+        return self.num_batches
+
+    def _release(self, slot):
+        self._free_queues[slot % self.num_workers].put(slot)
+
+    def _receive(self):
+        while True:
+            try:
+                item = self._ready_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("all input workers exited before producing the requested batch")
+                continue
+            if item[0] < 0:
+                raise RuntimeError("input worker %d failed:\n%s" % (item[1], item[2]))
+            return item
+
+    def next_batch(self, copy=None):
+        """Return the next ``(x, y)``, or ``x`` if there is no label.
+
+        :param copy: bool or None, whether to copy the batch out of shared memory, ``None`` for the ``copy`` of the
+            loader. Views are only valid until the next call.
+        """
+        if copy is None:
+            copy = self.copy
+        if self._closed:
+            raise RuntimeError("the loader is closed")
+        if self._held_slot is not None:
+            self._release(self._held_slot)
+            self._held_slot = None
+
+        if self.ordered:
+            while self._next_id not in self._pending:
+                slot, batch_id, rows = self._receive()
+                self._pending[batch_id] = (slot, rows)
+            slot, rows = self._pending.pop(self._next_id)
+            self._next_id += 1
+        else:
+            slot, _, rows = self._receive()
+
+        batch = OrderedDict()
+        for name, array in self._slots[slot].items():
+            batch[name] = np.array(array[:rows]) if copy else array[:rows]
+        if copy:
+            self._release(slot)
+        else:
+            self._held_slot = slot
+
+        if self.label_name is None:
+            return batch
+        y = batch.pop(self.label_name)
+        return batch, y
+
+    def generator(self):
+        """Yield the batches of one epoch, copied out of shared memory since they may outlive the next one."""
+        for _ in range(self.num_batches):
+            yield self.next_batch(copy=True)
+
+    def to_dataset(self):
+        """Wrap the loader as a ``tf.data.Dataset`` whose every iteration yields one epoch."""
+        x_spec = OrderedDict((name, tf.TensorSpec((None,) + tuple(spec.shape), tf.as_dtype(spec.dtype)))
+                             for name, spec in self.input_specs.items())
+        if self.label_name is None:
+            signature = x_spec
+        else:
+            array = self._slots[0][self.label_name]
+            signature = (x_spec, tf.TensorSpec((None,) + array.shape[1:], tf.as_dtype(array.dtype)))
+        return tf.data.Dataset.from_generator(self.generator, output_signature=signature)
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        for q in self._free_queues + [self._ready_queue]:
+            q.cancel_join_thread()
+        del self._slots
+        try:
+            self._shm.close()
+        except BufferError:  # batches returned with copy=False are still referenced
+            pass
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def benchmark_throughput(batch_fn, num_batches, batch_size, feature_columns, num_workers_list=(1, 2, 4, 8),
+                         num_epochs=1, **kwargs):
+    """Measure the number of batches per second delivered by ``SharedMemoryBatchLoader`` for every number of
+    workers in ``num_workers_list``, next to calling ``batch_fn`` in the trainer process.
+
+    :return: OrderedDict, ``{num_workers: batches_per_second}``, key ``0`` being the in-process baseline.
+    """
+    result = OrderedDict()
+    start = time.time()
+    for epoch in range(num_epochs):
+        for index in range(num_batches):
+            batch_fn(epoch, index)
+    result[0] = num_batches * num_epochs / (time.time() - start)
+
+    for num_workers in num_workers_list:
+        with SharedMemoryBatchLoader(batch_fn, num_batches, batch_size, feature_columns, num_workers=num_workers,
+                                     num_epochs=num_epochs, **kwargs) as loader:
+            start = time.time()
+            for _ in range(num_epochs):
+                for _ in loader.generator():
+                    pass
+            result[num_workers] = num_batches * num_epochs / (time.time() - start)
+    return result
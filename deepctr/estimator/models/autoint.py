@@ -23,7 +23,8 @@ def AutoIntEstimator(linear_feature_columns, dnn_feature_columns, att_layer_num=
                      dnn_hidden_units=(256, 128, 64), dnn_activation='relu', l2_reg_linear=1e-5,
                      l2_reg_embedding=1e-5, l2_reg_dnn=0, dnn_use_bn=False, dnn_dropout=0, seed=1024,
                      task='binary', model_dir=None, config=None, linear_optimizer='Ftrl',
-                     dnn_optimizer='Adagrad', training_chief_hooks=None):
+                     dnn_optimizer='Adagrad', training_chief_hooks=None, att_fused_qkv=False,
+                     att_field_rank=None):
     """Instantiates the AutoInt Network architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
@@ -51,6 +52,9 @@ def AutoIntEstimator(linear_feature_columns, dnn_feature_columns, att_layer_num=
         the deep part of the model. Defaults to Adagrad optimizer.
     :param training_chief_hooks: Iterable of `tf.train.SessionRunHook` objects to
         run on the chief worker during training.
+    :param att_fused_qkv: bool. Whether the InteractingLayer computes query, key and value with one projection.
+    :param att_field_rank: int or None. If set, the InteractingLayer attends to this number of learned
+        projections of the fields instead of all the fields.
     :return: A Tensorflow Estimator  instance.
 
     """
@@ -67,7 +71,8 @@ def AutoIntEstimator(linear_feature_columns, dnn_feature_columns, att_layer_num=
 
             for _ in range(att_layer_num):
                 att_input = InteractingLayer(
-                    att_embedding_size, att_head_num, att_res)(att_input)
+                    att_embedding_size, att_head_num, att_res, fused_qkv=att_fused_qkv,
+                    field_rank=att_field_rank)(att_input)
             att_output = tf.keras.layers.Flatten()(att_input)
 
             dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
@@ -20,7 +20,7 @@ def xDeepFMEstimator(linear_feature_columns, dnn_feature_columns, dnn_hidden_uni
                      l2_reg_embedding=0.00001, l2_reg_dnn=0, l2_reg_cin=0, seed=1024, dnn_dropout=0,
                      dnn_activation='relu', dnn_use_bn=False, task='binary', model_dir=None, config=None,
                      linear_optimizer='Ftrl',
-                     dnn_optimizer='Adagrad', training_chief_hooks=None):
+                     dnn_optimizer='Adagrad', training_chief_hooks=None, cin_filter_rank=None):
     """Instantiates the xDeepFM architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
@@ -48,6 +48,7 @@ def xDeepFMEstimator(linear_feature_columns, dnn_feature_columns, dnn_hidden_uni
         the deep part of the model. Defaults to Adagrad optimizer.
     :param training_chief_hooks: Iterable of `tf.train.SessionRunHook` objects to
         run on the chief worker during training.
+    :param cin_filter_rank: int or None, if set the filters of CIN are factorized into two matrices of this rank.
     :return: A Tensorflow Estimator  instance.
 
     """
@@ -72,7 +73,8 @@ def xDeepFMEstimator(linear_feature_columns, dnn_feature_columns, dnn_hidden_uni
 
             if len(cin_layer_size) > 0:
                 exFM_out = CIN(cin_layer_size, cin_activation,
-                               cin_split_half, l2_reg_cin, seed)(fm_input, training=train_flag)
+                               cin_split_half, l2_reg_cin, seed, filter_rank=cin_filter_rank)(fm_input,
+                                                                                               training=train_flag)
                 exFM_logit = tf.keras.layers.Dense(1, kernel_initializer=tf.keras.initializers.glorot_normal(seed) )(exFM_out)
                 logits_list.append(exFM_logit)
 
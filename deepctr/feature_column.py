@@ -41,12 +41,14 @@ class SparseFeat(namedtuple('SparseFeat',
 
 
 class VarLenSparseFeat(namedtuple('VarLenSparseFeat',
-                                  ['sparsefeat', 'maxlen', 'combiner', 'length_name', 'weight_name', 'weight_norm'])):
+                                  ['sparsefeat', 'maxlen', 'combiner', 'length_name', 'weight_name', 'weight_norm',
+                                   'dynamic_length'])):
     __slots__ = ()
 
-    def __new__(cls, sparsefeat, maxlen, combiner="mean", length_name=None, weight_name=None, weight_norm=True):
+    def __new__(cls, sparsefeat, maxlen, combiner="mean", length_name=None, weight_name=None, weight_norm=True,
+                dynamic_length=False):
         return super(VarLenSparseFeat, cls).__new__(cls, sparsefeat, maxlen, combiner, length_name, weight_name,
-                                                    weight_norm)
+                                                    weight_norm, dynamic_length)
 
     @property
     def name(self):
@@ -101,7 +103,8 @@ class DenseFeat(namedtuple('DenseFeat', ['name', 'dimension', 'dtype', 'transfor
         transform_fn: If not `None` , a function that can be used to transform
         values of the feature.  the function takes the input Tensor as its
         argument, and returns the output Tensor.
-        (e.g. lambda x: (x - 3.0) / 4.2).
+        (e.g. lambda x: (x - 3.0) / 4.2). A keras ``Layer`` such as ``deepctr.layers.DenseTransform`` is
+        applied as is, which keeps the transform serializable with the model.
     """
     __slots__ = ()
 
@@ -135,10 +138,11 @@ def build_input_features(feature_columns, prefix=''):
             input_features[fc.name] = Input(
                 shape=(fc.dimension,), name=prefix + fc.name, dtype=fc.dtype)
         elif isinstance(fc, VarLenSparseFeat):
-            input_features[fc.name] = Input(shape=(fc.maxlen,), name=prefix + fc.name,
+            maxlen = None if fc.dynamic_length else fc.maxlen
+            input_features[fc.name] = Input(shape=(maxlen,), name=prefix + fc.name,
                                             dtype=fc.dtype)
             if fc.weight_name is not None:
-                input_features[fc.weight_name] = Input(shape=(fc.maxlen, 1), name=prefix + fc.weight_name,
+                input_features[fc.weight_name] = Input(shape=(maxlen, 1), name=prefix + fc.weight_name,
                                                        dtype="float32")
             if fc.length_name is not None:
                 input_features[fc.length_name] = Input((1,), name=prefix + fc.length_name, dtype='int32')
@@ -154,41 +158,34 @@ def get_linear_logit(features, feature_columns, units=1, use_bias=False, seed=10
     linear_feature_columns = copy(feature_columns)
     for i in range(len(linear_feature_columns)):
         if isinstance(linear_feature_columns[i], SparseFeat):
-            linear_feature_columns[i] = linear_feature_columns[i]._replace(embedding_dim=1,
+            linear_feature_columns[i] = linear_feature_columns[i]._replace(embedding_dim=units,
                                                                            embeddings_initializer=Zeros())
         if isinstance(linear_feature_columns[i], VarLenSparseFeat):
             linear_feature_columns[i] = linear_feature_columns[i]._replace(
-                sparsefeat=linear_feature_columns[i].sparsefeat._replace(embedding_dim=1,
+                sparsefeat=linear_feature_columns[i].sparsefeat._replace(embedding_dim=units,
                                                                          embeddings_initializer=Zeros()))
 
-    linear_emb_list = [input_from_feature_columns(features, linear_feature_columns, l2_reg, seed,
-                                                  prefix=prefix + str(i))[0] for i in range(units)]
-    _, dense_input_list = input_from_feature_columns(features, linear_feature_columns, l2_reg, seed, prefix=prefix)
-
-    linear_logit_list = []
-    for i in range(units):
-
-        if len(linear_emb_list[i]) > 0 and len(dense_input_list) > 0:
-            sparse_input = concat_func(linear_emb_list[i])
-            dense_input = concat_func(dense_input_list)
-            if sparse_feat_refine_weight is not None:
-                sparse_input = Lambda(lambda x: x[0] * tf.expand_dims(x[1], axis=1))(
-                    [sparse_input, sparse_feat_refine_weight])
-            linear_logit = Linear(l2_reg, mode=2, use_bias=use_bias, seed=seed)([sparse_input, dense_input])
-        elif len(linear_emb_list[i]) > 0:
-            sparse_input = concat_func(linear_emb_list[i])
-            if sparse_feat_refine_weight is not None:
-                sparse_input = Lambda(lambda x: x[0] * tf.expand_dims(x[1], axis=1))(
-                    [sparse_input, sparse_feat_refine_weight])
-            linear_logit = Linear(l2_reg, mode=0, use_bias=use_bias, seed=seed)(sparse_input)
-        elif len(dense_input_list) > 0:
-            dense_input = concat_func(dense_input_list)
-            linear_logit = Linear(l2_reg, mode=1, use_bias=use_bias, seed=seed)(dense_input)
-        else:   #empty feature_columns
-            return Lambda(lambda x: tf.constant([[0.0]]))(list(features.values())[0])
-        linear_logit_list.append(linear_logit)
-
-    return concat_func(linear_logit_list)
+    # one lookup per feature returns the weights of all the units
+    linear_emb_list, dense_input_list = input_from_feature_columns(features, linear_feature_columns, l2_reg, seed,
+                                                                   prefix=prefix + '0')
+
+    if len(linear_emb_list) > 0:
+        sparse_input = concat_func(linear_emb_list)  # None * 1 * (feature_num * units)
+        if sparse_feat_refine_weight is not None:
+            sparse_input = Lambda(lambda x: x[0] * tf.expand_dims(tf.repeat(x[1], units, axis=1), axis=1))(
+                [sparse_input, sparse_feat_refine_weight])
+    if len(linear_emb_list) > 0 and len(dense_input_list) > 0:
+        dense_input = concat_func(dense_input_list)
+        linear_logit = Linear(l2_reg, mode=2, use_bias=use_bias, seed=seed, units=units)([sparse_input, dense_input])
+    elif len(linear_emb_list) > 0:
+        linear_logit = Linear(l2_reg, mode=0, use_bias=use_bias, seed=seed, units=units)(sparse_input)
+    elif len(dense_input_list) > 0:
+        dense_input = concat_func(dense_input_list)
+        linear_logit = Linear(l2_reg, mode=1, use_bias=use_bias, seed=seed, units=units)(dense_input)
+    else:   #empty feature_columns
+        return Lambda(lambda x: tf.constant([[0.0]]))(list(features.values())[0])
+
+    return linear_logit
 
 
 def input_from_feature_columns(features, feature_columns, l2_reg, seed, prefix='', seq_mask_zero=True,
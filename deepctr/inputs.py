@@ -9,7 +9,7 @@ Author:
 from collections import defaultdict
 from itertools import chain
 
-from keras.layers import Embedding, Lambda
+from keras.layers import Embedding, Lambda, Layer
 from keras.regularizers import l2
 
 from .layers.sequence import SequencePoolingLayer, WeightedSequenceLayer
@@ -140,6 +140,8 @@ def get_dense_input(features, feature_columns):
     for fc in dense_feature_columns:
         if fc.transform_fn is None:
             dense_input_list.append(features[fc.name])
+        elif isinstance(fc.transform_fn, Layer):
+            dense_input_list.append(fc.transform_fn(features[fc.name]))
         else:
             transform_result = Lambda(fc.transform_fn)(features[fc.name])
             dense_input_list.append(transform_result)
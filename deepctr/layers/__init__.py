@@ -1,12 +1,13 @@
 import tensorflow as tf
 
 from .activation import Dice
-from .core import DNN, LocalActivationUnit, PredictionLayer, RegulationModule
+from .core import DNN, ExpertDNN, ExpertGate, LocalActivationUnit, PredictionLayer, RegulationModule
 from .interaction import (CIN, FM, AFMLayer, BiInteractionPooling, CrossNet, CrossNetMix,
                           InnerProductLayer, InteractingLayer,
                           OutterProductLayer, FGCNNLayer, SENETLayer, BilinearInteraction,
-                          FieldWiseBiInteraction, FwFMLayer, FEFMLayer, BridgeModule)
+                          FieldWiseBiInteraction, FwFMLayer, FEFMLayer, BridgeModule, FieldAwareEmbedding)
 from .normalization import LayerNormalization
+from .preprocessing import DenseTransform
 from .sequence import (AttentionSequencePoolingLayer, BiasEncoding, BiLSTM,
                        KMaxPooling, SequencePoolingLayer, WeightedSequenceLayer,
                        Transformer, DynamicGRU, PositionEncoding)
@@ -16,6 +17,8 @@ custom_objects = {'tf': tf,
                   'InnerProductLayer': InnerProductLayer,
                   'OutterProductLayer': OutterProductLayer,
                   'DNN': DNN,
+                  'ExpertDNN': ExpertDNN,
+                  'ExpertGate': ExpertGate,
                   'PredictionLayer': PredictionLayer,
                   'FM': FM,
                   'AFMLayer': AFMLayer,
@@ -50,5 +53,7 @@ custom_objects = {'tf': tf,
                   'reduce_sum': reduce_sum,
                   'PositionEncoding': PositionEncoding,
                   'RegulationModule': RegulationModule,
-                  'BridgeModule': BridgeModule
+                  'BridgeModule': BridgeModule,
+                  'FieldAwareEmbedding': FieldAwareEmbedding,
+                  'DenseTransform': DenseTransform
                   }
@@ -10,11 +10,12 @@ import tensorflow as tf
 from keras import backend as K
 
 try:
-    from tensorflow.python.ops.init_ops_v2 import Zeros, Ones, glorot_normal
+    from tensorflow.python.ops.init_ops_v2 import Zeros, Ones, glorot_normal, VarianceScaling
 except ImportError:
-    from tensorflow.python.ops.init_ops import Zeros, Ones, glorot_normal_initializer as glorot_normal
+    from tensorflow.python.ops.init_ops import Zeros, Ones, glorot_normal_initializer as glorot_normal, \
+        VarianceScaling
 
-from keras.layers import Layer, Dropout
+from keras.layers import Layer, Dropout, Activation
 
 try:
     from keras.layers import BatchNormalization
@@ -23,6 +24,7 @@ except ImportError:
 from keras.regularizers import l2
 
 from .activation import activation_layer
+from .utils import dispatch_experts, load_balancing_loss, top_k_gating
 
 
 class LocalActivationUnit(Layer):
@@ -95,8 +97,7 @@ class LocalActivationUnit(Layer):
 
         query, keys = inputs
 
-        keys_len = keys.get_shape()[1]
-        queries = K.repeat_elements(query, keys_len, 1)
+        queries = tf.tile(query, [1, tf.shape(keys)[1], 1])
 
         att_input = tf.concat(
             [queries, keys, queries - keys, queries * keys], axis=-1)
@@ -223,6 +224,254 @@ class DNN(Layer):
         return dict(list(base_config.items()) + list(config.items()))
 
 
+class ExpertDNN(Layer):
+    """A group of Multi Layer Percetrons with the same structure, e.g. the experts of MMoE, computed together with one
+    batched matmul per layer on kernels holding an extra expert axis.
+
+      Input shape
+        - 2D tensor with shape: ``(batch_size, input_dim)`` fed to every expert, or 3D tensor with shape:
+          ``(batch_size, num_experts, input_dim)`` holding the input of each expert.
+        - Or a list of the above tensor and the gates with shape ``(batch_size, num_gates, num_experts)``, e.g. the
+          sparse output of ``ExpertGate(top_k=...)``. Every expert is then only evaluated on the samples to which a
+          gate gives it a non-zero weight and the outputs are mixed by the gates. With ``use_bn`` or an activation
+          layer such as Dice, which take statistics over the batch, every expert runs on every sample instead.
+
+      Output shape
+        - 3D tensor with shape: ``(batch_size, num_experts, hidden_size[-1])``, or
+          ``(batch_size, num_gates, hidden_size[-1])`` if the gates are given.
+
+      Arguments
+        - **hidden_units**:list of positive integer, the layer number and units in each layer of every expert.
+
+        - **num_experts**: int, the number of experts.
+
+        - **activation**: Activation function to use. An activation layer such as Dice is created once per expert
+          and hidden layer, with its own weights and batch statistics, as in separate DNNs.
+
+        - **l2_reg**: float between 0 and 1. L2 regularizer strength applied to the kernel weights matrix.
+
+        - **dropout_rate**: float in [0,1). Fraction of the units to dropout.
+
+        - **use_bn**: bool. Whether use BatchNormalization before activation or not.
+
+        - **output_activation**: Activation function to use in the last layer.If ``None``,it will be same as ``activation``.
+
+        - **seed**: A Python integer to use as random seed.
+    """
+
+    def __init__(self, hidden_units, num_experts, activation='relu', l2_reg=0, dropout_rate=0, use_bn=False,
+                 output_activation=None, seed=1024, **kwargs):
+        self.hidden_units = hidden_units
+        self.num_experts = num_experts
+        self.activation = activation
+        self.l2_reg = l2_reg
+        self.dropout_rate = dropout_rate
+        self.use_bn = use_bn
+        self.output_activation = output_activation
+        self.seed = seed
+
+        super(ExpertDNN, self).__init__(**kwargs)
+
+    def build(self, input_shape):
+        if isinstance(input_shape, list):
+            input_shape = input_shape[0]
+        input_size = input_shape[-1]
+        hidden_units = [int(input_size)] + list(self.hidden_units)
+        # glorot_normal for every expert, the fans of a 3D kernel are multiplied by num_experts
+        self.kernels = [self.add_weight(name='kernel' + str(i),
+                                        shape=(self.num_experts, hidden_units[i], hidden_units[i + 1]),
+                                        initializer=VarianceScaling(scale=float(self.num_experts),
+                                                                    mode='fan_avg',
+                                                                    distribution='truncated_normal',
+                                                                    seed=self.seed),
+                                        regularizer=l2(self.l2_reg),
+                                        trainable=True) for i in range(len(self.hidden_units))]
+        self.bias = [self.add_weight(name='bias' + str(i),
+                                     shape=(self.num_experts, self.hidden_units[i]),
+                                     initializer=Zeros(),
+                                     trainable=True) for i in range(len(self.hidden_units))]
+        if self.use_bn:
+            # the first layer on a shared input runs batch major
+            self.bn_layers = [BatchNormalization(axis=[1, 2] if i == 0 and len(input_shape) == 2 else [0, 2])
+                              for i in range(len(self.hidden_units))]
+
+        self.dropout_layers = [Dropout(self.dropout_rate, seed=self.seed + i) for i in
+                               range(len(self.hidden_units))]
+
+        activations = [self.activation] * len(self.hidden_units)
+        if self.output_activation:
+            activations[-1] = self.output_activation
+        # activation layers with weights or statistics, e.g. Dice, get one instance per expert like separate DNNs
+        self.activation_layers = []
+        for activation in activations:
+            layer = activation_layer(activation)
+            if isinstance(layer, Activation):
+                self.activation_layers.append([layer] * self.num_experts)
+            else:
+                self.activation_layers.append(
+                    [layer] + [activation_layer(activation) for _ in range(self.num_experts - 1)])
+
+        super(ExpertDNN, self).build(input_shape)  # Be sure to call this somewhere!
+
+    def call(self, inputs, training=None, **kwargs):
+        if isinstance(inputs, list):
+            inputs, gates = inputs
+            if self.use_bn or len(self.hidden_units) == 0 or any(
+                    not isinstance(layers[0], Activation) for layers in self.activation_layers):
+                # batch statistics, e.g. of BatchNormalization or Dice, are taken on every row of the batch, an
+                # expert may be routed none
+                return tf.matmul(gates, self._experts(inputs, training))
+            # unstacked once, the gradients of the experts are stacked back instead of summing full size slices
+            kernels = list(zip(*[tf.unstack(kernel) for kernel in self.kernels]))
+            biases = list(zip(*[tf.unstack(bias) for bias in self.bias]))
+            expert_inputs = [inputs] * self.num_experts if K.ndim(inputs) == 2 else tf.unstack(inputs, axis=1)
+            return dispatch_experts(gates, lambda e, index: self._expert(e, tf.gather(expert_inputs[e], index),
+                                                                         kernels[e], biases[e], training),
+                                    self.num_experts)
+        return self._experts(inputs, training)
+
+    def _activation(self, layer, inputs, training=None):
+        try:
+            return layer(inputs, training=training)
+        except TypeError as e:  # TypeError: call() got an unexpected keyword argument 'training'
+            print("make sure the activation function use training flag properly", e)
+            return layer(inputs)
+
+    def _expert(self, e, inputs, kernels, biases, training=None):
+        # output of expert e for some rows of the batch
+        deep_input = inputs
+        for i in range(len(self.hidden_units)):
+            fc = tf.nn.bias_add(tf.matmul(deep_input, kernels[i]), biases[i])
+            fc = self._activation(self.activation_layers[i][e], fc, training)
+            deep_input = self.dropout_layers[i](fc, training=training)
+        return deep_input
+
+    def _experts(self, inputs, training=None):
+        # output of all the experts for every row of the batch
+
+        if len(self.hidden_units) == 0:
+            if K.ndim(inputs) == 2:
+                return tf.tile(tf.expand_dims(inputs, axis=1), [1, self.num_experts, 1])
+            return inputs
+
+        # a shared input runs through one matmul on the kernels of all the experts side by side, batch major, the
+        # other layers run expert-major, num_experts * None * units, as plain batched matmuls
+        batch_major = K.ndim(inputs) == 2
+        deep_input = inputs if batch_major else tf.transpose(inputs, (1, 0, 2))
+        for i in range(len(self.hidden_units)):
+            if batch_major and i == 0:
+                kernel = tf.reshape(tf.transpose(self.kernels[0], (1, 0, 2)), (int(self.kernels[0].shape[1]), -1))
+                fc = tf.nn.bias_add(tf.matmul(deep_input, kernel), tf.reshape(self.bias[0], (-1,)))
+                fc = tf.reshape(fc, (-1, self.num_experts, self.hidden_units[0]))
+            else:
+                if batch_major:
+                    deep_input = tf.transpose(deep_input, (1, 0, 2))
+                    batch_major = False
+                fc = tf.matmul(deep_input, self.kernels[i]) + tf.expand_dims(self.bias[i], axis=1)
+
+            if self.use_bn:
+                fc = self.bn_layers[i](fc, training=training)
+            if isinstance(self.activation_layers[i][0], Activation):
+                fc = self._activation(self.activation_layers[i][0], fc, training)
+            else:
+                # every expert has its own activation layer, fed batch_size * units as in a DNN
+                expert_axis = 1 if batch_major else 0
+                fc = tf.stack([self._activation(layer, expert_fc, training) for layer, expert_fc in
+                               zip(self.activation_layers[i], tf.unstack(fc, axis=expert_axis))], axis=expert_axis)
+
+            fc = self.dropout_layers[i](fc, training=training)
+            deep_input = fc
+
+        return deep_input if batch_major else tf.transpose(deep_input, (1, 0, 2))
+
+    def compute_output_shape(self, input_shape):
+        if isinstance(input_shape, list):
+            input_shape, gates_shape = input_shape
+            output_dim = self.hidden_units[-1] if len(self.hidden_units) > 0 else input_shape[-1]
+            return (input_shape[0], gates_shape[1], output_dim)
+        output_dim = self.hidden_units[-1] if len(self.hidden_units) > 0 else input_shape[-1]
+        return (input_shape[0], self.num_experts, output_dim)
+
+    def get_config(self, ):
+        config = {'activation': self.activation, 'hidden_units': self.hidden_units, 'num_experts': self.num_experts,
+                  'l2_reg': self.l2_reg, 'use_bn': self.use_bn, 'dropout_rate': self.dropout_rate,
+                  'output_activation': self.output_activation, 'seed': self.seed}
+        base_config = super(ExpertDNN, self).get_config()
+        return dict(list(base_config.items()) + list(config.items()))
+
+
+class ExpertGate(Layer):
+    """The softmax gates of a mixture of experts, the logits of all the gates are computed with one projection.
+
+      Input shape
+        - 2D tensor with shape: ``(batch_size, input_dim)`` fed to every gate, or 3D tensor with shape:
+          ``(batch_size, num_gates, input_dim)`` holding the input of each gate.
+
+      Output shape
+        - 3D tensor with shape: ``(batch_size, num_gates, num_experts)``, the weights of the experts for every gate.
+
+      Arguments
+        - **num_experts**: int, the number of experts.
+
+        - **num_gates**: int, the number of gates, e.g. the number of tasks of MMoE.
+
+        - **l2_reg**: float between 0 and 1. L2 regularizer strength applied to the kernel weights matrix.
+
+        - **seed**: A Python integer to use as random seed.
+
+        - **top_k**: int or None. If set, every gate keeps its ``top_k`` highest scoring experts, the softmax is
+          taken over them and the other experts get a zero weight.
+
+        - **load_balance_weight**: float. Weight of the load balancing loss of the ``top_k`` gates added to the
+          layer losses.
+    """
+
+    def __init__(self, num_experts, num_gates=1, l2_reg=0, seed=1024, top_k=None, load_balance_weight=0.0,
+                 **kwargs):
+        if top_k is not None and not 0 < top_k <= num_experts:
+            raise ValueError("top_k must be in [1, num_experts]")
+        self.num_experts = num_experts
+        self.num_gates = num_gates
+        self.l2_reg = l2_reg
+        self.seed = seed
+        self.top_k = top_k
+        self.load_balance_weight = load_balance_weight
+        super(ExpertGate, self).__init__(**kwargs)
+
+    def build(self, input_shape):
+        # glorot_uniform for every gate
+        self.kernel = self.add_weight(name='kernel', shape=(self.num_gates, int(input_shape[-1]), self.num_experts),
+                                      initializer=VarianceScaling(scale=float(self.num_gates), mode='fan_avg',
+                                                                  distribution='uniform', seed=self.seed),
+                                      regularizer=l2(self.l2_reg),
+                                      trainable=True)
+        super(ExpertGate, self).build(input_shape)  # Be sure to call this somewhere!
+
+    def call(self, inputs, **kwargs):
+        if K.ndim(inputs) == 2:
+            # a shared input runs all the gates in one matmul on their kernels side by side
+            kernel = tf.reshape(tf.transpose(self.kernel, (1, 0, 2)), (int(self.kernel.shape[1]), -1))
+            logits = tf.reshape(tf.matmul(inputs, kernel), (-1, self.num_gates, self.num_experts))
+        else:
+            logits = tf.einsum('bgd,gde->bge', inputs, self.kernel)
+        if self.top_k is None:
+            return tf.nn.softmax(logits, axis=-1)
+
+        gates = top_k_gating(logits, self.top_k)
+        if self.load_balance_weight > 0:
+            self.add_loss(self.load_balance_weight * load_balancing_loss(logits, gates))
+        return gates
+
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0], self.num_gates, self.num_experts)
+
+    def get_config(self, ):
+        config = {'num_experts': self.num_experts, 'num_gates': self.num_gates, 'l2_reg': self.l2_reg,
+                  'seed': self.seed, 'top_k': self.top_k, 'load_balance_weight': self.load_balance_weight}
+        base_config = super(ExpertGate, self).get_config()
+        return dict(list(base_config.items()) + list(config.items()))
+
+
 class PredictionLayer(Layer):
     """
       Arguments
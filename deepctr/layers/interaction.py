@@ -12,18 +12,20 @@ import itertools
 
 import tensorflow as tf
 from keras import backend as K
-from keras.backend import batch_dot
 
 
-from keras.initializers import Zeros, Ones, Constant, TruncatedNormal, glorot_normal, glorot_uniform
+from keras import initializers
+from keras.initializers import Zeros, Ones, Constant, TruncatedNormal, VarianceScaling, glorot_normal, glorot_uniform
 
 from keras.layers import Layer, MaxPooling2D, Conv2D, Dropout, Lambda, Dense, Flatten
 from keras.regularizers import l2
 from keras import utils
 
 from .activation import activation_layer
-from .utils import concat_func, reduce_sum, softmax, reduce_mean
+from .utils import concat_func, reduce_sum, softmax, reduce_mean, top_k_gating, load_balancing_loss, \
+    dispatch_experts
 from .core import DNN
+from .sequence import SequencePoolingLayer
 
 
 class AFMLayer(Layer):
@@ -47,16 +49,21 @@ class AFMLayer(Layer):
 
         - **seed** : A Python integer to use as random seed.
 
+        - **return_score** : bool. If True the layer returns the normalized attention scores of the pairs, a 3D
+         tensor with shape ``(batch_size, N*(N-1)/2, 1)``, instead of its output. Meant for inspecting a trained
+         model, otherwise the scores are only computed inside the forward pass and are not kept.
+
       References
         - [Attentional Factorization Machines : Learning the Weight of Feature
         Interactions via Attention Networks](https://arxiv.org/pdf/1708.04617.pdf)
     """
 
-    def __init__(self, attention_factor=4, l2_reg_w=0, dropout_rate=0, seed=1024, **kwargs):
+    def __init__(self, attention_factor=4, l2_reg_w=0, dropout_rate=0, seed=1024, return_score=False, **kwargs):
         self.attention_factor = attention_factor
         self.l2_reg_w = l2_reg_w
         self.dropout_rate = dropout_rate
         self.seed = seed
+        self.return_score = return_score
         super(AFMLayer, self).__init__(**kwargs)
 
     def build(self, input_shape):
@@ -68,7 +75,7 @@ class AFMLayer(Layer):
                              'on a list of at least 2 inputs')
 
         shape_set = set()
-        reduced_input_shape = [shape.as_list() for shape in input_shape]
+        reduced_input_shape = [tf.TensorShape(shape).as_list() for shape in input_shape]
         for i in range(len(input_shape)):
             shape_set.add(tuple(reduced_input_shape[i]))
 
@@ -84,6 +91,9 @@ class AFMLayer(Layer):
                              'Got different shapes: %s' % (input_shape[0]))
 
         embedding_size = int(input_shape[0][-1])
+        pairs = list(itertools.combinations(range(len(input_shape)), 2))
+        self.pair_rows = [i for i, _ in pairs]
+        self.pair_cols = [j for _, j in pairs]
 
         self.attention_W = self.add_weight(shape=(embedding_size,
                                                   self.attention_factor), initializer=glorot_normal(seed=self.seed),
@@ -109,26 +119,19 @@ class AFMLayer(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
 
-        embeds_vec_list = inputs
-        row = []
-        col = []
-
-        for r, c in itertools.combinations(embeds_vec_list, 2):
-            row.append(r)
-            col.append(c)
-
-        p = tf.concat(row, axis=1)
-        q = tf.concat(col, axis=1)
-        inner_product = p * q
+        # field major layout, every pair is one row of a gather on the first axis
+        embeds = tf.transpose(concat_func(inputs, axis=1), (1, 0, 2))  # field_size * batch * embedding_size
+        bi_interaction = tf.gather(embeds, self.pair_rows) * tf.gather(embeds, self.pair_cols)
 
-        bi_interaction = inner_product
         attention_temp = tf.nn.relu(tf.nn.bias_add(tf.tensordot(
             bi_interaction, self.attention_W, axes=(-1, 0)), self.attention_b))
         #  Dense(self.attention_factor,'relu',kernel_regularizer=l2(self.l2_reg_w))(bi_interaction)
-        self.normalized_att_score = softmax(tf.tensordot(
-            attention_temp, self.projection_h, axes=(-1, 0)), dim=1)
+        normalized_att_score = softmax(tf.tensordot(
+            attention_temp, self.projection_h, axes=(-1, 0)), dim=0)  # pair * batch * 1
+        if self.return_score:
+            return tf.transpose(normalized_att_score, (1, 0, 2))
         attention_output = reduce_sum(
-            self.normalized_att_score * bi_interaction, axis=1)
+            normalized_att_score * bi_interaction, axis=0)
 
         attention_output = self.dropout(attention_output, training=training)  # training
 
@@ -140,11 +143,14 @@ class AFMLayer(Layer):
         if not isinstance(input_shape, list):
             raise ValueError('A `AFMLayer` layer should be called '
                              'on a list of inputs.')
+        if self.return_score:
+            return (None, len(input_shape) * (len(input_shape) - 1) // 2, 1)
         return (None, 1)
 
     def get_config(self, ):
         config = {'attention_factor': self.attention_factor,
-                  'l2_reg_w': self.l2_reg_w, 'dropout_rate': self.dropout_rate, 'seed': self.seed}
+                  'l2_reg_w': self.l2_reg_w, 'dropout_rate': self.dropout_rate, 'seed': self.seed,
+                  'return_score': self.return_score}
         base_config = super(AFMLayer, self).get_config()
         base_config.update(config)
         return base_config
@@ -213,13 +219,19 @@ class CIN(Layer):
 
         - **split_half** : bool.if set to False, half of the feature maps in each hidden will connect to output unit.
 
+        - **l2_reg** : float. L2 regularizer strength applied to the filters.
+
         - **seed** : A Python integer to use as random seed.
 
+        - **filter_rank** : int or None. If set, the ``field_size * hidden_size`` filter of every feature map is
+          factorized into two matrices of rank ``filter_rank``, so the outer product of the fields is never built.
+
       References
         - [Lian J, Zhou X, Zhang F, et al. xDeepFM: Combining Explicit and Implicit Feature Interactions for Recommender Systems[J]. arXiv preprint arXiv:1803.05170, 2018.] (https://arxiv.org/pdf/1803.05170.pdf)
     """
 
-    def __init__(self, layer_size=(128, 128), activation='relu', split_half=True, l2_reg=1e-5, seed=1024, **kwargs):
+    def __init__(self, layer_size=(128, 128), activation='relu', split_half=True, l2_reg=1e-5, seed=1024,
+                 filter_rank=None, **kwargs):
         if len(layer_size) == 0:
             raise ValueError(
                 "layer_size must be a list(tuple) of length greater than 1")
@@ -228,6 +240,7 @@ class CIN(Layer):
         self.activation = activation
         self.l2_reg = l2_reg
         self.seed = seed
+        self.filter_rank = filter_rank
         super(CIN, self).__init__(**kwargs)
 
     def build(self, input_shape):
@@ -240,12 +253,25 @@ class CIN(Layer):
         self.bias = []
         for i, size in enumerate(self.layer_size):
 
-            self.filters.append(self.add_weight(name='filter' + str(i),
-                                                shape=[1, self.field_nums[-1]
-                                                       * self.field_nums[0], size],
-                                                dtype=tf.float32, initializer=glorot_uniform(
-                    seed=self.seed + i),
-                                                regularizer=l2(self.l2_reg)))
+            if self.filter_rank is None:
+                self.filters.append(self.add_weight(name='filter' + str(i),
+                                                    shape=[1, self.field_nums[-1]
+                                                           * self.field_nums[0], size],
+                                                    dtype=tf.float32, initializer=glorot_uniform(
+                        seed=self.seed + i),
+                                                    regularizer=l2(self.l2_reg)))
+            else:
+                # filter[m, h, s] = sum_r filter_u[m, r, s] * filter_v[h, r, s]
+                self.filters.append((self.add_weight(name='filter' + str(i) + '_u',
+                                                     shape=[self.field_nums[0], self.filter_rank * size],
+                                                     dtype=tf.float32,
+                                                     initializer=glorot_uniform(seed=self.seed + i),
+                                                     regularizer=l2(self.l2_reg)),
+                                     self.add_weight(name='filter' + str(i) + '_v',
+                                                     shape=[self.field_nums[-1], self.filter_rank * size],
+                                                     dtype=tf.float32,
+                                                     initializer=glorot_uniform(seed=self.seed + i + 1),
+                                                     regularizer=l2(self.l2_reg))))
 
             self.bias.append(self.add_weight(name='bias' + str(i), shape=[size], dtype=tf.float32,
                                              initializer=Zeros()))
@@ -271,34 +297,32 @@ class CIN(Layer):
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
 
         dim = int(inputs.get_shape()[-1])
-        hidden_nn_layers = [inputs]
+        # embedding dimension first and feature maps last, so the filters are a plain matmul on the last axis
+        x0 = tf.transpose(inputs, perm=[0, 2, 1])  # batch * dim * field_nums[0]
+        hidden_nn_layers = [x0]
         final_result = []
 
-        split_tensor0 = tf.split(hidden_nn_layers[0], dim * [1], 2)
         for idx, layer_size in enumerate(self.layer_size):
-            split_tensor = tf.split(hidden_nn_layers[-1], dim * [1], 2)
-
-            dot_result_m = tf.matmul(
-                split_tensor0, split_tensor, transpose_b=True)
-
-            dot_result_o = tf.reshape(
-                dot_result_m, shape=[dim, -1, self.field_nums[0] * self.field_nums[idx]])
-
-            dot_result = tf.transpose(dot_result_o, perm=[1, 0, 2])
-
-            curr_out = tf.nn.conv1d(
-                dot_result, filters=self.filters[idx], stride=1, padding='VALID')
+            if self.filter_rank is None:
+                # batch * dim * (field_nums[0] * field_nums[idx]), same order as the rows of the filter
+                outer = tf.reshape(tf.einsum('bdm,bdh->bdmh', x0, hidden_nn_layers[-1]),
+                                   [-1, dim, self.field_nums[0] * self.field_nums[idx]])
+                curr_out = tf.tensordot(outer, self.filters[idx][0], axes=(-1, 0))
+            else:
+                filter_u, filter_v = self.filters[idx]
+                x0_u = tf.tensordot(x0, filter_u, axes=(-1, 0))  # batch * dim * (rank * layer_size)
+                xk_v = tf.tensordot(hidden_nn_layers[-1], filter_v, axes=(-1, 0))
+                curr_out = reduce_sum(tf.reshape(x0_u * xk_v, [-1, dim, self.filter_rank, layer_size]), 2,
+                                      keep_dims=False)
 
             curr_out = tf.nn.bias_add(curr_out, self.bias[idx])
 
-            curr_out = self.activation_layers[idx](curr_out)
-
-            curr_out = tf.transpose(curr_out, perm=[0, 2, 1])
+            curr_out = self.activation_layers[idx](curr_out)  # batch * dim * layer_size
 
             if self.split_half:
                 if idx != len(self.layer_size) - 1:
                     next_hidden, direct_connect = tf.split(
-                        curr_out, 2 * [layer_size // 2], 1)
+                        curr_out, 2 * [layer_size // 2], 2)
                 else:
                     direct_connect = curr_out
                     next_hidden = 0
@@ -309,8 +333,8 @@ class CIN(Layer):
             final_result.append(direct_connect)
             hidden_nn_layers.append(next_hidden)
 
-        result = tf.concat(final_result, axis=1)
-        result = reduce_sum(result, -1, keep_dims=False)
+        result = tf.concat(final_result, axis=2)
+        result = reduce_sum(result, 1, keep_dims=False)
 
         return result
 
@@ -325,7 +349,7 @@ class CIN(Layer):
     def get_config(self, ):
 
         config = {'layer_size': self.layer_size, 'split_half': self.split_half, 'activation': self.activation,
-                  'seed': self.seed}
+                  'l2_reg': self.l2_reg, 'seed': self.seed, 'filter_rank': self.filter_rank}
         base_config = super(CIN, self).get_config()
         base_config.update(config)
         return base_config
@@ -346,19 +370,26 @@ class CrossNet(Layer):
 
         - **l2_reg**: float between 0 and 1. L2 regularizer strength applied to the kernel weights matrix
 
-        - **parameterization**: string, ``"vector"``  or ``"matrix"`` ,  way to parameterize the cross network.
+        - **parameterization**: string, ``"vector"`` , ``"matrix"`` or ``"low_rank"`` ,  way to parameterize the
+          cross network. ``"low_rank"`` factorizes the ``units x units`` matrix of every layer as ``U * V^T``.
+
+        - **low_rank**: Positive integer, dimensionality of the ``U`` and ``V`` factors of ``"low_rank"``.
 
         - **seed**: A Python integer to use as random seed.
 
       References
         - [Wang R, Fu B, Fu G, et al. Deep & cross network for ad click predictions[C]//Proceedings of the ADKDD'17. ACM, 2017: 12.](https://arxiv.org/abs/1708.05123)
+        - [Wang R, Shivanna R, Cheng D Z, et al. DCN-M: Improved Deep & Cross Network for Feature Cross Learning in Web-scale Learning to Rank Systems[J]. 2020.](https://arxiv.org/abs/2008.13535)
     """
 
-    def __init__(self, layer_num=2, parameterization='vector', l2_reg=0, seed=1024, **kwargs):
+    def __init__(self, layer_num=2, parameterization='vector', l2_reg=0, seed=1024, low_rank=32, **kwargs):
+        if parameterization not in ('vector', 'matrix', 'low_rank'):
+            raise ValueError("parameterization should be 'vector', 'matrix' or 'low_rank'")
         self.layer_num = layer_num
         self.parameterization = parameterization
         self.l2_reg = l2_reg
         self.seed = seed
+        self.low_rank = low_rank
         print('CrossNet parameterization:', self.parameterization)
         super(CrossNet, self).__init__(**kwargs)
 
@@ -383,8 +414,20 @@ class CrossNet(Layer):
                                                 seed=self.seed),
                                             regularizer=l2(self.l2_reg),
                                             trainable=True) for i in range(self.layer_num)]
-        else:  # error
-            raise ValueError("parameterization should be 'vector' or 'matrix'")
+        else:
+            # W = U * V^T
+            self.U_list = [self.add_weight(name='U_list' + str(i),
+                                           shape=(dim, self.low_rank),
+                                           initializer=glorot_normal(
+                                               seed=self.seed),
+                                           regularizer=l2(self.l2_reg),
+                                           trainable=True) for i in range(self.layer_num)]
+            self.V_list = [self.add_weight(name='V_list' + str(i),
+                                           shape=(dim, self.low_rank),
+                                           initializer=glorot_normal(
+                                               seed=self.seed),
+                                           regularizer=l2(self.l2_reg),
+                                           trainable=True) for i in range(self.layer_num)]
         self.bias = [self.add_weight(name='bias' + str(i),
                                      shape=(dim, 1),
                                      initializer=Zeros(),
@@ -397,26 +440,26 @@ class CrossNet(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 2 dimensions" % (K.ndim(inputs)))
 
-        x_0 = tf.expand_dims(inputs, axis=2)
+        x_0 = inputs
         x_l = x_0
         for i in range(self.layer_num):
+            bias = self.bias[i][:, 0]
             if self.parameterization == 'vector':
-                xl_w = tf.tensordot(x_l, self.kernels[i], axes=(1, 0))
-                dot_ = tf.matmul(x_0, xl_w)
-                x_l = dot_ + self.bias[i] + x_l
+                xl_w = tf.matmul(x_l, self.kernels[i])  # (bs, 1)
+                x_l = x_0 * xl_w + bias + x_l
             elif self.parameterization == 'matrix':
-                xl_w = tf.einsum('ij,bjk->bik', self.kernels[i], x_l)  # W * xi  (bs, dim, 1)
-                dot_ = xl_w + self.bias[i]  # W * xi + b
-                x_l = x_0 * dot_ + x_l  # x0 · (W * xi + b) +xl  Hadamard-product
-            else:  # error
-                raise ValueError("parameterization should be 'vector' or 'matrix'")
-        x_l = tf.squeeze(x_l, axis=2)
+                xl_w = tf.matmul(x_l, self.kernels[i], transpose_b=True)  # W * xi  (bs, dim)
+                x_l = x_0 * (xl_w + bias) + x_l  # x0 · (W * xi + b) +xl  Hadamard-product
+            else:
+                v_x = tf.matmul(x_l, self.V_list[i])  # V^T * xi  (bs, low_rank)
+                uv_x = tf.matmul(v_x, self.U_list[i], transpose_b=True)  # U * V^T * xi  (bs, dim)
+                x_l = x_0 * (uv_x + bias) + x_l
         return x_l
 
     def get_config(self, ):
 
         config = {'layer_num': self.layer_num, 'parameterization': self.parameterization,
-                  'l2_reg': self.l2_reg, 'seed': self.seed}
+                  'l2_reg': self.l2_reg, 'seed': self.seed, 'low_rank': self.low_rank}
         base_config = super(CrossNet, self).get_config()
         base_config.update(config)
         return base_config
@@ -447,16 +490,30 @@ class CrossNetMix(Layer):
 
         - **seed**: A Python integer to use as random seed.
 
+        - **top_k**: int or None. If set, every sample is routed to its ``top_k`` highest scoring experts in every
+          layer, only these experts are evaluated on it and their gating scores are the softmax over them.
+
+        - **load_balance_weight**: float. Weight of the load balancing loss of the ``top_k`` gates added to the
+          layer losses.
+
+      The gating scores of all experts come from one ``(units, num_experts)`` weight. Weights saved with the former
+      one-gating-Dense-per-expert layout can be converted with ``deepctr.utils.convert_crossnetmix_weights``.
+
       References
         - [Wang R, Shivanna R, Cheng D Z, et al. DCN-M: Improved Deep & Cross Network for Feature Cross Learning in Web-scale Learning to Rank Systems[J]. 2020.](https://arxiv.org/abs/2008.13535)
     """
 
-    def __init__(self, low_rank=32, num_experts=4, layer_num=2, l2_reg=0, seed=1024, **kwargs):
+    def __init__(self, low_rank=32, num_experts=4, layer_num=2, l2_reg=0, seed=1024, top_k=None,
+                 load_balance_weight=0.0, **kwargs):
+        if top_k is not None and not 0 < top_k <= num_experts:
+            raise ValueError("top_k must be in [1, num_experts]")
         self.low_rank = low_rank
         self.num_experts = num_experts
         self.layer_num = layer_num
         self.l2_reg = l2_reg
         self.seed = seed
+        self.top_k = top_k
+        self.load_balance_weight = load_balance_weight
         super(CrossNetMix, self).__init__(**kwargs)
 
     def build(self, input_shape):
@@ -489,7 +546,11 @@ class CrossNetMix(Layer):
                                        regularizer=l2(self.l2_reg),
                                        trainable=True) for i in range(self.layer_num)]
 
-        self.gating = [Dense(1, use_bias=False) for i in range(self.num_experts)]
+        # one projection computes the gating scores of all experts
+        self.gating_kernel = self.add_weight(name='gating_kernel',
+                                             shape=(dim, self.num_experts),
+                                             initializer=glorot_uniform(seed=self.seed),
+                                             trainable=True)
 
         self.bias = [self.add_weight(name='bias' + str(i),
                                      shape=(dim, 1),
@@ -503,45 +564,59 @@ class CrossNetMix(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 2 dimensions" % (K.ndim(inputs)))
 
-        x_0 = tf.expand_dims(inputs, axis=2)
+        x_0 = inputs
         x_l = x_0
         for i in range(self.layer_num):
-            output_of_experts = []
-            gating_score_of_experts = []
-            for expert_id in range(self.num_experts):
-                # (1) G(x_l)
-                # compute the gating score by x_l
-                gating_score_of_experts.append(self.gating[expert_id](tf.squeeze(x_l, axis=2)))
-
-                # (2) E(x_l)
-                # project the input x_l to $\mathbb{R}^{r}$
-                v_x = tf.einsum('ij,bjk->bik', tf.transpose(self.V_list[i][expert_id]), x_l)  # (bs, low_rank, 1)
-
-                # nonlinear activation in low rank space
-                v_x = tf.nn.tanh(v_x)
-                v_x = tf.einsum('ij,bjk->bik', self.C_list[i][expert_id], v_x)  # (bs, low_rank, 1)
-                v_x = tf.nn.tanh(v_x)
+            if self.top_k is not None:
+                x_l = self._sparse_cross(i, x_0, x_l)
+                continue
 
-                # project back to $\mathbb{R}^{d}$
-                uv_x = tf.einsum('ij,bjk->bik', self.U_list[i][expert_id], v_x)  # (bs, dim, 1)
+            # (1) G(x_l)
+            # compute the gating scores of all experts by x_l
+            gating_score_of_experts = tf.nn.softmax(tf.matmul(x_l, self.gating_kernel), 1)  # (bs, num_experts)
 
-                dot_ = uv_x + self.bias[i]
-                dot_ = x_0 * dot_  # Hadamard-product
+            # (2) E(x_l), all experts at once
+            # project the input x_l to $\mathbb{R}^{r}$
+            v_x = tf.einsum('bd,edr->ber', x_l, self.V_list[i])  # (bs, num_experts, low_rank)
 
-                output_of_experts.append(tf.squeeze(dot_, axis=2))
+            # nonlinear activation in low rank space
+            v_x = tf.nn.tanh(v_x)
+            v_x = tf.einsum('eij,bej->bei', self.C_list[i], v_x)  # (bs, num_experts, low_rank)
+            v_x = tf.nn.tanh(v_x)
 
             # (3) mixture of low-rank experts
-            output_of_experts = tf.stack(output_of_experts, 2)  # (bs, dim, num_experts)
-            gating_score_of_experts = tf.stack(gating_score_of_experts, 1)  # (bs, num_experts, 1)
-            moe_out = tf.matmul(output_of_experts, tf.nn.softmax(gating_score_of_experts, 1))
-            x_l = moe_out + x_l  # (bs, dim, 1)
-        x_l = tf.squeeze(x_l, axis=2)
+            # weighting v_x by the gating scores turns the projections back to $\mathbb{R}^{d}$ and their sum over
+            # the experts into one contraction, and as the scores sum to one the bias and the Hadamard-product
+            # with x_0 are applied once to the mixture
+            v_x = v_x * tf.expand_dims(gating_score_of_experts, axis=2)
+            moe_uv_x = tf.einsum('edr,ber->bd', self.U_list[i], v_x)  # (bs, dim)
+            moe_out = x_0 * (moe_uv_x + tf.squeeze(self.bias[i], axis=1))
+            x_l = moe_out + x_l  # (bs, dim)
         return x_l
 
+    def _sparse_cross(self, i, x_0, x_l):
+        # cross layer i evaluating every expert only on the samples routed to it
+        gating_logits = tf.matmul(x_l, self.gating_kernel)  # (bs, num_experts)
+        gating_score_of_experts = top_k_gating(gating_logits, self.top_k)
+        if self.load_balance_weight > 0:
+            self.add_loss(self.load_balance_weight * load_balancing_loss(gating_logits, gating_score_of_experts))
+
+        V, C, U = tf.unstack(self.V_list[i]), tf.unstack(self.C_list[i]), tf.unstack(self.U_list[i])
+
+        def expert_fn(e, index):
+            v_x = tf.nn.tanh(tf.matmul(tf.gather(x_l, index), V[e]))
+            v_x = tf.nn.tanh(tf.matmul(v_x, C[e], transpose_b=True))
+            return tf.matmul(v_x, U[e], transpose_b=True)
+
+        moe_uv_x = dispatch_experts(tf.expand_dims(gating_score_of_experts, axis=1), expert_fn, self.num_experts)
+        moe_out = x_0 * (moe_uv_x[:, 0] + tf.squeeze(self.bias[i], axis=1))
+        return moe_out + x_l
+
     def get_config(self, ):
 
         config = {'low_rank': self.low_rank, 'num_experts': self.num_experts, 'layer_num': self.layer_num,
-                  'l2_reg': self.l2_reg, 'seed': self.seed}
+                  'l2_reg': self.l2_reg, 'seed': self.seed, 'top_k': self.top_k,
+                  'load_balance_weight': self.load_balance_weight}
         base_config = super(CrossNetMix, self).get_config()
         base_config.update(config)
         return base_config
@@ -624,7 +699,7 @@ class InnerProductLayer(Layer):
             raise ValueError('A `InnerProductLayer` layer should be called '
                              'on a list of at least 2 inputs')
 
-        reduced_inputs_shapes = [shape.as_list() for shape in input_shape]
+        reduced_inputs_shapes = [tf.TensorShape(shape).as_list() for shape in input_shape]
         shape_set = set()
 
         for i in range(len(input_shape)):
@@ -639,6 +714,9 @@ class InnerProductLayer(Layer):
             raise ValueError('A `InnerProductLayer` layer requires '
                              'inputs of a list with same shape tensor like (None,1,embedding_size)'
                              'Got different shapes: %s' % (input_shape[0]))
+        pairs = list(itertools.combinations(range(len(input_shape)), 2))
+        self.pair_rows = [i for i, _ in pairs]
+        self.pair_cols = [j for _, j in pairs]
         super(InnerProductLayer, self).build(
             input_shape)  # Be sure to call this somewhere!
 
@@ -647,25 +725,16 @@ class InnerProductLayer(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
 
-        embed_list = inputs
-        row = []
-        col = []
-        num_inputs = len(embed_list)
-
-        for i in range(num_inputs - 1):
-            for j in range(i + 1, num_inputs):
-                row.append(i)
-                col.append(j)
-        p = tf.concat([embed_list[idx]
-                       for idx in row], axis=1)  # batch num_pairs k
-        q = tf.concat([embed_list[idx]
-                       for idx in col], axis=1)
+        # field major layout, every pair is one row of a gather on the first axis
+        embeds = tf.transpose(concat_func(inputs, axis=1), (1, 0, 2))  # field_size * batch_size * k
+        p = tf.gather(embeds, self.pair_rows)  # num_pairs * batch * k
+        q = tf.gather(embeds, self.pair_cols)
 
         inner_product = p * q
         if self.reduce_sum:
             inner_product = reduce_sum(
                 inner_product, axis=2, keep_dims=True)
-        return inner_product
+        return tf.transpose(inner_product, (1, 0, 2))
 
     def compute_output_shape(self, input_shape):
         num_inputs = len(input_shape)
@@ -698,13 +767,24 @@ class InteractingLayer(Layer):
             - **att_embedding_size**: int.The embedding size in multi-head self-attention network.
             - **head_num**: int.The head number in multi-head  self-attention network.
             - **use_res**: bool.Whether or not use standard residual connections before output.
+            - **scaling**: bool.Whether or not scale the attention scores by ``1 / sqrt(att_embedding_size)``.
             - **seed**: A Python integer to use as random seed.
+            - **fused_qkv**: bool.Whether compute query, key and value with one projection stored in a single weight.
+            - **field_rank**: int or None.If set, the keys and values of the fields are projected to ``field_rank``
+              learned slots before the attention (Linformer), so it costs ``field_size * field_rank`` instead of
+              ``field_size * field_size``.
+            - **return_score**: bool.If True the layer returns the normalized attention scores, a 4D tensor with
+              shape ``(batch_size,head_num,field_size,field_size)``, or ``(batch_size,head_num,field_size,field_rank)``
+              with ``field_rank``, instead of its output. Meant for inspecting a trained model, otherwise the scores
+              are only computed inside the forward pass and are not kept.
 
       References
             - [Song W, Shi C, Xiao Z, et al. AutoInt: Automatic Feature Interaction Learning via Self-Attentive Neural Networks[J]. arXiv preprint arXiv:1810.11921, 2018.](https://arxiv.org/abs/1810.11921)
+            - [Wang S, Li B Z, Khabsa M, et al. Linformer: Self-Attention with Linear Complexity[J]. arXiv preprint arXiv:2006.04768, 2020.](https://arxiv.org/abs/2006.04768)
     """
 
-    def __init__(self, att_embedding_size=8, head_num=2, use_res=True, scaling=False, seed=1024, **kwargs):
+    def __init__(self, att_embedding_size=8, head_num=2, use_res=True, scaling=False, seed=1024, fused_qkv=False,
+                 field_rank=None, return_score=False, **kwargs):
         if head_num <= 0:
             raise ValueError('head_num must be a int > 0')
         self.att_embedding_size = att_embedding_size
@@ -712,6 +792,9 @@ class InteractingLayer(Layer):
         self.use_res = use_res
         self.seed = seed
         self.scaling = scaling
+        self.fused_qkv = fused_qkv
+        self.field_rank = field_rank
+        self.return_score = return_score
         super(InteractingLayer, self).__init__(**kwargs)
 
     def build(self, input_shape):
@@ -719,15 +802,33 @@ class InteractingLayer(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (len(input_shape)))
         embedding_size = int(input_shape[-1])
-        self.W_Query = self.add_weight(name='query', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                       dtype=tf.float32,
-                                       initializer=TruncatedNormal(seed=self.seed))
-        self.W_key = self.add_weight(name='key', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                     dtype=tf.float32,
-                                     initializer=TruncatedNormal(seed=self.seed + 1))
-        self.W_Value = self.add_weight(name='value', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                       dtype=tf.float32,
-                                       initializer=TruncatedNormal(seed=self.seed + 2))
+        if self.fused_qkv:
+            self.W_QKV = self.add_weight(name='qkv',
+                                         shape=[embedding_size, 3 * self.att_embedding_size * self.head_num],
+                                         dtype=tf.float32,
+                                         initializer=TruncatedNormal(seed=self.seed))
+        else:
+            self.W_Query = self.add_weight(name='query',
+                                           shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                           dtype=tf.float32,
+                                           initializer=TruncatedNormal(seed=self.seed))
+            self.W_key = self.add_weight(name='key', shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                         dtype=tf.float32,
+                                         initializer=TruncatedNormal(seed=self.seed + 1))
+            self.W_Value = self.add_weight(name='value',
+                                           shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                           dtype=tf.float32,
+                                           initializer=TruncatedNormal(seed=self.seed + 2))
+        if self.field_rank is not None:
+            if input_shape[1] is None:
+                raise ValueError('field_rank requires a known field_size')
+            self.key_projection = self.add_weight(name='key_projection', shape=[self.field_rank, int(input_shape[1])],
+                                                  dtype=tf.float32,
+                                                  initializer=glorot_uniform(seed=self.seed + 3))
+            self.value_projection = self.add_weight(name='value_projection',
+                                                    shape=[self.field_rank, int(input_shape[1])],
+                                                    dtype=tf.float32,
+                                                    initializer=glorot_uniform(seed=self.seed + 4))
         if self.use_res:
             self.W_Res = self.add_weight(name='res', shape=[embedding_size, self.att_embedding_size * self.head_num],
                                          dtype=tf.float32,
@@ -736,31 +837,42 @@ class InteractingLayer(Layer):
         # Be sure to call this somewhere!
         super(InteractingLayer, self).build(input_shape)
 
+    def _split_heads(self, x, field_size):
+        # None F D*head_num -> None head_num F D
+        x = tf.reshape(x, [-1, field_size, self.head_num, self.att_embedding_size])
+        return tf.transpose(x, [0, 2, 1, 3])
+
     def call(self, inputs, **kwargs):
         if K.ndim(inputs) != 3:
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
+        field_size = inputs.shape[1] if inputs.shape[1] is not None else tf.shape(inputs)[1]
 
-        querys = tf.tensordot(inputs, self.W_Query,
-                              axes=(-1, 0))  # None F D*head_num
-        keys = tf.tensordot(inputs, self.W_key, axes=(-1, 0))
-        values = tf.tensordot(inputs, self.W_Value, axes=(-1, 0))
+        if self.fused_qkv:
+            qkv = tf.tensordot(inputs, self.W_QKV, axes=(-1, 0))  # None F 3*D*head_num
+            qkv = tf.reshape(qkv, [-1, field_size, 3, self.head_num, self.att_embedding_size])
+            querys, keys, values = tf.unstack(tf.transpose(qkv, [2, 0, 3, 1, 4]))  # None head_num F D
+        else:
+            # None head_num F D
+            querys = self._split_heads(tf.tensordot(inputs, self.W_Query, axes=(-1, 0)), field_size)
+            keys = self._split_heads(tf.tensordot(inputs, self.W_key, axes=(-1, 0)), field_size)
+            values = self._split_heads(tf.tensordot(inputs, self.W_Value, axes=(-1, 0)), field_size)
 
-        # head_num None F D
-        querys = tf.stack(tf.split(querys, self.head_num, axis=2))
-        keys = tf.stack(tf.split(keys, self.head_num, axis=2))
-        values = tf.stack(tf.split(values, self.head_num, axis=2))
+        if self.field_rank is not None:
+            keys = tf.einsum('rf,bhfd->bhrd', self.key_projection, keys)  # None head_num field_rank D
+            values = tf.einsum('rf,bhfd->bhrd', self.value_projection, values)
 
         inner_product = tf.matmul(
-            querys, keys, transpose_b=True)  # head_num None F F
+            querys, keys, transpose_b=True)  # None head_num F F
         if self.scaling:
             inner_product /= self.att_embedding_size ** 0.5
-        self.normalized_att_scores = softmax(inner_product)
+        normalized_att_scores = softmax(inner_product)
+        if self.return_score:
+            return normalized_att_scores
 
-        result = tf.matmul(self.normalized_att_scores,
-                           values)  # head_num None F D
-        result = tf.concat(tf.split(result, self.head_num, ), axis=-1)
-        result = tf.squeeze(result, axis=0)  # None F D*head_num
+        result = tf.matmul(normalized_att_scores, values)  # None head_num F D
+        result = tf.transpose(result, [0, 2, 1, 3])
+        result = tf.reshape(result, [-1, field_size, self.head_num * self.att_embedding_size])
 
         if self.use_res:
             result += tf.tensordot(inputs, self.W_Res, axes=(-1, 0))
@@ -769,12 +881,15 @@ class InteractingLayer(Layer):
         return result
 
     def compute_output_shape(self, input_shape):
-
+        if self.return_score:
+            return (None, self.head_num, input_shape[1],
+                    input_shape[1] if self.field_rank is None else self.field_rank)
         return (None, input_shape[1], self.att_embedding_size * self.head_num)
 
     def get_config(self, ):
         config = {'att_embedding_size': self.att_embedding_size, 'head_num': self.head_num, 'use_res': self.use_res,
-                  'seed': self.seed}
+                  'scaling': self.scaling, 'seed': self.seed, 'fused_qkv': self.fused_qkv,
+                  'field_rank': self.field_rank, 'return_score': self.return_score}
         base_config = super(InteractingLayer, self).get_config()
         base_config.update(config)
         return base_config
@@ -812,7 +927,7 @@ class OutterProductLayer(Layer):
             raise ValueError('A `OutterProductLayer` layer should be called '
                              'on a list of at least 2 inputs')
 
-        reduced_inputs_shapes = [shape.as_list() for shape in input_shape]
+        reduced_inputs_shapes = [tf.TensorShape(shape).as_list() for shape in input_shape]
         shape_set = set()
 
         for i in range(len(input_shape)):
@@ -827,6 +942,9 @@ class OutterProductLayer(Layer):
             raise ValueError('A `OutterProductLayer` layer requires '
                              'inputs of a list with same shape tensor like (None,1,embedding_size)'
                              'Got different shapes: %s' % (input_shape[0]))
+        pairs = list(itertools.combinations(range(len(input_shape)), 2))
+        self.pair_rows = [i for i, _ in pairs]
+        self.pair_cols = [j for _, j in pairs]
         num_inputs = len(input_shape)
         num_pairs = int(num_inputs * (num_inputs - 1) / 2)
         input_shape = input_shape[0]
@@ -854,63 +972,21 @@ class OutterProductLayer(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
 
-        embed_list = inputs
-        row = []
-        col = []
-        num_inputs = len(embed_list)
-        for i in range(num_inputs - 1):
-            for j in range(i + 1, num_inputs):
-                row.append(i)
-                col.append(j)
-        p = tf.concat([embed_list[idx]
-                       for idx in row], axis=1)  # batch num_pairs k
-        # Reshape([num_pairs, self.embedding_size])
-        q = tf.concat([embed_list[idx] for idx in col], axis=1)
-
-        # -------------------------
-        if self.kernel_type == 'mat':
-            p = tf.expand_dims(p, 1)
-            # k     k* pair* k
-            # batch * pair
-            kp = reduce_sum(
-
-                # batch * pair * k
-
-                tf.multiply(
-
-                    # batch * pair * k
+        # field major layout, every pair is one row of a gather on the first axis
+        embeds = tf.transpose(concat_func(inputs, axis=1), (1, 0, 2))  # field_size * batch * k
+        p = tf.gather(embeds, self.pair_rows)  # pair * batch * k
+        q = tf.gather(embeds, self.pair_cols)
 
-                    tf.transpose(
-
-                        # batch * k * pair
-
-                        reduce_sum(
-
-                            # batch * k * pair * k
-
-                            tf.multiply(
-
-                                p, self.kernel),
-
-                            -1),
-
-                        [0, 2, 1]),
-
-                    q),
-
-                -1)
+        if self.kernel_type == 'mat':
+            # pair * batch * k, one k * k product per pair instead of the batch * k * pair * k intermediate
+            pk = tf.einsum('pbl,kpl->pbk', p, self.kernel)
+            kp = reduce_sum(pk * q, -1)
         else:
-            # 1 * pair * (k or 1)
-
-            k = tf.expand_dims(self.kernel, 0)
-
-            # batch * pair
-
+            # pair * 1 * (k or 1)
+            k = tf.expand_dims(self.kernel, 1)
             kp = reduce_sum(p * q * k, -1)
 
-            # p q # b * p * k
-
-        return kp
+        return tf.transpose(kp)  # batch * pair
 
     def compute_output_shape(self, input_shape):
         num_inputs = len(input_shape)
@@ -1143,6 +1219,10 @@ class BilinearInteraction(Layer):
 
         - **seed** : A Python integer to use as random seed.
 
+      The per field (``each``) or per pair (``interaction``) matrices are stored in one
+      ``(filed_size-1 | num_pairs, embedding_size, embedding_size)`` weight. Weights saved with the former
+      one-matrix-per-field or per-pair layout can be converted with ``deepctr.utils.convert_bilinear_weights``.
+
       References
         - [FiBiNET: Combining Feature Importance and Bilinear feature Interaction for Click-Through Rate Prediction](https://arxiv.org/pdf/1905.09433.pdf)
 
@@ -1160,17 +1240,20 @@ class BilinearInteraction(Layer):
             raise ValueError('A `AttentionalFM` layer should be called '
                              'on a list of at least 2 inputs')
         embedding_size = int(input_shape[0][-1])
+        pairs = list(itertools.combinations(range(len(input_shape)), 2))
+        self.pair_rows = [i for i, _ in pairs]
+        self.pair_cols = [j for _, j in pairs]
 
         if self.bilinear_type == "all":
             self.W = self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
                 seed=self.seed), name="bilinear_weight")
-        elif self.bilinear_type == "each":
-            self.W_list = [self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
-                seed=self.seed), name="bilinear_weight" + str(i)) for i in range(len(input_shape) - 1)]
-        elif self.bilinear_type == "interaction":
-            self.W_list = [self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(
-                seed=self.seed), name="bilinear_weight" + str(i) + '_' + str(j)) for i, j in
-                           itertools.combinations(range(len(input_shape)), 2)]
+        elif self.bilinear_type in ("each", "interaction"):
+            num_matrices = len(input_shape) - 1 if self.bilinear_type == "each" else len(pairs)
+            # glorot_normal for every matrix, the fans of a 3D kernel are multiplied by num_matrices
+            self.W = self.add_weight(shape=(num_matrices, embedding_size, embedding_size),
+                                     initializer=VarianceScaling(scale=float(num_matrices), mode='fan_avg',
+                                                                 distribution='truncated_normal', seed=self.seed),
+                                     name="bilinear_weight")
         else:
             raise NotImplementedError
 
@@ -1183,20 +1266,30 @@ class BilinearInteraction(Layer):
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" % (K.ndim(inputs)))
 
-        n = len(inputs)
+        # batch major layout, the products of the pairs are never transposed
+        embeds = concat_func(inputs, axis=1)  # batch_size * field_size * embedding_size
+        embedding_size = int(embeds.shape[-1])
         if self.bilinear_type == "all":
-            vidots = [tf.tensordot(inputs[i], self.W, axes=(-1, 0)) for i in range(n)]
-            p = [tf.multiply(vidots[i], inputs[j]) for i, j in itertools.combinations(range(n), 2)]
+            vidots = tf.tensordot(embeds, self.W, axes=(-1, 0))
+            p = tf.gather(vidots, self.pair_rows, axis=1)
         elif self.bilinear_type == "each":
-            vidots = [tf.tensordot(inputs[i], self.W_list[i], axes=(-1, 0)) for i in range(n - 1)]
-            p = [tf.multiply(vidots[i], inputs[j]) for i, j in itertools.combinations(range(n), 2)]
+            # one batched matmul on the small field major inputs
+            vidots = tf.matmul(tf.transpose(concat_func(inputs[:-1], axis=1), (1, 0, 2)), self.W)
+            p = tf.gather(tf.transpose(vidots, (1, 0, 2)), self.pair_rows, axis=1)
         elif self.bilinear_type == "interaction":
-            p = [tf.multiply(tf.tensordot(v[0], w, axes=(-1, 0)), v[1])
-                 for v, w in zip(itertools.combinations(inputs, 2), self.W_list)]
+            # the pairs (i, j > i) are contiguous, so every field is multiplied by the matrices of its pairs side by
+            # side in one matmul instead of being gathered once per pair
+            W = tf.reshape(tf.transpose(self.W, (1, 0, 2)), (embedding_size, -1))  # E * (num_pairs * E)
+            p, start = [], 0
+            for i in range(len(inputs) - 1):
+                end = start + len(inputs) - 1 - i
+                vidots = tf.matmul(tf.squeeze(inputs[i], axis=1), W[:, start * embedding_size:end * embedding_size])
+                p.append(tf.reshape(vidots, (-1, end - start, embedding_size)))
+                start = end
+            p = concat_func(p, axis=1)
         else:
             raise NotImplementedError
-        output = concat_func(p, axis=1)
-        return output
+        return tf.multiply(p, tf.gather(embeds, self.pair_cols, axis=1))
 
     def compute_output_shape(self, input_shape):
         filed_size = len(input_shape)
@@ -1216,7 +1309,9 @@ class FieldWiseBiInteraction(Layer):
      pairwise element-wise product of features into one single vector.
 
       Input shape
-        - A list of 3D tensor with shape:``(batch_size,field_size,embedding_size)``.
+        - A list of 3D tensor with shape:``(batch_size,field_size,embedding_size)``, one per field group, or the dict
+          ``{group_name: list of 3D tensor with shape (batch_size,1,embedding_size)}`` returned by
+          ``input_from_feature_columns(support_group=True)``.
 
       Output shape
         - 2D tensor with shape: ``(batch_size,embedding_size)``.
@@ -1238,13 +1333,23 @@ class FieldWiseBiInteraction(Layer):
 
     def build(self, input_shape):
 
-        if not isinstance(input_shape, list) or len(input_shape) < 2:
+        if isinstance(input_shape, dict):
+            group_sizes = [sum(int(shape[1]) for shape in shapes) for shapes in input_shape.values()]
+        elif isinstance(input_shape, list):
+            group_sizes = [int(shape[1]) for shape in input_shape]
+        else:
+            group_sizes = []
+        if len(group_sizes) < 2:
             raise ValueError(
                 'A `Field-Wise Bi-Interaction` layer should be called '
                 'on a list of at least 2 inputs')
 
-        self.num_fields = len(input_shape)
-        embedding_size = input_shape[0][-1]
+        self.num_fields = len(group_sizes)
+        # group of every feature of the stacked input
+        self.segment_ids = list(itertools.chain.from_iterable([i] * size for i, size in enumerate(group_sizes)))
+        embedding_size = int(self._flatten_groups(input_shape)[0][-1])
+        pairs = list(itertools.combinations(range(self.num_fields), 2))
+        self.pair_indices = [[i, j] for i, j in pairs]
 
         self.kernel_mf = self.add_weight(
             name='kernel_mf',
@@ -1270,66 +1375,41 @@ class FieldWiseBiInteraction(Layer):
         super(FieldWiseBiInteraction,
               self).build(input_shape)  # Be sure to call this somewhere!
 
-    def call(self, inputs, **kwargs):
+    @staticmethod
+    def _flatten_groups(inputs):
+        if isinstance(inputs, dict):
+            return list(itertools.chain.from_iterable(inputs.values()))
+        return list(inputs)
 
-        if K.ndim(inputs[0]) != 3:
+    def call(self, inputs, **kwargs):
+        embeds_list = self._flatten_groups(inputs)
+        if K.ndim(embeds_list[0]) != 3:
             raise ValueError(
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions" %
-                (K.ndim(inputs)))
+                (K.ndim(embeds_list[0])))
 
-        field_wise_embeds_list = inputs
+        # feature major layout, the segment ids sum the features of every group
+        embeds = tf.transpose(concat_func(embeds_list, axis=1), (1, 0, 2))  # feature_num * batch * embedding_size
+        field_wise_vectors = tf.math.segment_sum(embeds, self.segment_ids)  # num_fields * batch * embedding_size
 
         # MF module
-        field_wise_vectors = tf.concat([
-            reduce_sum(field_i_vectors, axis=1, keep_dims=True)
-            for field_i_vectors in field_wise_embeds_list
-        ], 1)
-
-        left = []
-        right = []
-
-        for i, j in itertools.combinations(list(range(self.num_fields)), 2):
-            left.append(i)
-            right.append(j)
-
-        embeddings_left = tf.gather(params=field_wise_vectors,
-                                    indices=left,
-                                    axis=1)
-        embeddings_right = tf.gather(params=field_wise_vectors,
-                                     indices=right,
-                                     axis=1)
-
-        embeddings_prod = embeddings_left * embeddings_right
-        field_weighted_embedding = embeddings_prod * self.kernel_mf
-        h_mf = reduce_sum(field_weighted_embedding, axis=1)
+        # sum_{i<j} w_ij * v_i * v_j = sum_i v_i * sum_j W_ij * v_j with W the upper triangular matrix of kernel_mf
+        kernel_mf = tf.scatter_nd(self.pair_indices, self.kernel_mf[:, 0], (self.num_fields, self.num_fields))
+        h_mf = reduce_sum(field_wise_vectors * tf.tensordot(kernel_mf, field_wise_vectors, axes=(1, 0)), axis=0)
         if self.use_bias:
             h_mf = tf.nn.bias_add(h_mf, self.bias_mf)
 
         # FM module
-        square_of_sum_list = [
-            tf.square(reduce_sum(field_i_vectors, axis=1, keep_dims=True))
-            for field_i_vectors in field_wise_embeds_list
-        ]
-        sum_of_square_list = [
-            reduce_sum(field_i_vectors * field_i_vectors,
-                       axis=1,
-                       keep_dims=True)
-            for field_i_vectors in field_wise_embeds_list
-        ]
-
-        field_fm = tf.concat([
-            square_of_sum - sum_of_square for square_of_sum, sum_of_square in
-            zip(square_of_sum_list, sum_of_square_list)
-        ], 1)
-
-        h_fm = reduce_sum(field_fm * self.kernel_fm, axis=1)
+        field_fm = tf.square(field_wise_vectors) - tf.math.segment_sum(tf.square(embeds), self.segment_ids)
+
+        h_fm = tf.tensordot(self.kernel_fm[:, 0], field_fm, axes=(0, 0))
         if self.use_bias:
             h_fm = tf.nn.bias_add(h_fm, self.bias_fm)
 
         return h_mf + h_fm
 
     def compute_output_shape(self, input_shape):
-        return (None, input_shape[0][-1])
+        return (None, self._flatten_groups(input_shape)[0][-1])
 
     def get_config(self, ):
         config = {'use_bias': self.use_bias, 'seed': self.seed}
@@ -1375,6 +1455,8 @@ class FwFMLayer(Layer):
                                                initializer=TruncatedNormal(),
                                                regularizer=l2(self.regularizer),
                                                trainable=True)
+        ones = tf.ones((self.num_fields, self.num_fields))
+        self.pair_mask = tf.linalg.band_part(ones, 0, -1) - tf.linalg.band_part(ones, 0, 0)
 
         super(FwFMLayer, self).build(input_shape)  # Be sure to call this somewhere!
 
@@ -1388,20 +1470,10 @@ class FwFMLayer(Layer):
             raise ValueError("Mismatch in number of fields {} and \
                  concatenated embeddings dims {}".format(self.num_fields, inputs.shape[1]))
 
-        pairwise_inner_prods = []
-        for fi, fj in itertools.combinations(range(self.num_fields), 2):
-            # get field strength for pair fi and fj
-            r_ij = self.field_strengths[fi, fj]
-
-            # get embeddings for the features of both the fields
-            feat_embed_i = tf.squeeze(inputs[0:, fi:fi + 1, 0:], axis=1)
-            feat_embed_j = tf.squeeze(inputs[0:, fj:fj + 1, 0:], axis=1)
-
-            f = tf.scalar_mul(r_ij, batch_dot(feat_embed_i, feat_embed_j, axes=1))
-            pairwise_inner_prods.append(f)
-
-        sum_ = tf.add_n(pairwise_inner_prods)
-        return sum_
+        # inner products of all field pairs at once, only the pairs fi < fj are weighted
+        gram = tf.einsum('bfe,bge->bfg', inputs, inputs)
+        pair_strengths = self.field_strengths * self.pair_mask
+        return tf.expand_dims(reduce_sum(gram * pair_strengths, axis=[1, 2]), axis=1)
 
     def compute_output_shape(self, input_shape):
         return (None, 1)
@@ -1428,6 +1500,9 @@ class FEFMLayer(Layer):
       Arguments
         - **regularizer** : L2 regularizer weight for the field pair matrix embeddings parameters of FEFM
 
+      The field pair matrices are stored in one ``(num_pairs, embedding_size, embedding_size)`` weight. Weights
+      saved with the former one-matrix-per-pair layout can be converted with ``deepctr.utils.convert_fefm_weights``.
+
       References
         - [Field-Embedded Factorization Machines for Click-through Rate Prediction]
          https://arxiv.org/pdf/2009.09931.pdf
@@ -1445,14 +1520,15 @@ class FEFMLayer(Layer):
         self.num_fields = int(input_shape[1])
         embedding_size = int(input_shape[2])
 
-        self.field_embeddings = {}
-        for fi, fj in itertools.combinations(range(self.num_fields), 2):
-            field_pair_id = str(fi) + "-" + str(fj)
-            self.field_embeddings[field_pair_id] = self.add_weight(name='field_embeddings' + field_pair_id,
-                                                                   shape=(embedding_size, embedding_size),
-                                                                   initializer=TruncatedNormal(),
-                                                                   regularizer=l2(self.regularizer),
-                                                                   trainable=True)
+        # field pair p = (pair_rows[p], pair_cols[p]), in the order of itertools.combinations
+        pairs = list(itertools.combinations(range(self.num_fields), 2))
+        self.pair_rows = [fi for fi, _ in pairs]
+        self.pair_cols = [fj for _, fj in pairs]
+        self.field_embeddings = self.add_weight(name='field_embeddings',
+                                                shape=(len(pairs), embedding_size, embedding_size),
+                                                initializer=TruncatedNormal(),
+                                                regularizer=l2(self.regularizer),
+                                                trainable=True)
 
         super(FEFMLayer, self).build(input_shape)  # Be sure to call this somewhere!
 
@@ -1462,20 +1538,14 @@ class FEFMLayer(Layer):
                 "Unexpected inputs dimensions %d, expect to be 3 dimensions"
                 % (K.ndim(inputs)))
 
-        pairwise_inner_prods = []
-        for fi, fj in itertools.combinations(range(self.num_fields), 2):
-            field_pair_id = str(fi) + "-" + str(fj)
-            feat_embed_i = tf.squeeze(inputs[0:, fi:fi + 1, 0:], axis=1)
-            feat_embed_j = tf.squeeze(inputs[0:, fj:fj + 1, 0:], axis=1)
-            field_pair_embed_ij = self.field_embeddings[field_pair_id]
-
-            feat_embed_i_tr = tf.matmul(feat_embed_i, field_pair_embed_ij + tf.transpose(field_pair_embed_ij))
-
-            f = batch_dot(feat_embed_i_tr, feat_embed_j, axes=1)
-            pairwise_inner_prods.append(f)
+        # pair major layout, so that all pairs run as one batched matmul
+        field_major = tf.transpose(inputs, (1, 0, 2))
+        feat_embed_i = tf.gather(field_major, self.pair_rows)  # num_pairs * batch_size * embedding_size
+        feat_embed_j = tf.gather(field_major, self.pair_cols)
+        field_pair_embed = self.field_embeddings + tf.transpose(self.field_embeddings, (0, 2, 1))
 
-        concat_vec = tf.concat(pairwise_inner_prods, axis=1)
-        return concat_vec
+        feat_embed_i_tr = tf.matmul(feat_embed_i, field_pair_embed)
+        return tf.transpose(reduce_sum(feat_embed_i_tr * feat_embed_j, axis=-1))
 
     def compute_output_shape(self, input_shape):
         num_fields = int(input_shape[1])
@@ -1489,6 +1559,116 @@ class FEFMLayer(Layer):
         return config
 
 
+class FieldAwareEmbedding(Layer):
+    """Operation-aware embedding used in ONN, every feature has one embedding copy per feature, and the pairwise
+    products of the copies ``e_i^{(j)} * e_j^{(i)}`` are the interactions of ONN.
+
+    All copies of a feature are stored in one ``(vocabulary_size, num_features, embedding_dim)`` table, so a feature
+    needs a single lookup and all pairs are taken from the stacked copies with two gathers.
+
+      Input shape
+        - A list of ``num_features`` 2D integer tensors with shape: ``(batch_size, 1)`` or
+          ``(batch_size, maxlen)`` for multi-valued features, where ``0`` is padding.
+
+      Output shape
+        - 3D tensor with shape: ``(batch_size, num_features*(num_features-1)/2, embedding_dim)``, or
+          ``(batch_size, num_features*(num_features-1)/2, 1)`` if ``reduce_sum=True``.
+
+      Arguments
+        - **feature_names**: list of str, used to name the tables.
+
+        - **vocabulary_sizes**: list of int, vocabulary size of every feature.
+
+        - **embedding_dim**: int, dimension of the embeddings.
+
+        - **combiners**: list of str or None. Pooling of the copies of a multi-valued feature, ``"sum"``, ``"mean"``
+          or ``"max"``, ``None`` for single-valued features.
+
+        - **embeddings_initializers**: list of initializers or None, initializer of every table.
+
+        - **l2_reg**: float. L2 regularizer strength applied to the tables.
+
+        - **reduce_sum**: bool. Whether return the inner products of the pairs instead of the element-wise products.
+
+      References
+        - [Yang Y, Xu B, Shen F, et al. Operation-aware Neural Networks for User Response Prediction[J]. arXiv preprint arXiv:1904.12579, 2019.](https://arxiv.org/pdf/1904.12579)
+    """
+
+    def __init__(self, feature_names, vocabulary_sizes, embedding_dim, combiners=None, embeddings_initializers=None,
+                 l2_reg=0, reduce_sum=False, **kwargs):
+        if len(feature_names) < 2 or len(feature_names) != len(vocabulary_sizes):
+            raise ValueError("feature_names and vocabulary_sizes must have the same length of at least 2")
+        self.feature_names = list(feature_names)
+        self.vocabulary_sizes = list(vocabulary_sizes)
+        self.embedding_dim = embedding_dim
+        self.combiners = list(combiners) if combiners is not None else [None] * len(feature_names)
+        if embeddings_initializers is None:
+            embeddings_initializers = ['uniform'] * len(feature_names)
+        self.embeddings_initializers = [initializers.get(init) for init in embeddings_initializers]
+        self.l2_reg = l2_reg
+        self.reduce_sum = reduce_sum
+        super(FieldAwareEmbedding, self).__init__(**kwargs)
+
+    def build(self, input_shape):
+        num_features = len(self.feature_names)
+        if not isinstance(input_shape, list) or len(input_shape) != num_features:
+            raise ValueError('A `FieldAwareEmbedding` layer should be called '
+                             'on a list of %d inputs' % num_features)
+
+        self.tables = [self.add_weight(name='field_aware_emb_' + name,
+                                       shape=(vocabulary_size, num_features, self.embedding_dim),
+                                       initializer=initializer,
+                                       regularizer=l2(self.l2_reg))
+                       for name, vocabulary_size, initializer in
+                       zip(self.feature_names, self.vocabulary_sizes, self.embeddings_initializers)]
+        self.pooling_layers = [SequencePoolingLayer(combiner, supports_masking=True) if combiner is not None else None
+                               for combiner in self.combiners]
+
+        # copy j of feature i is row i * num_features + j of the stacked copies
+        pairs = list(itertools.combinations(range(num_features), 2))
+        self.pair_rows = [i * num_features + j for i, j in pairs]
+        self.pair_cols = [j * num_features + i for i, j in pairs]
+        super(FieldAwareEmbedding, self).build(input_shape)  # Be sure to call this somewhere!
+
+    def call(self, inputs, **kwargs):
+        num_features = len(self.feature_names)
+        copies = []
+        for ids, table, pooling in zip(inputs, self.tables, self.pooling_layers):
+            ids = tf.cast(ids, tf.int32)
+            embeds = tf.gather(table, ids)  # batch * maxlen * num_features * embedding_dim
+            if pooling is None:
+                embeds = embeds[:, 0]
+            else:
+                embeds = pooling(tf.reshape(embeds, (-1, tf.shape(ids)[1], num_features * self.embedding_dim)),
+                                 mask=tf.not_equal(ids, 0))
+                embeds = tf.reshape(embeds, (-1, num_features, self.embedding_dim))
+            copies.append(embeds)
+
+        # (num_features * num_features) * batch * embedding_dim
+        copies = tf.reshape(tf.transpose(tf.stack(copies), (0, 2, 1, 3)), (num_features * num_features, -1,
+                                                                           self.embedding_dim))
+        element_wise_prod = tf.gather(copies, self.pair_rows) * tf.gather(copies, self.pair_cols)
+        if self.reduce_sum:
+            element_wise_prod = reduce_sum(element_wise_prod, axis=-1, keep_dims=True)
+        return tf.transpose(element_wise_prod, (1, 0, 2))
+
+    def compute_output_shape(self, input_shape):
+        num_features = len(self.feature_names)
+        return (None, num_features * (num_features - 1) // 2, 1 if self.reduce_sum else self.embedding_dim)
+
+    def compute_mask(self, inputs, mask=None):
+        return None
+
+    def get_config(self, ):
+        config = {'feature_names': self.feature_names, 'vocabulary_sizes': self.vocabulary_sizes,
+                  'embedding_dim': self.embedding_dim, 'combiners': self.combiners,
+                  'embeddings_initializers': [initializers.serialize(init) for init in self.embeddings_initializers],
+                  'l2_reg': self.l2_reg, 'reduce_sum': self.reduce_sum}
+        base_config = super(FieldAwareEmbedding, self).get_config()
+        base_config.update(config)
+        return base_config
+
+
 class BridgeModule(Layer):
     """Bridge Module used in EDCN
 
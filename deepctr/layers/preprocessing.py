@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+"""
+
+Author:
+    Weichen Shen,weichenswc@163.com
+
+"""
+
+import tensorflow as tf
+from keras.layers import Layer
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+
+class DenseTransform(Layer):
+    """In-graph preprocessing of a dense feature, applied in the order log -> clip -> normalize -> bucketize.
+    All statistics are stored as constants in the layer config, so the model serves raw values and can be
+    saved and loaded without the Python function of ``DenseFeat.transform_fn``.
+    Pass an instance as ``DenseFeat(transform_fn=...)``, or build one from data with
+    ``deepctr.data.DenseStatistics``.
+
+      Input shape
+        - 2D tensor with shape: ``(batch_size, dimension)``.
+
+      Output shape
+        - 2D tensor with shape: ``(batch_size, dimension)``, or ``(batch_size, dimension * (len(boundaries) + 1))``
+          if ``bucket_output="one_hot"``.
+
+      Arguments
+        - **log1p**: bool. Whether to apply ``log(1 + max(x, 0))``.
+
+        - **clip_min**: float or None. Lower bound of the values.
+
+        - **clip_max**: float or None. Upper bound of the values.
+
+        - **offset**: float or None. Normalize to ``(x - offset) / scale``, e.g. mean for standardization or min for
+          min-max scaling.
+
+        - **scale**: float or None, std for standardization or ``max - min`` for min-max scaling.
+
+        - **boundaries**: sorted list of float or None. Bucketize the values, bucket ``i`` holds the values in
+          ``[boundaries[i-1], boundaries[i])``.
+
+        - **bucket_output**: str, ``"index"`` returns the bucket index as float, ``"one_hot"`` returns the one-hot
+          encoding of the bucket.
+    """
+
+    def __init__(self, log1p=False, clip_min=None, clip_max=None, offset=None, scale=None, boundaries=None,
+                 bucket_output='index', **kwargs):
+        if bucket_output not in ('index', 'one_hot'):
+            raise ValueError("bucket_output must be index or one_hot")
+        if boundaries is not None and list(boundaries) != sorted(boundaries):
+            raise ValueError("boundaries must be sorted")
+        if scale is not None and scale == 0:
+            raise ValueError("scale can not be zero")
+        self.log1p = log1p
+        self.clip_min = _to_float(clip_min)
+        self.clip_max = _to_float(clip_max)
+        self.offset = _to_float(offset)
+        self.scale = _to_float(scale)
+        self.boundaries = [float(b) for b in boundaries] if boundaries is not None else None
+        self.bucket_output = bucket_output
+        super(DenseTransform, self).__init__(**kwargs)
+
+    def build(self, input_shape):
+        if self.boundaries is not None:
+            self.boundaries_const = tf.constant([self.boundaries], dtype=tf.float32)  # 1 * num_boundaries
+        super(DenseTransform, self).build(input_shape)  # Be sure to call this somewhere!
+
+    def call(self, inputs, **kwargs):
+        x = tf.cast(inputs, tf.float32)
+        if self.log1p:
+            x = tf.math.log1p(tf.maximum(x, 0.0))
+        if self.clip_min is not None or self.clip_max is not None:
+            x = tf.clip_by_value(x, self.clip_min if self.clip_min is not None else x.dtype.min,
+                                 self.clip_max if self.clip_max is not None else x.dtype.max)
+        if self.offset is not None:
+            x = x - self.offset
+        if self.scale is not None:
+            x = x / self.scale
+        if self.boundaries is None:
+            return x
+
+        # one vectorized binary search over all values of the batch
+        bucket = tf.searchsorted(self.boundaries_const, tf.reshape(x, (1, -1)), side='right')
+        bucket = tf.reshape(bucket, tf.shape(x))
+        if self.bucket_output == 'index':
+            return tf.cast(bucket, tf.float32)
+        one_hot = tf.one_hot(bucket, len(self.boundaries) + 1, dtype=tf.float32)
+        return tf.reshape(one_hot, (-1, int(inputs.shape[-1]) * (len(self.boundaries) + 1)))
+
+    def compute_output_shape(self, input_shape):
+        if self.boundaries is not None and self.bucket_output == 'one_hot':
+            return (None, int(input_shape[-1]) * (len(self.boundaries) + 1))
+        return input_shape
+
+    def get_config(self, ):
+        config = {'log1p': self.log1p, 'clip_min': self.clip_min, 'clip_max': self.clip_max, 'offset': self.offset,
+                  'scale': self.scale, 'boundaries': self.boundaries, 'bucket_output': self.bucket_output}
+        base_config = super(DenseTransform, self).get_config()
+        return dict(list(base_config.items()) + list(config.items()))
@@ -23,7 +23,8 @@ if tf.__version__ >= '2.0.0':
 else:
     from ..contrib.rnn import dynamic_rnn
 from ..contrib.utils import QAAttGRUCell, VecAttGRUCell
-from .utils import reduce_sum, reduce_max, div, softmax, reduce_mean
+from .utils import reduce_sum, div, softmax, reduce_mean, length_mask, masked_fill, masked_reduce_max, \
+    masked_reduce_sum
 
 
 class SequencePoolingLayer(Layer):
@@ -56,8 +57,6 @@ class SequencePoolingLayer(Layer):
         self.supports_masking = supports_masking
 
     def build(self, input_shape):
-        if not self.supports_masking:
-            self.seq_len_max = int(input_shape[0][1])
         super(SequencePoolingLayer, self).build(
             input_shape)  # Be sure to call this somewhere!
 
@@ -67,30 +66,22 @@ class SequencePoolingLayer(Layer):
                 raise ValueError(
                     "When supports_masking=True,input must support masking")
             uiseq_embed_list = seq_value_len_list
-            mask = tf.cast(mask, tf.float32)  # tf.to_float(mask)
-            user_behavior_length = reduce_sum(mask, axis=-1, keep_dims=True)
-            mask = tf.expand_dims(mask, axis=2)
+            mask = tf.expand_dims(tf.cast(mask, tf.float32), axis=2)  # None T 1
+            user_behavior_length = reduce_sum(mask, axis=1)
         else:
             uiseq_embed_list, user_behavior_length = seq_value_len_list
 
-            mask = tf.sequence_mask(user_behavior_length,
-                                    self.seq_len_max, dtype=tf.float32)
-            mask = tf.transpose(mask, (0, 2, 1))
-
-        embedding_size = uiseq_embed_list.shape[-1]
-
-        mask = tf.tile(mask, [1, 1, embedding_size])
+            mask = length_mask(user_behavior_length, tf.shape(uiseq_embed_list)[1])  # None T 1
 
+        # the mask is broadcast over the embedding instead of tiled
         if self.mode == "max":
-            hist = uiseq_embed_list - (1 - mask) * 1e9
-            return reduce_max(hist, 1, keep_dims=True)
+            return masked_reduce_max(uiseq_embed_list, mask)
 
-        hist = reduce_sum(uiseq_embed_list * mask, 1, keep_dims=False)
+        hist = masked_reduce_sum(uiseq_embed_list, mask)  # None 1 E
 
         if self.mode == "mean":
-            hist = div(hist, tf.cast(user_behavior_length, tf.float32) + self.eps)
+            hist = div(hist, tf.expand_dims(tf.cast(user_behavior_length, tf.float32), axis=-1) + self.eps)
 
-        hist = tf.expand_dims(hist, axis=1)
         return hist
 
     def compute_output_shape(self, input_shape):
@@ -135,8 +126,6 @@ class WeightedSequenceLayer(Layer):
         self.supports_masking = supports_masking
 
     def build(self, input_shape):
-        if not self.supports_masking:
-            self.seq_len_max = int(input_shape[0][1])
         super(WeightedSequenceLayer, self).build(
             input_shape)  # Be sure to call this somewhere!
 
@@ -149,25 +138,17 @@ class WeightedSequenceLayer(Layer):
             mask = tf.expand_dims(mask[0], axis=2)
         else:
             key_input, key_length_input, value_input = input_list
-            mask = tf.sequence_mask(key_length_input,
-                                    self.seq_len_max, dtype=tf.bool)
-            mask = tf.transpose(mask, (0, 2, 1))
+            mask = length_mask(key_length_input, tf.shape(key_input)[1])  # None T 1
 
-        embedding_size = key_input.shape[-1]
+        if len(value_input.shape) == 2:
+            value_input = tf.expand_dims(value_input, axis=2)
 
         if self.weight_normalization:
-            paddings = tf.ones_like(value_input) * (-2 ** 32 + 1)
+            value_input = softmax(masked_fill(value_input, mask, -2 ** 32 + 1), dim=1)
         else:
-            paddings = tf.zeros_like(value_input)
-        value_input = tf.where(mask, value_input, paddings)
-
-        if self.weight_normalization:
-            value_input = softmax(value_input, dim=1)
-
-        if len(value_input.shape) == 2:
-            value_input = tf.expand_dims(value_input, axis=2)
-            value_input = tf.tile(value_input, [1, 1, embedding_size])
+            value_input = masked_fill(value_input, mask, 0)
 
+        # the weights are broadcast over the embedding
         return tf.multiply(key_input, value_input)
 
     def compute_output_shape(self, input_shape):
@@ -258,22 +239,16 @@ class AttentionSequencePoolingLayer(Layer):
         else:
 
             queries, keys, keys_length = inputs
-            hist_len = keys.get_shape()[1]
-            key_masks = tf.sequence_mask(keys_length, hist_len)
+            key_masks = tf.sequence_mask(keys_length, tf.shape(keys)[1])
 
         attention_score = self.local_att([queries, keys], training=training)
 
         outputs = tf.transpose(attention_score, (0, 2, 1))
 
         if self.weight_normalization:
-            paddings = tf.ones_like(outputs) * (-2 ** 32 + 1)
+            outputs = softmax(masked_fill(outputs, key_masks, -2 ** 32 + 1))
         else:
-            paddings = tf.zeros_like(outputs)
-
-        outputs = tf.where(key_masks, outputs, paddings)
-
-        if self.weight_normalization:
-            outputs = softmax(outputs)
+            outputs = masked_fill(outputs, key_masks, 0)
 
         if not self.return_score:
             outputs = tf.matmul(outputs, keys)
@@ -439,16 +414,19 @@ class Transformer(Layer):
             - **blinding**: bool. Whether or not use blinding.
             - **seed**: A Python integer to use as random seed.
             - **supports_masking**:bool. Whether or not support masking.
-            - **attention_type**: str, Type of attention, the value must be one of { ``'scaled_dot_product'`` , ``'cos'`` , ``'ln'`` , ``'additive'`` }.
+            - **attention_type**: str, Type of attention, the value must be one of { ``'scaled_dot_product'`` , ``'cos'`` , ``'ln'`` , ``'additive'`` , ``'linear'`` }. ``'linear'`` replaces the softmax by the kernel ``elu(x) + 1`` so the attention costs ``O(T)`` instead of ``O(T^2)`` in time and memory, it does not drop attention weights and with ``blinding=True`` the queries and the keys must have the same length.
             - **output_type**: ``'mean'`` , ``'sum'`` or `None`. Whether or not use average/sum pooling for output.
+            - **max_len**: int or None. Size of the positional encoding table, required when ``use_positional_encoding=True`` and the time dimension of the inputs is unknown, e.g. with ``VarLenSparseFeat(dynamic_length=True)``.
+            - **fused_qkv**: bool. Whether compute query, key and value with one projection stored in a single weight, the keys and values always share one matmul and the queries join it when they are the keys.
 
       References
             - [Vaswani, Ashish, et al. "Attention is all you need." Advances in Neural Information Processing Systems. 2017.](https://papers.nips.cc/paper/7181-attention-is-all-you-need.pdf)
+            - [Katharopoulos A, Vyas A, Pappas N, et al. Transformers are RNNs: Fast Autoregressive Transformers with Linear Attention[C]//International Conference on Machine Learning. PMLR, 2020.](https://arxiv.org/abs/2006.16236)
     """
 
     def __init__(self, att_embedding_size=1, head_num=8, dropout_rate=0.0, use_positional_encoding=True, use_res=True,
                  use_feed_forward=True, use_layer_norm=False, blinding=True, seed=1024, supports_masking=False,
-                 attention_type="scaled_dot_product", output_type="mean", **kwargs):
+                 attention_type="scaled_dot_product", output_type="mean", max_len=None, fused_qkv=False, **kwargs):
         if head_num <= 0:
             raise ValueError('head_num must be a int > 0')
         self.att_embedding_size = att_embedding_size
@@ -463,6 +441,8 @@ class Transformer(Layer):
         self.blinding = blinding
         self.attention_type = attention_type
         self.output_type = output_type
+        self.max_len = max_len
+        self.fused_qkv = fused_qkv
         super(Transformer, self).__init__(**kwargs)
         self.supports_masking = supports_masking
 
@@ -472,16 +452,22 @@ class Transformer(Layer):
             raise ValueError(
                 "att_embedding_size * head_num must equal the last dimension size of inputs,got %d * %d != %d" % (
                     self.att_embedding_size, self.head_num, embedding_size))
-        self.seq_len_max = int(input_shape[0][-2])
-        self.W_Query = self.add_weight(name='query', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                       dtype=tf.float32,
-                                       initializer=TruncatedNormal(seed=self.seed))
-        self.W_key = self.add_weight(name='key', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                     dtype=tf.float32,
-                                     initializer=TruncatedNormal(seed=self.seed + 1))
-        self.W_Value = self.add_weight(name='value', shape=[embedding_size, self.att_embedding_size * self.head_num],
-                                       dtype=tf.float32,
-                                       initializer=TruncatedNormal(seed=self.seed + 2))
+        if self.fused_qkv:
+            self.W_QKV = self.add_weight(name='qkv', shape=[embedding_size, 3 * self.num_units],
+                                         dtype=tf.float32,
+                                         initializer=TruncatedNormal(seed=self.seed))
+        else:
+            self.W_Query = self.add_weight(name='query',
+                                           shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                           dtype=tf.float32,
+                                           initializer=TruncatedNormal(seed=self.seed))
+            self.W_key = self.add_weight(name='key', shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                         dtype=tf.float32,
+                                         initializer=TruncatedNormal(seed=self.seed + 1))
+            self.W_Value = self.add_weight(name='value',
+                                           shape=[embedding_size, self.att_embedding_size * self.head_num],
+                                           dtype=tf.float32,
+                                           initializer=TruncatedNormal(seed=self.seed + 2))
         if self.attention_type == "additive":
             self.b = self.add_weight('b', shape=[self.att_embedding_size], dtype=tf.float32,
                                      initializer=glorot_uniform(seed=self.seed))
@@ -503,102 +489,120 @@ class Transformer(Layer):
             self.dropout_rate, seed=self.seed)
         self.ln = LayerNormalization()
         if self.use_positional_encoding:
-            self.query_pe = PositionEncoding()
-            self.key_pe = PositionEncoding()
+            self.query_pe = PositionEncoding(max_len=self.max_len)
+            self.key_pe = PositionEncoding(max_len=self.max_len)
         # Be sure to call this somewhere!
         super(Transformer, self).build(input_shape)
 
+    def _split_heads(self, x, length):
+        # N T D*h -> N h T D
+        x = tf.reshape(x, [-1, length, self.head_num, self.att_embedding_size])
+        return tf.transpose(x, [0, 2, 1, 3])
+
+    def _linear_attention(self, Q_, K_, V_, key_masks):
+        # phi(Q) (phi(K)^T V) / phi(Q) sum(phi(K)), the padded keys have phi(k) = 0
+        Q_ = tf.nn.elu(Q_) + 1.0  # N h T_q D
+        K_ = (tf.nn.elu(K_) + 1.0) * tf.cast(key_masks[:, None, :, None], tf.float32)  # N h T_k D
+        kv = tf.matmul(K_, V_, transpose_a=True)  # N h D D
+        numerator = tf.matmul(Q_, kv)  # N h T_q D
+        denominator = tf.matmul(Q_, reduce_sum(K_, axis=2, keep_dims=True), transpose_b=True)  # N h T_q 1
+        if self.blinding:
+            # remove the term of the key at the position of the query
+            diag = reduce_sum(Q_ * K_, axis=-1, keep_dims=True)  # N h T 1
+            numerator -= diag * V_
+            # a query whose only valid key is itself attends to nothing, N 1 T 1
+            key_masks = tf.cast(key_masks, tf.float32)
+            num_keys = reduce_sum(key_masks, axis=-1, keep_dims=True) - key_masks
+            has_keys = tf.cast(num_keys[:, None, :, None] > 0, tf.float32)
+            # the clamp only removes the rounding error of the subtraction
+            denominator = tf.maximum(denominator - diag, 0.0) * has_keys
+        # the queries without keys get 0
+        return tf.math.divide_no_nan(numerator, denominator)
+
     def call(self, inputs, mask=None, training=None, **kwargs):
 
         if self.supports_masking:
             queries, keys = inputs
             query_masks, key_masks = mask
-            query_masks = tf.cast(query_masks, tf.float32)
-            key_masks = tf.cast(key_masks, tf.float32)
         else:
             queries, keys, query_masks, key_masks = inputs
 
-            query_masks = tf.sequence_mask(
-                query_masks, self.seq_len_max, dtype=tf.float32)
-            key_masks = tf.sequence_mask(
-                key_masks, self.seq_len_max, dtype=tf.float32)
-            query_masks = tf.squeeze(query_masks, axis=1)
-            key_masks = tf.squeeze(key_masks, axis=1)
+            query_masks = tf.sequence_mask(query_masks[:, 0], tf.shape(queries)[1])
+            key_masks = tf.sequence_mask(key_masks[:, 0], tf.shape(keys)[1])
+        query_len = queries.shape[1] if queries.shape[1] is not None else tf.shape(queries)[1]
+        key_len = keys.shape[1] if keys.shape[1] is not None else tf.shape(keys)[1]
+        self_attention = queries is keys
+        if self.attention_type == "linear" and self.blinding and isinstance(query_len, int) and isinstance(
+                key_len, int) and query_len != key_len:
+            raise ValueError("linear attention with blinding=True requires queries and keys of the same length,"
+                             "got %d != %d" % (query_len, key_len))
 
         if self.use_positional_encoding:
             queries = self.query_pe(queries)
             keys = self.key_pe(keys)
 
-        Q = tf.tensordot(queries, self.W_Query,
-                         axes=(-1, 0))  # N T_q D*h
-        K = tf.tensordot(keys, self.W_key, axes=(-1, 0))
-        V = tf.tensordot(keys, self.W_Value, axes=(-1, 0))
-
-        # h*N T_q D
-        Q_ = tf.concat(tf.split(Q, self.head_num, axis=2), axis=0)
-        K_ = tf.concat(tf.split(K, self.head_num, axis=2), axis=0)
-        V_ = tf.concat(tf.split(V, self.head_num, axis=2), axis=0)
-
-        if self.attention_type == "scaled_dot_product":
-            # h*N T_q T_k
+        if self.fused_qkv:
+            if self_attention and not self.use_positional_encoding:
+                qkv = tf.tensordot(queries, self.W_QKV, axes=(-1, 0))  # N T 3*D*h
+                qkv = tf.reshape(qkv, [-1, query_len, 3, self.head_num, self.att_embedding_size])
+                Q_, K_, V_ = tf.unstack(tf.transpose(qkv, [2, 0, 3, 1, 4]))  # N h T D
+            else:
+                Q_ = self._split_heads(tf.tensordot(queries, self.W_QKV[:, :self.num_units], axes=(-1, 0)),
+                                       query_len)
+                kv = tf.tensordot(keys, self.W_QKV[:, self.num_units:], axes=(-1, 0))  # N T_k 2*D*h
+                kv = tf.reshape(kv, [-1, key_len, 2, self.head_num, self.att_embedding_size])
+                K_, V_ = tf.unstack(tf.transpose(kv, [2, 0, 3, 1, 4]))  # N h T_k D
+        else:
+            # N h T D
+            Q_ = self._split_heads(tf.tensordot(queries, self.W_Query, axes=(-1, 0)), query_len)
+            K_ = self._split_heads(tf.tensordot(keys, self.W_key, axes=(-1, 0)), key_len)
+            V_ = self._split_heads(tf.tensordot(keys, self.W_Value, axes=(-1, 0)), key_len)
+
+        if self.attention_type == "linear":
+            # ( N, h, T_q, C/h)
+            result = self._linear_attention(Q_, K_, V_, key_masks)
+        elif self.attention_type == "scaled_dot_product":
+            # N h T_q T_k
             outputs = tf.matmul(Q_, K_, transpose_b=True)
 
-            outputs = outputs / (K_.get_shape().as_list()[-1] ** 0.5)
+            outputs = outputs / (self.att_embedding_size ** 0.5)
         elif self.attention_type == "cos":
-            Q_cos = tf.nn.l2_normalize(Q_, dim=-1)
-            K_cos = tf.nn.l2_normalize(K_, dim=-1)
+            Q_cos = tf.nn.l2_normalize(Q_, axis=-1)
+            K_cos = tf.nn.l2_normalize(K_, axis=-1)
 
-            outputs = tf.matmul(Q_cos, K_cos, transpose_b=True)  # h*N T_q T_k
+            outputs = tf.matmul(Q_cos, K_cos, transpose_b=True)  # N h T_q T_k
 
             outputs = outputs * 20  # Scale
         elif self.attention_type == 'ln':
             Q_ = self.att_ln_q(Q_)
             K_ = self.att_ln_k(K_)
 
-            outputs = tf.matmul(Q_, K_, transpose_b=True)  # h*N T_q T_k
+            outputs = tf.matmul(Q_, K_, transpose_b=True)  # N h T_q T_k
             # Scale
-            outputs = outputs / (K_.get_shape().as_list()[-1] ** 0.5)
+            outputs = outputs / (self.att_embedding_size ** 0.5)
         elif self.attention_type == "additive":
             Q_reshaped = tf.expand_dims(Q_, axis=-2)
             K_reshaped = tf.expand_dims(K_, axis=-3)
             outputs = tf.tanh(tf.nn.bias_add(Q_reshaped + K_reshaped, self.b))
             outputs = tf.squeeze(tf.tensordot(outputs, tf.expand_dims(self.v, axis=-1), axes=[-1, 0]), axis=-1)
         else:
-            raise ValueError("attention_type must be [scaled_dot_product,cos,ln,additive]")
-
-        key_masks = tf.tile(key_masks, [self.head_num, 1])
-
-        # (h*N, T_q, T_k)
-        key_masks = tf.tile(tf.expand_dims(key_masks, 1),
-                            [1, tf.shape(queries)[1], 1])
-
-        paddings = tf.ones_like(outputs) * (-2 ** 32 + 1)
-
-        # (h*N, T_q, T_k)
-
-        outputs = tf.where(tf.equal(key_masks, 1), outputs, paddings, )
-        if self.blinding:
-            try:
-                outputs = tf.matrix_set_diag(outputs, tf.ones_like(outputs)[
-                                                      :, :, 0] * (-2 ** 32 + 1))
-            except AttributeError:
-                outputs = tf.compat.v1.matrix_set_diag(outputs, tf.ones_like(outputs)[
-                                                                :, :, 0] * (-2 ** 32 + 1))
-
-        outputs -= reduce_max(outputs, axis=-1, keep_dims=True)
-        outputs = softmax(outputs)
-        query_masks = tf.tile(query_masks, [self.head_num, 1])  # (h*N, T_q)
-        # (h*N, T_q, T_k)
-        query_masks = tf.tile(tf.expand_dims(
-            query_masks, -1), [1, 1, tf.shape(keys)[1]])
-
-        outputs *= query_masks
-
-        outputs = self.dropout(outputs, training=training)
-        # Weighted sum
-        # ( h*N, T_q, C/h)
-        result = tf.matmul(outputs, V_)
-        result = tf.concat(tf.split(result, self.head_num, axis=0), axis=2)
+            raise ValueError("attention_type must be [scaled_dot_product,cos,ln,additive,linear]")
+
+        if self.attention_type != "linear":
+            # additive bias broadcast over the heads and the queries, N 1 1 T_k
+            attention_bias = (1.0 - tf.cast(key_masks[:, None, None, :], tf.float32)) * (-2 ** 32 + 1)
+            if self.blinding:
+                # T_q T_k, broadcast over the batch and the heads
+                attention_bias += tf.eye(tf.shape(queries)[1], tf.shape(keys)[1]) * (-2 ** 32 + 1)
+            outputs = softmax(outputs + attention_bias)
+
+            outputs = self.dropout(outputs, training=training)
+            # Weighted sum
+            # ( N, h, T_q, C/h)
+            result = tf.matmul(outputs, V_)
+        # the padded queries attend to nothing, N 1 T_q 1
+        result *= tf.cast(query_masks[:, None, :, None], tf.float32)
+        result = tf.reshape(tf.transpose(result, [0, 2, 1, 3]), [-1, query_len, self.num_units])
 
         if self.use_res:
             # tf.tensordot(queries, self.W_Res, axes=(-1, 0))
@@ -634,7 +638,8 @@ class Transformer(Layer):
                   'dropout_rate': self.dropout_rate, 'use_res': self.use_res,
                   'use_positional_encoding': self.use_positional_encoding, 'use_feed_forward': self.use_feed_forward,
                   'use_layer_norm': self.use_layer_norm, 'seed': self.seed, 'supports_masking': self.supports_masking,
-                  'blinding': self.blinding, 'attention_type': self.attention_type, 'output_type': self.output_type}
+                  'blinding': self.blinding, 'attention_type': self.attention_type, 'output_type': self.output_type,
+                  'max_len': self.max_len, 'fused_qkv': self.fused_qkv}
         base_config = super(Transformer, self).get_config()
         return dict(list(base_config.items()) + list(config.items()))
 
@@ -642,15 +647,20 @@ class Transformer(Layer):
 class PositionEncoding(Layer):
     def __init__(self, pos_embedding_trainable=True,
                  zero_pad=False,
-                 scale=True, **kwargs):
+                 scale=True, max_len=None, **kwargs):
         self.pos_embedding_trainable = pos_embedding_trainable
         self.zero_pad = zero_pad
         self.scale = scale
+        self.max_len = max_len
         super(PositionEncoding, self).__init__(**kwargs)
 
     def build(self, input_shape):
         # Create a trainable weight variable for this layer.
-        _, T, num_units = input_shape.as_list()  # inputs.get_shape().as_list()
+        _, T, num_units = tf.TensorShape(input_shape).as_list()  # inputs.get_shape().as_list()
+        if self.max_len is not None:
+            T = self.max_len
+        if T is None:
+            raise ValueError("max_len must be set when the time dimension of the inputs is unknown")
         # First part of the PE function: sin and cos argument
         position_enc = np.array([
             [pos / np.power(10000, 2. * (i // 2) / num_units) for i in range(num_units)]
@@ -669,8 +679,8 @@ class PositionEncoding(Layer):
         super(PositionEncoding, self).build(input_shape)
 
     def call(self, inputs, mask=None):
-        _, T, num_units = inputs.get_shape().as_list()
-        position_ind = tf.expand_dims(tf.range(T), 0)
+        num_units = inputs.get_shape().as_list()[-1]
+        position_ind = tf.expand_dims(tf.range(tf.shape(inputs)[1]), 0)
         outputs = tf.nn.embedding_lookup(self.lookup_table, position_ind)
         if self.scale:
             outputs = outputs * num_units ** 0.5
@@ -686,7 +696,7 @@ class PositionEncoding(Layer):
     def get_config(self, ):
 
         config = {'pos_embedding_trainable': self.pos_embedding_trainable, 'zero_pad': self.zero_pad,
-                  'scale': self.scale}
+                  'scale': self.scale, 'max_len': self.max_len}
         base_config = super(PositionEncoding, self).get_config()
         return dict(list(base_config.items()) + list(config.items()))
 
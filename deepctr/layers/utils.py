@@ -124,7 +124,7 @@ class Hash(Layer):
 
 class Linear(Layer):
 
-    def __init__(self, l2_reg=0.0, mode=0, use_bias=False, seed=1024, **kwargs):
+    def __init__(self, l2_reg=0.0, mode=0, use_bias=False, seed=1024, units=1, **kwargs):
 
         self.l2_reg = l2_reg
         # self.l2_reg = tf.contrib.layers.l2_regularizer(float(l2_reg_linear))
@@ -133,25 +133,26 @@ class Linear(Layer):
         self.mode = mode
         self.use_bias = use_bias
         self.seed = seed
+        self.units = units
         super(Linear, self).__init__(**kwargs)
 
     def build(self, input_shape):
         if self.use_bias:
             self.bias = self.add_weight(name='linear_bias',
-                                        shape=(1,),
+                                        shape=(self.units,),
                                         initializer=Zeros(),
                                         trainable=True)
         if self.mode == 1:
             self.kernel = self.add_weight(
                 'linear_kernel',
-                shape=[int(input_shape[-1]), 1],
+                shape=[int(input_shape[-1]), self.units],
                 initializer=glorot_normal(self.seed),
                 regularizer=l2(self.l2_reg),
                 trainable=True)
         elif self.mode == 2:
             self.kernel = self.add_weight(
                 'linear_kernel',
-                shape=[int(input_shape[1][-1]), 1],
+                shape=[int(input_shape[1][-1]), self.units],
                 initializer=glorot_normal(self.seed),
                 regularizer=l2(self.l2_reg),
                 trainable=True)
@@ -161,7 +162,7 @@ class Linear(Layer):
     def call(self, inputs, **kwargs):
         if self.mode == 0:
             sparse_input = inputs
-            linear_logit = reduce_sum(sparse_input, axis=-1, keep_dims=True)
+            linear_logit = self._sum_features(sparse_input, keep_dims=True)
         elif self.mode == 1:
             dense_input = inputs
             fc = tf.tensordot(dense_input, self.kernel, axes=(-1, 0))
@@ -169,20 +170,28 @@ class Linear(Layer):
         else:
             sparse_input, dense_input = inputs
             fc = tf.tensordot(dense_input, self.kernel, axes=(-1, 0))
-            linear_logit = reduce_sum(sparse_input, axis=-1, keep_dims=False) + fc
+            linear_logit = self._sum_features(sparse_input, keep_dims=False) + fc
         if self.use_bias:
             linear_logit += self.bias
 
         return linear_logit
 
+    def _sum_features(self, sparse_input, keep_dims):
+        # None * 1 * (feature_num * units), the weights of every feature are contiguous
+        if self.units == 1:
+            return reduce_sum(sparse_input, axis=-1, keep_dims=keep_dims)
+        sparse_input = tf.reshape(sparse_input, (-1, int(sparse_input.shape[-1]) // self.units, self.units))
+        return reduce_sum(sparse_input, axis=1, keep_dims=keep_dims)
+
     def compute_output_shape(self, input_shape):
-        return (None, 1)
+        return (None, self.units)
 
     def compute_mask(self, inputs, mask):
         return None
 
     def get_config(self, ):
-        config = {'mode': self.mode, 'l2_reg': self.l2_reg, 'use_bias': self.use_bias, 'seed': self.seed}
+        config = {'mode': self.mode, 'l2_reg': self.l2_reg, 'use_bias': self.use_bias, 'seed': self.seed,
+                  'units': self.units}
         base_config = super(Linear, self).get_config()
         return dict(list(base_config.items()) + list(config.items()))
 
@@ -311,6 +320,46 @@ def softmax(logits, dim=-1, name=None):
         return tf.nn.softmax(logits, axis=dim, name=name)
 
 
+def length_mask(lengths, maxlen):
+    """Boolean mask of the valid steps of sequences of length ``lengths``, built by broadcasting without
+    materializing a ``(batch_size, 1, maxlen)`` mask and transposing it.
+
+    :param lengths: int tensor with shape ``(batch_size, 1)``.
+    :param maxlen: int or scalar tensor, the time dimension.
+    :return: bool tensor with shape ``(batch_size, maxlen, 1)``, broadcastable against ``(batch_size, maxlen, dim)``.
+    """
+    steps = tf.range(maxlen, dtype=lengths.dtype)
+    return tf.expand_dims(steps, axis=-1) < tf.expand_dims(lengths, axis=1)
+
+
+def masked_fill(x, mask, value):
+    """``x`` where ``mask`` is True and the scalar ``value`` elsewhere, ``mask`` is broadcast instead of tiled and no
+    padding tensor of the shape of ``x`` is allocated."""
+    return tf.where(mask, x, tf.cast(value, x.dtype))
+
+
+def masked_reduce_sum(x, mask):
+    """Sum over the time axis of the valid steps of ``x``, computed as a product with the mask so no masked copy of
+    ``x`` is allocated.
+
+    :param x: tensor with shape ``(batch_size, T, dim)``.
+    :param mask: bool or float tensor with shape ``(batch_size, T, 1)``.
+    :return: tensor with shape ``(batch_size, 1, dim)``.
+    """
+    return tf.matmul(tf.cast(mask, x.dtype), x, transpose_a=True)
+
+
+def masked_reduce_max(x, mask):
+    """Max over the time axis of the valid steps of ``x``, the padded steps are pushed down by ``1e9`` with a bias
+    broadcast over ``dim``.
+
+    :param x: tensor with shape ``(batch_size, T, dim)``.
+    :param mask: bool or float tensor with shape ``(batch_size, T, 1)``.
+    :return: tensor with shape ``(batch_size, 1, dim)``.
+    """
+    return reduce_max(x + (tf.cast(mask, x.dtype) - 1) * 1e9, 1, keep_dims=True)
+
+
 class _Add(Layer):
     def __init__(self, **kwargs):
         super(_Add, self).__init__(**kwargs)
@@ -345,3 +394,57 @@ def combined_dnn_input(sparse_embedding_list, dense_value_list):
         return Flatten()(concat_func(dense_value_list))
     else:
         raise NotImplementedError("dnn_feature_columns can not be empty list")
+
+
+def top_k_gating(logits, top_k):
+    """Sparse gates of a mixture of experts: softmax over the ``top_k`` largest logits of every row, zero for the
+    other experts.
+
+    :param logits: tensor with shape ``(..., num_experts)``.
+    :param top_k: int, number of experts kept for every row.
+    :return: tensor with the shape of ``logits``.
+    """
+    num_experts = int(logits.shape[-1])
+    top_logits, top_index = tf.math.top_k(logits, k=top_k)
+    top_gates = softmax(top_logits)
+    return reduce_sum(tf.one_hot(top_index, num_experts) * tf.expand_dims(top_gates, axis=-1), axis=-2)
+
+
+def load_balancing_loss(logits, gates):
+    """Auxiliary loss pushing a gate to spread the samples evenly over the experts, the sum over the experts of the
+    fraction of the samples routed to an expert times its mean softmax probability, scaled by ``num_experts`` so that
+    it is ``1`` for a uniform routing. Only the probabilities carry gradients.
+
+    :param logits: tensor with shape ``(batch_size, ..., num_experts)``, the logits of the gates.
+    :param gates: tensor with the shape of ``logits``, the sparse gates computed from them.
+    :return: scalar tensor, averaged over the gates.
+    """
+    num_experts = int(logits.shape[-1])
+    importance = reduce_mean(softmax(logits), axis=0)
+    load = reduce_mean(tf.cast(gates > 0, tf.float32), axis=0)
+    load /= reduce_sum(load, axis=-1, keep_dims=True)
+    return num_experts * reduce_mean(reduce_sum(importance * tf.stop_gradient(load), axis=-1))
+
+
+def dispatch_experts(gates, expert_fn, num_experts):
+    """Mixes experts evaluating each of them only on the samples routed to it by sparse gates.
+
+    Expert ``e`` is evaluated on the rows where any gate gives it a non-zero weight, gathered by ``expert_fn``, and its
+    weighted outputs are combined back with one segment sum, so with ``top_k`` gating the cost follows ``top_k``
+    instead of ``num_experts``.
+
+    :param gates: tensor with shape ``(batch_size, num_gates, num_experts)``.
+    :param expert_fn: callable taking the expert id and a 1D int tensor of row indices, returning the output of the
+        expert for these rows with shape ``(len(index), units)``.
+    :param num_experts: int, number of experts.
+    :return: tensor with shape ``(batch_size, num_gates, units)``, the outputs mixed by every gate.
+    """
+    row_index, weighted_outputs = [], []
+    for e in range(num_experts):
+        expert_gates = gates[:, :, e]  # batch_size * num_gates
+        index = tf.where(tf.reduce_any(expert_gates > 0, axis=1))[:, 0]
+        outputs = expert_fn(e, index)
+        row_index.append(index)
+        weighted_outputs.append(tf.expand_dims(tf.gather(expert_gates, index), axis=2) * tf.expand_dims(outputs, 1))
+    return tf.math.unsorted_segment_sum(tf.concat(weighted_outputs, axis=0), tf.concat(row_index, axis=0),
+                                        tf.shape(gates)[0])
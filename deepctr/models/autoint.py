@@ -22,7 +22,7 @@ def AutoInt(linear_feature_columns, dnn_feature_columns, att_layer_num=3, att_em
             att_res=True,
             dnn_hidden_units=(256, 128, 64), dnn_activation='relu', l2_reg_linear=1e-5,
             l2_reg_embedding=1e-5, l2_reg_dnn=0, dnn_use_bn=False, dnn_dropout=0, seed=1024,
-            task='binary', ):
+            task='binary', att_fused_qkv=False, att_field_rank=None):
     """Instantiates the AutoInt Network architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
@@ -40,6 +40,9 @@ def AutoInt(linear_feature_columns, dnn_feature_columns, att_layer_num=3, att_em
     :param dnn_dropout: float in [0,1), the probability we will drop out a given DNN coordinate.
     :param seed: integer ,to use as random seed.
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param att_fused_qkv: bool. Whether the InteractingLayer computes query, key and value with one projection.
+    :param att_field_rank: int or None. If set, the InteractingLayer attends to this number of learned
+        projections of the fields instead of all the fields.
     :return: A Keras model instance.
     """
 
@@ -59,7 +62,8 @@ def AutoInt(linear_feature_columns, dnn_feature_columns, att_layer_num=3, att_em
 
     for _ in range(att_layer_num):
         att_input = InteractingLayer(
-            att_embedding_size, att_head_num, att_res)(att_input)
+            att_embedding_size, att_head_num, att_res, fused_qkv=att_fused_qkv,
+            field_rank=att_field_rank)(att_input)
     att_output = Flatten()(att_input)
 
     dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
@@ -22,13 +22,13 @@ from ..layers.utils import add_func, combined_dnn_input
 def DCN(linear_feature_columns, dnn_feature_columns, cross_num=2, cross_parameterization='vector',
         dnn_hidden_units=(256, 128, 64), l2_reg_linear=1e-5, l2_reg_embedding=1e-5,
         l2_reg_cross=1e-5, l2_reg_dnn=0, seed=1024, dnn_dropout=0, dnn_use_bn=False,
-        dnn_activation='relu', task='binary'):
+        dnn_activation='relu', task='binary', cross_low_rank=32):
     """Instantiates the Deep&Cross Network architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
     :param dnn_feature_columns: An iterable containing all the features used by deep part of the model.
     :param cross_num: positive integet,cross layer number
-    :param cross_parameterization: str, ``"vector"`` or ``"matrix"``, how to parameterize the cross network.
+    :param cross_parameterization: str, ``"vector"``, ``"matrix"`` or ``"low_rank"``, how to parameterize the cross network.
     :param dnn_hidden_units: list,list of positive integer or empty list, the layer number and units in each layer of DNN
     :param l2_reg_linear: float. L2 regularizer strength applied to linear part
     :param l2_reg_embedding: float. L2 regularizer strength applied to embedding vector
@@ -39,6 +39,7 @@ def DCN(linear_feature_columns, dnn_feature_columns, cross_num=2, cross_paramete
     :param dnn_use_bn: bool. Whether use BatchNormalization before activation or not DNN
     :param dnn_activation: Activation function to use in DNN
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param cross_low_rank: positive integer, rank of the ``"low_rank"`` cross network.
     :return: A Keras model instance.
 
     """
@@ -58,14 +59,16 @@ def DCN(linear_feature_columns, dnn_feature_columns, cross_num=2, cross_paramete
 
     if len(dnn_hidden_units) > 0 and cross_num > 0:  # Deep & Cross
         deep_out = DNN(dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn, seed=seed)(dnn_input)
-        cross_out = CrossNet(cross_num, parameterization=cross_parameterization, l2_reg=l2_reg_cross)(dnn_input)
+        cross_out = CrossNet(cross_num, parameterization=cross_parameterization, l2_reg=l2_reg_cross,
+                             low_rank=cross_low_rank)(dnn_input)
         stack_out = Concatenate()([cross_out, deep_out])
         final_logit = Dense(1, use_bias=False)(stack_out)
     elif len(dnn_hidden_units) > 0:  # Only Deep
         deep_out = DNN(dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn, seed=seed)(dnn_input)
         final_logit = Dense(1, use_bias=False)(deep_out)
     elif cross_num > 0:  # Only Cross
-        cross_out = CrossNet(cross_num, parameterization=cross_parameterization, l2_reg=l2_reg_cross)(dnn_input)
+        cross_out = CrossNet(cross_num, parameterization=cross_parameterization, l2_reg=l2_reg_cross,
+                             low_rank=cross_low_rank)(dnn_input)
         final_logit = Dense(1, use_bias=False)(cross_out)
     else:  # Error
         raise NotImplementedError
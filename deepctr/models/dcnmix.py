@@ -22,7 +22,7 @@ from ..layers.utils import add_func, combined_dnn_input
 def DCNMix(linear_feature_columns, dnn_feature_columns, cross_num=2,
            dnn_hidden_units=(256, 128, 64), l2_reg_linear=1e-5, l2_reg_embedding=1e-5, low_rank=32, num_experts=4,
            l2_reg_cross=1e-5, l2_reg_dnn=0, seed=1024, dnn_dropout=0, dnn_use_bn=False,
-           dnn_activation='relu', task='binary'):
+           dnn_activation='relu', task='binary', gate_top_k=None, load_balance_weight=0.0):
     """Instantiates the Deep&Cross Network with mixture of experts architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
@@ -40,6 +40,9 @@ def DCNMix(linear_feature_columns, dnn_feature_columns, cross_num=2,
     :param low_rank: Positive integer, dimensionality of low-rank sapce.
     :param num_experts: Positive integer, number of experts.
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param gate_top_k: integer or None. If set, every cross layer routes a sample to its ``gate_top_k`` highest
+        scoring experts and only these experts are evaluated on it.
+    :param load_balance_weight: float. Weight of the load balancing loss of the ``gate_top_k`` gates.
     :return: A Keras model instance.
 
     """
@@ -60,7 +63,8 @@ def DCNMix(linear_feature_columns, dnn_feature_columns, cross_num=2,
     if len(dnn_hidden_units) > 0 and cross_num > 0:  # Deep & Cross
         deep_out = DNN(dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn, seed=seed)(dnn_input)
         cross_out = CrossNetMix(low_rank=low_rank, num_experts=num_experts, layer_num=cross_num,
-                                l2_reg=l2_reg_cross)(dnn_input)
+                                l2_reg=l2_reg_cross, top_k=gate_top_k,
+                                load_balance_weight=load_balance_weight)(dnn_input)
         stack_out = Concatenate()([cross_out, deep_out])
         final_logit = Dense(1, use_bias=False)(stack_out)
     elif len(dnn_hidden_units) > 0:  # Only Deep
@@ -68,7 +72,8 @@ def DCNMix(linear_feature_columns, dnn_feature_columns, cross_num=2,
         final_logit = Dense(1, use_bias=False,)(deep_out)
     elif cross_num > 0:  # Only Cross
         cross_out = CrossNetMix(low_rank=low_rank, num_experts=num_experts, layer_num=cross_num,
-                                l2_reg=l2_reg_cross)(dnn_input)
+                                l2_reg=l2_reg_cross, top_k=gate_top_k,
+                                load_balance_weight=load_balance_weight)(dnn_input)
         final_logit = Dense(1, use_bias=False, )(cross_out)
     else:  # Error
         raise NotImplementedError
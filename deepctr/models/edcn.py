@@ -29,13 +29,14 @@ def EDCN(linear_feature_columns,
          dnn_dropout=0,
          dnn_use_bn=False,
          dnn_activation='relu',
-         task='binary'):
+         task='binary',
+         cross_low_rank=32):
     """Instantiates the Enhanced Deep&Cross Network architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
     :param dnn_feature_columns: An iterable containing all the features used by deep part of the model.
     :param cross_num: positive integet,cross layer number
-    :param cross_parameterization: str, ``"vector"`` or ``"matrix"``, how to parameterize the cross network.
+    :param cross_parameterization: str, ``"vector"``, ``"matrix"`` or ``"low_rank"``, how to parameterize the cross network.
     :param bridge_type: The type of bridge interaction, one of ``"pointwise_addition"``, ``"hadamard_product"``, ``"concatenation"`` , ``"attention_pooling"``
     :param tau: Positive float, the temperature coefficient to control distribution of field-wise gating unit
     :param l2_reg_linear: float. L2 regularizer strength applied to linear part
@@ -47,6 +48,7 @@ def EDCN(linear_feature_columns,
     :param dnn_use_bn: bool. Whether use BatchNormalization before activation or not DNN
     :param dnn_activation: Activation function to use in DNN
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param cross_low_rank: positive integer, rank of the ``"low_rank"`` cross network.
     :return: A Keras model instance.
 
     """
@@ -73,7 +75,7 @@ def EDCN(linear_feature_columns,
 
     for i in range(cross_num):
         cross_out = CrossNet(1, parameterization=cross_parameterization,
-                             l2_reg=l2_reg_cross)(cross_in)
+                             l2_reg=l2_reg_cross, low_rank=cross_low_rank)(cross_in)
         deep_out = DNN([cross_dim], dnn_activation, l2_reg_dnn,
                        dnn_dropout, dnn_use_bn, seed=seed)(deep_in)
         print(cross_out, deep_out)
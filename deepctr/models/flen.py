@@ -64,8 +64,7 @@ def FLEN(linear_feature_columns,
                                     prefix='linear',
                                     l2_reg=l2_reg_linear)
 
-    fm_mf_out = FieldWiseBiInteraction(seed=seed)(
-        [concat_func(v, axis=1) for k, v in group_embedding_dict.items()])
+    fm_mf_out = FieldWiseBiInteraction(seed=seed)(group_embedding_dict)
 
     dnn_input = combined_dnn_input(
         list(chain.from_iterable(group_embedding_dict.values())),
@@ -6,12 +6,11 @@ Author:
 Reference:
     [1] Gai K, Zhu X, Li H, et al. Learning Piece-wise Linear Models from Large Scale Data for Ad Click Prediction[J]. arXiv preprint arXiv:1704.05194, 2017.(https://arxiv.org/abs/1704.05194)
 """
-from keras.layers import Activation, dot
+from keras.layers import Activation, Flatten, dot
 from keras.models import Model
 
 from ..feature_column import build_input_features, get_linear_logit
 from ..layers.core import PredictionLayer
-from ..layers.utils import concat_func
 
 
 def MLR(region_feature_columns, base_feature_columns=None, region_num=4,
@@ -58,17 +57,17 @@ def MLR(region_feature_columns, base_feature_columns=None, region_num=4,
 
 
 def get_region_score(features, feature_columns, region_number, l2_reg, seed, prefix='region_', seq_mask_zero=True):
-    region_logit = concat_func([get_linear_logit(features, feature_columns, seed=seed + i,
-                                                 prefix=prefix + str(i + 1), l2_reg=l2_reg) for i in
-                                range(region_number)])
+    region_logit = Flatten()(get_linear_logit(features, feature_columns, units=region_number, seed=seed,
+                                              prefix=prefix, l2_reg=l2_reg))  # None * region_number
     return Activation('softmax')(region_logit)
 
 
 def get_learner_score(features, feature_columns, region_number, l2_reg, seed, prefix='learner_', seq_mask_zero=True,
                       task='binary'):
-    region_score = [PredictionLayer(task=task, use_bias=False)(
-        get_linear_logit(features, feature_columns, seed=seed + i, prefix=prefix + str(i + 1),
-                         l2_reg=l2_reg)) for i in
-        range(region_number)]
-
-    return concat_func(region_score)
+    learner_logit = Flatten()(get_linear_logit(features, feature_columns, units=region_number, seed=seed,
+                                               prefix=prefix, l2_reg=l2_reg))  # None * region_number
+    if region_number == 1:
+        return PredictionLayer(task=task, use_bias=False)(learner_logit)
+    if task == 'binary':
+        return Activation('sigmoid')(learner_logit)
+    return learner_logit
@@ -13,16 +13,20 @@ from keras.models import Model
 from keras.layers import Dense, Lambda
 
 from ...feature_column import build_input_features, input_from_feature_columns
-from ...layers.core import PredictionLayer, DNN
-from ...layers.utils import combined_dnn_input, reduce_sum
+from ...layers.core import PredictionLayer, DNN, ExpertDNN, ExpertGate
+from ...layers.utils import combined_dnn_input
 
 
 def MMOE(dnn_feature_columns, num_experts=3, expert_dnn_hidden_units=(256, 128), tower_dnn_hidden_units=(64,),
          gate_dnn_hidden_units=(), l2_reg_embedding=0.00001, l2_reg_dnn=0, seed=1024, dnn_dropout=0,
          dnn_activation='relu',
-         dnn_use_bn=False, task_types=('binary', 'binary'), task_names=('ctr', 'ctcvr')):
+         dnn_use_bn=False, task_types=('binary', 'binary'), task_names=('ctr', 'ctcvr'), gate_top_k=None,
+         load_balance_weight=0.0):
     """Instantiates the Multi-gate Mixture-of-Experts multi-task learning architecture.
 
+    Weights saved with the former one layer per expert and per gate layout can be converted with
+    ``deepctr.utils.convert_mmoe_weights``.
+
     :param dnn_feature_columns: An iterable containing all the features used by deep part of the model.
     :param num_experts: integer, number of experts.
     :param expert_dnn_hidden_units: list,list of positive integer or empty list, the layer number and units in each layer of expert DNN.
@@ -36,6 +40,9 @@ def MMOE(dnn_feature_columns, num_experts=3, expert_dnn_hidden_units=(256, 128),
     :param dnn_use_bn: bool. Whether use BatchNormalization before activation or not in DNN
     :param task_types: list of str, indicating the loss of each tasks, ``"binary"`` for  binary logloss, ``"regression"`` for regression loss. e.g. ['binary', 'regression']
     :param task_names: list of str, indicating the predict target of each tasks
+    :param gate_top_k: integer or None. If set, every gate routes a sample to its ``gate_top_k`` highest scoring
+        experts and only these experts are evaluated on it.
+    :param load_balance_weight: float. Weight of the load balancing loss of the ``gate_top_k`` gates.
 
     :return: a Keras model instance
     """
@@ -60,28 +67,26 @@ def MMOE(dnn_feature_columns, num_experts=3, expert_dnn_hidden_units=(256, 128),
                                                                          l2_reg_embedding, seed)
     dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
 
-    # build expert layer
-    expert_outs = []
-    for i in range(num_experts):
-        expert_network = DNN(expert_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn, seed=seed,
-                             name='expert_' + str(i))(dnn_input)
-        expert_outs.append(expert_network)
-
-    expert_concat = Lambda(lambda x: tf.stack(x, axis=1))(expert_outs)  # None,num_experts,dim
-
-    mmoe_outs = []
-    for i in range(num_tasks):  # one mmoe layer: nums_tasks = num_gates
-        # build gate layers
-        gate_input = DNN(gate_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn, seed=seed,
-                         name='gate_' + task_names[i])(dnn_input)
-        gate_out = Dense(num_experts, use_bias=False, activation='softmax',
-                         name='gate_softmax_' + task_names[i])(gate_input)
-        gate_out = Lambda(lambda x: tf.expand_dims(x, axis=-1))(gate_out)
-
+    # build gate layers, one mmoe layer: nums_tasks = num_gates
+    gate_input = dnn_input
+    if len(gate_dnn_hidden_units) > 0:
+        gate_input = ExpertDNN(gate_dnn_hidden_units, num_tasks, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn,
+                               seed=seed, name='gates')(dnn_input)  # None,num_tasks,dim
+    # None,num_tasks,num_experts
+    gate_out = ExpertGate(num_experts, num_tasks, seed=seed, top_k=gate_top_k,
+                          load_balance_weight=load_balance_weight, name='gate_softmax')(gate_input)
+
+    # build expert layer, every expert is computed in the same batched matmuls
+    expert_network = ExpertDNN(expert_dnn_hidden_units, num_experts, dnn_activation, l2_reg_dnn, dnn_dropout,
+                               dnn_use_bn, seed=seed, name='experts')
+    if gate_top_k is None:
+        expert_outs = expert_network(dnn_input)  # None,num_experts,dim
         # gate multiply the expert
-        gate_mul_expert = Lambda(lambda x: reduce_sum(x[0] * x[1], axis=1, keep_dims=False),
-                                 name='gate_mul_expert_' + task_names[i])([expert_concat, gate_out])
-        mmoe_outs.append(gate_mul_expert)
+        gate_mul_expert = Lambda(lambda x: tf.matmul(x[0], x[1]), name='gate_mul_expert')([gate_out, expert_outs])
+    else:
+        # every expert only runs on the samples routed to it
+        gate_mul_expert = expert_network([dnn_input, gate_out])  # None,num_tasks,dim
+    mmoe_outs = Lambda(lambda x: tf.unstack(x, axis=1))(gate_mul_expert)
 
     task_outs = []
     for task_type, task_name, mmoe_out in zip(task_types, task_names, mmoe_outs):
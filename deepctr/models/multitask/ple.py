@@ -13,17 +13,20 @@ from keras.models import Model
 from keras.layers import Dense, Lambda
 
 from ...feature_column import build_input_features, input_from_feature_columns
-from ...layers.core import PredictionLayer, DNN
-from ...layers.utils import combined_dnn_input, reduce_sum
+from ...layers.core import PredictionLayer, DNN, ExpertDNN, ExpertGate
+from ...layers.utils import combined_dnn_input
 
 
 def PLE(dnn_feature_columns, shared_expert_num=1, specific_expert_num=1, num_levels=2,
         expert_dnn_hidden_units=(256,), tower_dnn_hidden_units=(64,), gate_dnn_hidden_units=(),
         l2_reg_embedding=0.00001,
         l2_reg_dnn=0, seed=1024, dnn_dropout=0, dnn_activation='relu', dnn_use_bn=False,
-        task_types=('binary', 'binary'), task_names=('ctr', 'ctcvr')):
+        task_types=('binary', 'binary'), task_names=('ctr', 'ctcvr'), gate_top_k=None, load_balance_weight=0.0):
     """Instantiates the multi level of Customized Gate Control of Progressive Layered Extraction architecture.
 
+    Weights saved with the former one layer per expert and per gate layout can be converted with
+    ``deepctr.utils.convert_ple_weights``.
+
     :param dnn_feature_columns: An iterable containing all the features used by deep part of the model.
     :param shared_expert_num: integer, number of task-shared experts.
     :param specific_expert_num: integer, number of task-specific experts.
@@ -39,6 +42,9 @@ def PLE(dnn_feature_columns, shared_expert_num=1, specific_expert_num=1, num_lev
     :param dnn_use_bn: bool. Whether use BatchNormalization before activation or not in DNN.
     :param task_types: list of str, indicating the loss of each tasks, ``"binary"`` for  binary logloss, ``"regression"`` for regression loss. e.g. ['binary', 'regression']
     :param task_names: list of str, indicating the predict target of each tasks
+    :param gate_top_k: integer or None. If set, every gate routes a sample to its ``gate_top_k`` highest scoring
+        experts and only these experts are evaluated on it.
+    :param load_balance_weight: float. Weight of the load balancing loss of the ``gate_top_k`` gates.
 
     :return: a Keras model instance.
     """
@@ -61,79 +67,70 @@ def PLE(dnn_feature_columns, shared_expert_num=1, specific_expert_num=1, num_lev
                                                                          l2_reg_embedding, seed)
     dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
 
+    num_specific_experts = num_tasks * specific_expert_num
+    num_all_experts = num_specific_experts + shared_expert_num
+    # experts of the gate of every task: its task-specific experts followed by the task-shared experts
+    task_expert_index = [[i * specific_expert_num + j for j in range(specific_expert_num)] +
+                         [num_specific_experts + k for k in range(shared_expert_num)] for i in range(num_tasks)]
+    num_gate_experts = specific_expert_num + shared_expert_num
+    # gate_spread[t * num_gate_experts + k][t * num_all_experts + task_expert_index[t][k]] = 1
+    gate_spread = [[float(col == t * num_all_experts + task_expert_index[t][k])
+                    for col in range(num_tasks * num_all_experts)]
+                   for t in range(num_tasks) for k in range(num_gate_experts)]
+
     # single Extraction Layer
     def cgc_net(inputs, level_name, is_last=False):
-        # inputs: [task1, task2, ... taskn, shared task]
-        specific_expert_outputs = []
-        # build task-specific expert layer
-        for i in range(num_tasks):
-            for j in range(specific_expert_num):
-                expert_network = DNN(expert_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn,
-                                     seed=seed,
-                                     name=level_name + 'task_' + task_names[i] + '_expert_specific_' + str(j))(
-                    inputs[i])
-                specific_expert_outputs.append(expert_network)
-
-        # build task-shared expert layer
-        shared_expert_outputs = []
-        for k in range(shared_expert_num):
-            expert_network = DNN(expert_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn,
-                                 seed=seed,
-                                 name=level_name + 'expert_shared_' + str(k))(inputs[-1])
-            shared_expert_outputs.append(expert_network)
+        # inputs: the shared dnn_input of the first level or [task1, task2, ... taskn, shared task]
+        if isinstance(inputs, list):
+            # input of every expert: task i for its task-specific experts, shared task for the task-shared experts
+            input_index = [i for i in range(num_tasks) for _ in range(specific_expert_num)] + \
+                          [num_tasks] * shared_expert_num
+            expert_input = Lambda(lambda x: tf.stack([x[i] for i in input_index], axis=1))(inputs)
+            task_gate_input = Lambda(lambda x: tf.stack(x, axis=1))(inputs[:num_tasks])
+            shared_gate_input = inputs[-1]
+        else:
+            expert_input = task_gate_input = shared_gate_input = inputs
 
         # task_specific gate (count = num_tasks)
-        cgc_outs = []
-        for i in range(num_tasks):
-            # concat task-specific expert and task-shared expert
-            cur_expert_num = specific_expert_num + shared_expert_num
-            # task_specific + task_shared
-            cur_experts = specific_expert_outputs[
-                          i * specific_expert_num:(i + 1) * specific_expert_num] + shared_expert_outputs
-
-            expert_concat = Lambda(lambda x: tf.stack(x, axis=1))(cur_experts)
-
-            # build gate layers
-            gate_input = DNN(gate_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn,
-                             seed=seed,
-                             name=level_name + 'gate_specific_' + task_names[i])(
-                inputs[i])  # gate[i] for task input[i]
-            gate_out = Dense(cur_expert_num, use_bias=False, activation='softmax',
-                                             name=level_name + 'gate_softmax_specific_' + task_names[i])(gate_input)
-            gate_out = Lambda(lambda x: tf.expand_dims(x, axis=-1))(gate_out)
-
-            # gate multiply the expert
-            gate_mul_expert = Lambda(lambda x: reduce_sum(x[0] * x[1], axis=1, keep_dims=False),
-                                                     name=level_name + 'gate_mul_expert_specific_' + task_names[i])(
-                [expert_concat, gate_out])
-            cgc_outs.append(gate_mul_expert)
+        if len(gate_dnn_hidden_units) > 0:
+            task_gate_input = ExpertDNN(gate_dnn_hidden_units, num_tasks, dnn_activation, l2_reg_dnn, dnn_dropout,
+                                        dnn_use_bn, seed=seed, name=level_name + 'gate_specific')(task_gate_input)
+        gate_out = ExpertGate(num_gate_experts, num_tasks, seed=seed, top_k=gate_top_k,
+                              load_balance_weight=load_balance_weight,
+                              name=level_name + 'gate_softmax_specific')(task_gate_input)
+        # spread the gates of the task-specific expert and task-shared expert over all the experts, with one matmul
+        # of the flat gates by a constant selection
+        gates = Lambda(lambda x: tf.reshape(tf.matmul(tf.reshape(x, (-1, num_tasks * num_gate_experts)),
+                                                      tf.constant(gate_spread, dtype=x.dtype)),
+                                            (-1, num_tasks, num_all_experts)))(gate_out)
 
         # task_shared gate, if the level not in last, add one shared gate
         if not is_last:
-            cur_expert_num = num_tasks * specific_expert_num + shared_expert_num
-            cur_experts = specific_expert_outputs + shared_expert_outputs  # all the expert include task-specific expert and task-shared expert
-
-            expert_concat = Lambda(lambda x: tf.stack(x, axis=1))(cur_experts)
-
-            # build gate layers
-            gate_input = DNN(gate_dnn_hidden_units, dnn_activation, l2_reg_dnn, dnn_dropout, dnn_use_bn,
-                             seed=seed,
-                             name=level_name + 'gate_shared')(inputs[-1])  # gate for shared task input
-
-            gate_out = Dense(cur_expert_num, use_bias=False, activation='softmax',
-                                             name=level_name + 'gate_softmax_shared')(gate_input)
-            gate_out = Lambda(lambda x: tf.expand_dims(x, axis=-1))(gate_out)
-
+            # all the expert include task-specific expert and task-shared expert
+            if len(gate_dnn_hidden_units) > 0:
+                shared_gate_input = ExpertDNN(gate_dnn_hidden_units, 1, dnn_activation, l2_reg_dnn, dnn_dropout,
+                                              dnn_use_bn, seed=seed, name=level_name + 'gate_shared')(shared_gate_input)
+            gate_out = ExpertGate(num_all_experts, seed=seed, top_k=gate_top_k,
+                                  load_balance_weight=load_balance_weight,
+                                  name=level_name + 'gate_softmax_shared')(shared_gate_input)
+            gates = Lambda(lambda x: tf.concat(x, axis=1))([gates, gate_out])
+
+        # build task-specific and task-shared expert layers, computed in the same batched matmuls
+        expert_network = ExpertDNN(expert_dnn_hidden_units, num_all_experts, dnn_activation, l2_reg_dnn, dnn_dropout,
+                                   dnn_use_bn, seed=seed, name=level_name + 'experts')
+        if gate_top_k is None:
+            expert_outputs = expert_network(expert_input)
             # gate multiply the expert
-            gate_mul_expert = Lambda(lambda x: reduce_sum(x[0] * x[1], axis=1, keep_dims=False),
-                                                     name=level_name + 'gate_mul_expert_shared')(
-                [expert_concat, gate_out])
-
-            cgc_outs.append(gate_mul_expert)
+            gate_mul_expert = Lambda(lambda x: tf.matmul(x[0], x[1]),
+                                     name=level_name + 'gate_mul_expert')([gates, expert_outputs])
+        else:
+            # every expert only runs on the samples routed to it
+            gate_mul_expert = expert_network([expert_input, gates])
+        cgc_outs = Lambda(lambda x: tf.unstack(x, axis=1))(gate_mul_expert)
         return cgc_outs
 
     # build Progressive Layered Extraction
-    ple_inputs = [dnn_input] * (num_tasks + 1)  # [task1, task2, ... taskn, shared task]
+    ple_inputs = dnn_input
     ple_outputs = []
     for i in range(num_levels):
         if i == num_levels - 1:  # the last level
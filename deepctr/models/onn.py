@@ -9,24 +9,19 @@ Reference:
 
 """
 
-import itertools
-
-from keras import backend as K
-from keras.layers import (Dense, Embedding, Lambda,
-                                            multiply, Flatten)
+from keras.layers import Dense, Flatten
 try:
     from keras.layers import BatchNormalization
 except ImportError:
     import tensorflow as tf
     BatchNormalization = keras.layers.BatchNormalization
 from keras.models import Model
-from keras.regularizers import l2
 
 from ..feature_column import SparseFeat, VarLenSparseFeat, build_input_features, get_linear_logit
 from ..inputs import get_dense_input
 from ..layers.core import DNN, PredictionLayer
-from ..layers.sequence import SequencePoolingLayer
-from ..layers.utils import concat_func, Hash, NoMask, add_func, combined_dnn_input
+from ..layers.interaction import FieldAwareEmbedding
+from ..layers.utils import Hash, add_func, combined_dnn_input
 
 
 def ONN(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256, 128, 64),
@@ -61,39 +56,27 @@ def ONN(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256, 128,
     varlen_sparse_feature_columns = list(
         filter(lambda x: isinstance(x, VarLenSparseFeat), dnn_feature_columns)) if dnn_feature_columns else []
 
-    sparse_embedding = {fc_j.embedding_name: {fc_i.embedding_name: Embedding(fc_j.vocabulary_size, fc_j.embedding_dim,
-                                                                             embeddings_initializer=fc_j.embeddings_initializer,
-                                                                             embeddings_regularizer=l2(
-                                                                                 l2_reg_embedding),
-                                                                             mask_zero=isinstance(fc_j,
-                                                                                                  VarLenSparseFeat),
-                                                                             name='sparse_emb_' + str(
-                                                                                 fc_j.embedding_name) + '_' + fc_i.embedding_name)
-                                              for fc_i in
-                                              sparse_feature_columns + varlen_sparse_feature_columns} for fc_j in
-                        sparse_feature_columns + varlen_sparse_feature_columns}
-
+    field_aware_columns = sparse_feature_columns + varlen_sparse_feature_columns
     dense_value_list = get_dense_input(features, dnn_feature_columns)
 
-    embed_list = []
-    for fc_i, fc_j in itertools.combinations(sparse_feature_columns + varlen_sparse_feature_columns, 2):
-        i_input = features[fc_i.name]
-        if fc_i.use_hash:
-            i_input = Hash(fc_i.vocabulary_size)(i_input)
-        j_input = features[fc_j.name]
-        if fc_j.use_hash:
-            j_input = Hash(fc_j.vocabulary_size)(j_input)
-
-        fc_i_embedding = feature_embedding(fc_i, fc_j, sparse_embedding, i_input)
-        fc_j_embedding = feature_embedding(fc_j, fc_i, sparse_embedding, j_input)
-
-        element_wise_prod = multiply([fc_i_embedding, fc_j_embedding])
-        if reduce_sum:
-            element_wise_prod = Lambda(lambda element_wise_prod: K.sum(
-                element_wise_prod, axis=-1))(element_wise_prod)
-        embed_list.append(element_wise_prod)
-
-    ffm_out = Flatten()(concat_func(embed_list, axis=1))
+    field_aware_inputs = []
+    for fc in field_aware_columns:
+        lookup_idx = features[fc.name]
+        if fc.use_hash:
+            lookup_idx = Hash(fc.vocabulary_size)(lookup_idx)
+        field_aware_inputs.append(lookup_idx)
+
+    # all the copies of a feature live in one (vocabulary_size, num_features, embedding_dim) table
+    ffm_out = FieldAwareEmbedding([fc.embedding_name for fc in field_aware_columns],
+                                  [fc.vocabulary_size for fc in field_aware_columns],
+                                  field_aware_columns[0].embedding_dim,
+                                  combiners=[fc.combiner if isinstance(fc, VarLenSparseFeat) else None
+                                             for fc in field_aware_columns],
+                                  embeddings_initializers=[fc.embeddings_initializer for fc in field_aware_columns],
+                                  l2_reg=l2_reg_embedding, reduce_sum=reduce_sum,
+                                  name='field_aware_embedding')(field_aware_inputs)
+
+    ffm_out = Flatten()(ffm_out)
     if use_bn:
         ffm_out = BatchNormalization()(ffm_out)
     dnn_input = combined_dnn_input([ffm_out], dense_value_list)
@@ -107,10 +90,3 @@ def ONN(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256, 128,
     model = Model(inputs=inputs_list, outputs=output)
     return model
 
-
-def feature_embedding(fc_i, fc_j, embedding_dict, input_feature):
-    fc_i_embedding = embedding_dict[fc_i.name][fc_j.name](input_feature)
-    if isinstance(fc_i, SparseFeat):
-        return NoMask()(fc_i_embedding)
-    else:
-        return SequencePoolingLayer(fc_i.combiner, supports_masking=True)(fc_i_embedding)
@@ -20,7 +20,8 @@ from ...layers.utils import concat_func, combined_dnn_input
 
 def BST(dnn_feature_columns, history_feature_list, transformer_num=1, att_head_num=8,
         use_bn=False, dnn_hidden_units=(256, 128, 64), dnn_activation='relu', l2_reg_dnn=0,
-        l2_reg_embedding=1e-6, dnn_dropout=0.0, seed=1024, task='binary'):
+        l2_reg_embedding=1e-6, dnn_dropout=0.0, seed=1024, task='binary', att_fused_qkv=False,
+        attention_type='scaled_dot_product'):
     """Instantiates the BST architecture.
 
      :param dnn_feature_columns: An iterable containing all the features used by deep part of the model.
@@ -35,6 +36,8 @@ def BST(dnn_feature_columns, history_feature_list, transformer_num=1, att_head_n
      :param dnn_dropout: float in [0,1), the probability we will drop out a given DNN coordinate.
      :param seed: integer ,to use as random seed.
      :param task: str, ``"binary"`` for  binary logloss or ``"regression"`` for regression loss
+     :param att_fused_qkv: bool. Whether compute query, key and value of the transformer with one projection stored in a single weight.
+     :param attention_type: str, type of attention of the transformer, ``"scaled_dot_product"`` or ``"linear"`` for long behaviour sequences, see ``Transformer``.
      :return: A Keras model instance.
 
      """
@@ -87,7 +90,9 @@ def BST(dnn_feature_columns, history_feature_list, transformer_num=1, att_head_n
         transformer_layer = Transformer(att_embedding_size=att_embedding_size, head_num=att_head_num,
                                         dropout_rate=dnn_dropout, use_positional_encoding=True, use_res=True,
                                         use_feed_forward=True, use_layer_norm=True, blinding=False, seed=seed,
-                                        supports_masking=False, output_type=None)
+                                        supports_masking=False, output_type=None,
+                                        max_len=max(fc.maxlen for fc in history_feature_columns),
+                                        fused_qkv=att_fused_qkv, attention_type=attention_type)
         transformer_output = transformer_layer([transformer_output, transformer_output,
                                                 user_behavior_length, user_behavior_length])
 
@@ -26,8 +26,7 @@ def auxiliary_loss(h_states, click_seq, noclick_seq, mask, stag=None):
     #:param mask:#[B,1]
     #:param stag:
     #:return:
-    hist_len, _ = click_seq.get_shape().as_list()[1:]
-    mask = tf.sequence_mask(mask, hist_len)
+    mask = tf.sequence_mask(mask, tf.shape(click_seq)[1])
     mask = mask[:, 0, :]
 
     mask = tf.cast(mask, tf.float32)
@@ -211,6 +210,9 @@ def DIEN(dnn_feature_columns, history_feature_list,
 
     if use_negsampling:
         model.add_loss(alpha * aux_loss_1)
+    if tf.executing_eagerly():
+        # the variables are initialized on creation, there is no session to run
+        return model
     try:
         tf.keras.backend.get_session().run(tf.global_variables_initializer())
     except AttributeError:
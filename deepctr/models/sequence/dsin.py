@@ -25,7 +25,7 @@ from ...layers.utils import concat_func, combined_dnn_input
 
 def DSIN(dnn_feature_columns, sess_feature_list, sess_max_count=5, bias_encoding=False,
          att_embedding_size=1, att_head_num=8, dnn_hidden_units=(256, 128, 64), dnn_activation='relu', dnn_dropout=0,
-         dnn_use_bn=False, l2_reg_dnn=0, l2_reg_embedding=1e-6, seed=1024, task='binary',
+         dnn_use_bn=False, l2_reg_dnn=0, l2_reg_embedding=1e-6, seed=1024, task='binary', att_fused_qkv=False,
          ):
     """Instantiates the Deep Session Interest Network architecture.
 
@@ -44,6 +44,7 @@ def DSIN(dnn_feature_columns, sess_feature_list, sess_max_count=5, bias_encoding
     :param l2_reg_embedding: float. L2 regularizer strength applied to embedding vector
     :param seed: integer ,to use as random seed.
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param att_fused_qkv: bool. Whether compute query, key and value of the transformer with one projection stored in a single weight.
     :return: A Keras model instance.
 
     """
@@ -110,7 +111,7 @@ def DSIN(dnn_feature_columns, sess_feature_list, sess_max_count=5, bias_encoding
 
     Self_Attention = Transformer(att_embedding_size, att_head_num, dropout_rate=0, use_layer_norm=False,
                                  use_positional_encoding=(not bias_encoding), seed=seed, supports_masking=True,
-                                 blinding=True)
+                                 blinding=True, fused_qkv=att_fused_qkv)
     sess_fea = sess_interest_extractor(
         tr_input, sess_max_count, Self_Attention)
 
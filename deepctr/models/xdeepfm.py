@@ -18,7 +18,7 @@ from ..layers.utils import concat_func, add_func, combined_dnn_input
 def xDeepFM(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256, 128, 64),
             cin_layer_size=(128, 128,), cin_split_half=True, cin_activation='relu', l2_reg_linear=0.00001,
             l2_reg_embedding=0.00001, l2_reg_dnn=0, l2_reg_cin=0, seed=1024, dnn_dropout=0,
-            dnn_activation='relu', dnn_use_bn=False, task='binary'):
+            dnn_activation='relu', dnn_use_bn=False, task='binary', cin_filter_rank=None):
     """Instantiates the xDeepFM architecture.
 
     :param linear_feature_columns: An iterable containing all the features used by linear part of the model.
@@ -36,6 +36,7 @@ def xDeepFM(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256,
     :param dnn_activation: Activation function to use in DNN
     :param dnn_use_bn: bool. Whether use BatchNormalization before activation or not in DNN
     :param task: str, ``"binary"`` for  binary logloss or  ``"regression"`` for regression loss
+    :param cin_filter_rank: int or None, if set the filters of CIN are factorized into two matrices of this rank.
     :return: A Keras model instance.
     """
 
@@ -60,7 +61,7 @@ def xDeepFM(linear_feature_columns, dnn_feature_columns, dnn_hidden_units=(256,
 
     if len(cin_layer_size) > 0:
         exFM_out = CIN(cin_layer_size, cin_activation,
-                       cin_split_half, l2_reg_cin, seed)(fm_input)
+                       cin_split_half, l2_reg_cin, seed, filter_rank=cin_filter_rank)(fm_input)
         exFM_logit = Dense(1, use_bias=False)(exFM_out)
         final_logit = add_func([final_logit, exFM_logit])
 
@@ -8,6 +8,8 @@ Author:
 
 import json
 import logging
+import re
+import shutil
 from threading import Thread
 
 import requests
@@ -44,3 +46,226 @@ def check_version(version):
             return
 
     Thread(target=check, args=(version,)).start()
+
+
+def _stack_h5_weights(filepath, output_path, pattern, weight_name):
+    # replaces the datasets of every layer whose weights all match pattern by one dataset named weight_name, holding
+    # them stacked in the order of the integers of their index group
+    import h5py
+    import numpy as np
+
+    if output_path is not None and output_path != filepath:
+        shutil.copyfile(filepath, output_path)
+        filepath = output_path
+
+    num_converted = 0
+    with h5py.File(filepath, 'r+') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        for layer_name in root.attrs['layer_names']:
+            group = root[layer_name]
+            weight_names = [name.decode('utf8') if hasattr(name, 'decode') else name
+                            for name in group.attrs['weight_names']]
+            matches = [pattern.match(name) for name in weight_names]
+            if not weight_names or not all(matches):
+                continue
+            indices = sorted((tuple(int(i) for i in re.findall(r'\d+', m.group('index'))), name)
+                             for m, name in zip(matches, weight_names))
+            values = np.stack([group[name][()] for _, name in indices])
+            for name in weight_names:
+                del group[name]
+            new_name = matches[0].group('prefix') + weight_name + (matches[0].group('suffix') or '')
+            group.create_dataset(new_name, data=values)
+            group.attrs['weight_names'] = [new_name.encode('utf8')]
+            num_converted += 1
+    return num_converted
+
+
+def convert_fefm_weights(filepath, output_path=None):
+    """Convert the ``FEFMLayer`` weights of a ``.h5`` file saved with one ``field_embeddings<i>-<j>`` matrix per
+    field pair into the stacked ``(num_pairs, embedding_size, embedding_size)`` weight of the current layer.
+
+    Works on files written by ``model.save_weights`` and by ``model.save``, other layers are left untouched.
+
+    :param filepath: str, path of the ``.h5`` file.
+    :param output_path: str or None, path of the converted file, if ``None`` ``filepath`` is converted in place.
+    :return: int, number of converted layers.
+    """
+    pattern = re.compile(r'^(?P<prefix>.*)field_embeddings(?P<index>\d+-\d+)(?P<suffix>:\d+)?$')
+    return _stack_h5_weights(filepath, output_path, pattern, 'field_embeddings')
+
+
+def convert_bilinear_weights(filepath, output_path=None):
+    """Convert the ``BilinearInteraction`` weights of a ``.h5`` file saved with one ``bilinear_weight<i>`` matrix
+    per field (``bilinear_type='each'``) or one ``bilinear_weight<i>_<j>`` matrix per field pair
+    (``bilinear_type='interaction'``) into the stacked weight of the current layer.
+
+    Works on files written by ``model.save_weights`` and by ``model.save``, other layers are left untouched.
+
+    :param filepath: str, path of the ``.h5`` file.
+    :param output_path: str or None, path of the converted file, if ``None`` ``filepath`` is converted in place.
+    :return: int, number of converted layers.
+    """
+    pattern = re.compile(r'^(?P<prefix>.*)bilinear_weight(?P<index>\d+(_\d+)?)(?P<suffix>:\d+)?$')
+    return _stack_h5_weights(filepath, output_path, pattern, 'bilinear_weight')
+
+
+def _merge_h5_layers(filepath, output_path, blocks):
+    # every block is a list of (new_name, old_names), in the order of the layers of the current model. The groups of
+    # the old layers are replaced by one group new_name, whose weights stack the weights of the same position of the
+    # old layers, and the new layers of a block take the place of its first old layer
+    import h5py
+    import numpy as np
+
+    if output_path is not None and output_path != filepath:
+        shutil.copyfile(filepath, output_path)
+        filepath = output_path
+
+    def decode(names):
+        return [name.decode('utf8') if hasattr(name, 'decode') else name for name in names]
+
+    num_converted = 0
+    with h5py.File(filepath, 'r+') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        layer_names = decode(root.attrs['layer_names'])
+        for block in blocks:
+            position = None
+            new_names = []
+            for new_name, old_names in block:
+                old_names = [name for name in old_names if name in layer_names]
+                weights = [decode(root[name].attrs['weight_names']) for name in old_names]
+                if not any(weights):
+                    continue
+                if any(len(names) != len(weights[0]) for names in weights):
+                    raise ValueError("layers %s do not hold the same weights" % old_names)
+                if any('dice' in name for names in weights for name in names):
+                    raise ValueError("the Dice weights of layers %s can not be converted" % old_names)
+                group = root.create_group(new_name + '_converted')
+                new_weight_names = []
+                for i, name in enumerate(weights[0]):
+                    new_weight_name = new_name + '/' + name.split('/', 1)[-1]
+                    group.create_dataset(new_weight_name, data=np.stack(
+                        [root[old][names[i]][()] for old, names in zip(old_names, weights)]))
+                    new_weight_names.append(new_weight_name.encode('utf8'))
+                group.attrs['weight_names'] = new_weight_names
+                for name in old_names:
+                    del root[name]
+                root.move(new_name + '_converted', new_name)
+                first = min(layer_names.index(name) for name in old_names)
+                position = first if position is None else min(position, first)
+                layer_names = [name if name not in old_names else None for name in layer_names]
+                new_names.append(new_name)
+                num_converted += 1
+            if position is not None:
+                layer_names = layer_names[:position] + new_names + layer_names[position:]
+            layer_names = [name for name in layer_names if name is not None]
+        root.attrs['layer_names'] = [name.encode('utf8') for name in layer_names]
+    return num_converted
+
+
+def convert_mmoe_weights(filepath, output_path=None, task_names=('ctr', 'ctcvr')):
+    """Convert the ``MMOE`` weights of a ``.h5`` file saved with one ``expert_<i>`` DNN per expert and one
+    ``gate_<task>`` DNN and ``gate_softmax_<task>`` Dense per task into the batched ``experts``, ``gates`` and
+    ``gate_softmax`` layers of the current model.
+
+    Works on files written by ``model.save_weights`` and by ``model.save``, other layers are left untouched. The
+    weights of a ``Dice`` activation are not converted.
+
+    :param filepath: str, path of the ``.h5`` file.
+    :param output_path: str or None, path of the converted file, if ``None`` ``filepath`` is converted in place.
+    :param task_names: list of str, the ``task_names`` of the model.
+    :return: int, number of converted layers.
+    """
+    import h5py
+
+    with h5py.File(filepath, 'r') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        layer_names = [name.decode('utf8') if hasattr(name, 'decode') else name for name in root.attrs['layer_names']]
+    experts = sorted((int(name[len('expert_'):]), name) for name in layer_names if re.match(r'^expert_\d+$', name))
+    block = [('gates', ['gate_' + task_name for task_name in task_names]),
+             ('gate_softmax', ['gate_softmax_' + task_name for task_name in task_names]),
+             ('experts', [name for _, name in experts])]
+    return _merge_h5_layers(filepath, output_path, [block])
+
+
+def convert_ple_weights(filepath, output_path=None, task_names=('ctr', 'ctcvr')):
+    """Convert the ``PLE`` weights of a ``.h5`` file saved with one DNN per expert and one DNN and Dense per gate into
+    the batched ``experts``, ``gate_specific``, ``gate_softmax_specific``, ``gate_shared`` and
+    ``gate_softmax_shared`` layers of every level of the current model.
+
+    Works on files written by ``model.save_weights`` and by ``model.save``, other layers are left untouched. The
+    weights of a ``Dice`` activation are not converted.
+
+    :param filepath: str, path of the ``.h5`` file.
+    :param output_path: str or None, path of the converted file, if ``None`` ``filepath`` is converted in place.
+    :param task_names: list of str, the ``task_names`` of the model.
+    :return: int, number of converted layers.
+    """
+    import h5py
+
+    with h5py.File(filepath, 'r') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        layer_names = [name.decode('utf8') if hasattr(name, 'decode') else name for name in root.attrs['layer_names']]
+    levels = sorted(set(int(m.group(1)) for m in map(re.compile(r'^level_(\d+)_').match, layer_names) if m))
+    blocks = []
+    for level in levels:
+        prefix = 'level_%d_' % level
+
+        def indices(pattern):
+            return sorted(int(m.group(1)) for m in map(re.compile('^' + prefix + pattern + r'(\d+)$').match,
+                                                        layer_names) if m)
+
+        # the task-specific experts task by task, followed by the task-shared experts
+        experts = [prefix + 'task_' + task_name + '_expert_specific_' + str(i) for task_name in task_names
+                   for i in indices('task_' + re.escape(task_name) + '_expert_specific_')]
+        experts += [prefix + 'expert_shared_' + str(i) for i in indices('expert_shared_')]
+        blocks.append([(prefix + 'gate_specific', [prefix + 'gate_specific_' + task_name for task_name in task_names]),
+                       (prefix + 'gate_softmax_specific',
+                        [prefix + 'gate_softmax_specific_' + task_name for task_name in task_names]),
+                       (prefix + 'gate_shared', [prefix + 'gate_shared']),
+                       (prefix + 'gate_softmax_shared', [prefix + 'gate_softmax_shared']),
+                       (prefix + 'experts', experts)])
+    return _merge_h5_layers(filepath, output_path, blocks)
+
+
+def convert_crossnetmix_weights(filepath, output_path=None):
+    """Convert the ``CrossNetMix`` weights of a ``.h5`` file saved with one gating ``Dense`` per expert into the
+    ``(dim, num_experts)`` ``gating_kernel`` of the current layer.
+
+    Works on files written by ``model.save_weights`` and by ``model.save``, other layers are left untouched.
+
+    :param filepath: str, path of the ``.h5`` file.
+    :param output_path: str or None, path of the converted file, if ``None`` ``filepath`` is converted in place.
+    :return: int, number of converted layers.
+    """
+    import h5py
+    import numpy as np
+
+    if output_path is not None and output_path != filepath:
+        shutil.copyfile(filepath, output_path)
+        filepath = output_path
+
+    gating_pattern = re.compile(r'^(?P<prefix>.*/)dense(_\d+)?/kernel(?P<suffix>:\d+)?$')
+    num_converted = 0
+    with h5py.File(filepath, 'r+') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        for layer_name in root.attrs['layer_names']:
+            group = root[layer_name]
+            weight_names = [name.decode('utf8') if hasattr(name, 'decode') else name
+                            for name in group.attrs['weight_names']]
+            gating_names = [name for name in weight_names if gating_pattern.match(name)]
+            if not gating_names or not any(re.match(r'^.*U_list\d+(:\d+)?$', name) for name in weight_names):
+                continue
+            # the gating scores of the experts side by side, (dim, num_experts)
+            values = np.concatenate([group[name][()] for name in gating_names], axis=1)
+            for name in gating_names:
+                del group[name]
+            match = gating_pattern.match(gating_names[0])
+            new_name = match.group('prefix') + 'gating_kernel' + (match.group('suffix') or '')
+            group.create_dataset(new_name, data=values)
+            # the gating kernel follows the C_list weights
+            weight_names = [name for name in weight_names if name not in gating_names]
+            position = max(i for i, name in enumerate(weight_names) if re.match(r'^.*C_list\d+(:\d+)?$', name)) + 1
+            weight_names.insert(position, new_name)
+            group.attrs['weight_names'] = [name.encode('utf8') for name in weight_names]
+            num_converted += 1
+    return num_converted
@@ -3,8 +3,9 @@ from sklearn.metrics import log_loss, roc_auc_score
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 
+from deepctr.data import ColumnarPacker
 from deepctr.models import DeepFM
-from deepctr.feature_column import SparseFeat, DenseFeat, get_feature_names
+from deepctr.feature_column import SparseFeat, DenseFeat
 
 if __name__ == "__main__":
     data = pd.read_csv('./criteo_sample.txt')
@@ -32,13 +33,13 @@ if __name__ == "__main__":
     dnn_feature_columns = fixlen_feature_columns
     linear_feature_columns = fixlen_feature_columns
 
-    feature_names = get_feature_names(linear_feature_columns + dnn_feature_columns)
+    packer = ColumnarPacker(linear_feature_columns + dnn_feature_columns)
 
-    # 3.generate input data for model
+    # 3.generate input data for model,packed once into arrays with the dtype and shape of each model input
 
     train, test = train_test_split(data, test_size=0.2, random_state=2020)
-    train_model_input = {name: train[name] for name in feature_names}
-    test_model_input = {name: test[name] for name in feature_names}
+    train_model_input = packer.pack(train)
+    test_model_input = packer.pack(test)
 
     # 4.Define Model,train,predict and evaluate
     model = DeepFM(linear_feature_columns, dnn_feature_columns, task='binary')
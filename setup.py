@@ -22,7 +22,7 @@ setuptools.setup(
     url="https://github.com/diixo/deepctr",
     download_url='https://github.com/diixo/deepctr/tags',
     packages=setuptools.find_packages(
-        exclude=["tests", "tests.models", "tests.layers"]),
+        exclude=["tests", "tests.models", "tests.layers", "tests.data"]),
     python_requires=">=2.7,!=3.0.*,!=3.1.*,!=3.2.*,!=3.3.*,!=3.4.*",  # '>=3.4',  # 3.4.6
     install_requires=REQUIRED_PACKAGES,
     extras_require={
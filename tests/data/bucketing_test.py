@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from deepctr.data import LengthBucketBatcher
+from deepctr.feature_column import SparseFeat, VarLenSparseFeat
+from deepctr.models import BST, DIEN, DIN
+
+NUM_ROWS = 50
+MAXLEN = 10
+
+
+def get_xy_fd():
+    feature_columns = [SparseFeat('user', 10, embedding_dim=8), SparseFeat('item_id', 20, embedding_dim=8),
+                       SparseFeat('cate_id', 5, embedding_dim=8)]
+    feature_columns += [
+        VarLenSparseFeat(SparseFeat('hist_item_id', 20, embedding_dim=8, embedding_name='item_id'), maxlen=MAXLEN,
+                         length_name='seq_length', dynamic_length=True),
+        VarLenSparseFeat(SparseFeat('hist_cate_id', 5, embedding_dim=8, embedding_name='cate_id'), maxlen=MAXLEN,
+                         length_name='seq_length', dynamic_length=True)]
+    rng = np.random.RandomState(0)
+    seq_length = rng.randint(1, MAXLEN + 1, NUM_ROWS)
+    padding = np.arange(MAXLEN)[None, :] >= seq_length[:, None]
+    x = {'user': rng.randint(0, 10, NUM_ROWS), 'item_id': rng.randint(1, 20, NUM_ROWS),
+         'cate_id': rng.randint(1, 5, NUM_ROWS), 'seq_length': seq_length,
+         'hist_item_id': np.where(padding, 0, rng.randint(1, 20, (NUM_ROWS, MAXLEN))),
+         'hist_cate_id': np.where(padding, 0, rng.randint(1, 5, (NUM_ROWS, MAXLEN)))}
+    y = np.arange(NUM_ROWS) % 2
+    return x, y, feature_columns, ['item_id', 'cate_id']
+
+
+def test_LengthBucketBatcher():
+    x, y, feature_columns, _ = get_xy_fd()
+    batcher = LengthBucketBatcher(x, y, feature_columns, bucket_boundaries=[3, 6], batch_size=8)
+    assert batcher.bucket_boundaries == [3, 6, MAXLEN]
+    np.testing.assert_array_equal(batcher.lengths, x['seq_length'])
+
+    batches = list(batcher.iter_batches())
+    assert len(batches) == len(batcher)
+    rows = []
+    for batch_x, batch_y in batches:
+        padded_len = batch_x['hist_item_id'].shape[1]
+        assert padded_len in batcher.bucket_boundaries
+        assert batch_x['hist_cate_id'].shape[1] == padded_len
+        assert batch_x['user'].shape == (len(batch_y), 1)
+        assert batch_x['seq_length'].max() <= padded_len
+        rows.append(batch_x['user'][:, 0] * 1000 + batch_x['item_id'][:, 0] * 10 + batch_x['cate_id'][:, 0])
+    assert sorted(np.concatenate(rows)) == sorted(x['user'] * 1000 + x['item_id'] * 10 + x['cate_id'])
+
+    bucketed, full = batcher.padded_positions()
+    assert bucketed < full == NUM_ROWS * MAXLEN
+
+
+@pytest.mark.parametrize(
+    'model_name',
+    ['DIN', 'BST', 'DIEN']
+)
+def test_dynamic_length_model(model_name):
+    x, y, feature_columns, behavior_feature_list = get_xy_fd()
+    if model_name == 'DIN':
+        model = DIN(feature_columns, behavior_feature_list, dnn_hidden_units=[4], att_activation='sigmoid')
+    elif model_name == 'BST':
+        model = BST(feature_columns, behavior_feature_list, att_head_num=4, dnn_hidden_units=[4])
+    else:
+        model = DIEN(feature_columns, behavior_feature_list, dnn_hidden_units=[4], gru_type='AUGRU')
+        # both GRUs are trained
+        assert len(model.get_layer('gru1').trainable_weights) == len(model.get_layer('gru2').trainable_weights) == 4
+    model.compile('adam', 'binary_crossentropy')
+    batcher = LengthBucketBatcher(x, y, feature_columns, lengths='seq_length', num_buckets=3, batch_size=8)
+    model.fit(batcher.to_dataset(), epochs=2, verbose=0)
+
+    # cutting the padding off must not change the predictions
+    full = model.predict(batcher.x, verbose=0)
+    for padded_len, indices in batcher.batch_indices(0):
+        batch_x = dict((name, value[indices][:, :padded_len] if name in batcher.dynamic_names else value[indices])
+                       for name, value in batcher.x.items())
+        np.testing.assert_allclose(model.predict(batch_x, verbose=0), full[indices], rtol=1e-5, atol=1e-6)
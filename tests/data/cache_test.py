@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+from deepctr.data import PreprocessedCache, fingerprint
+from deepctr.feature_column import SparseFeat, DenseFeat
+
+pd = pytest.importorskip('pandas')
+
+
+def test_PreprocessedCache(tmpdir):
+    path = str(tmpdir.join('data.csv'))
+    pd.DataFrame({'user_id': ['a', 'b', 'a'], 'price': [1.0, 3.0, 2.0], 'label': [1, 0, 1]}).to_csv(path, index=False)
+    feature_columns = [SparseFeat('user_id', 3), DenseFeat('price', 1)]
+    calls = []
+
+    def preprocess(filename):
+        calls.append(filename)
+        data = pd.read_csv(filename)
+        data['user_id'] = data['user_id'].astype('category').cat.codes
+        data['price'] = (data['price'] - data['price'].min()) / (data['price'].max() - data['price'].min())
+        return data
+
+    cache = PreprocessedCache(str(tmpdir.join('cache')), feature_columns, label_names=['label'])
+    built = cache.load(path, preprocess, extra='v1')
+    cached = cache.load(path, preprocess, extra='v1')
+
+    assert len(calls) == 1
+    assert isinstance(cached['user_id'], np.memmap)
+    assert list(cached.keys()) == ['user_id', 'price', 'label']
+    for name in cached:
+        assert np.array_equal(built[name], cached[name])
+    assert cached['price'].dtype == np.float32 and cached['price'].shape == (3, 1)
+
+    cache.load(path, preprocess, extra='v2')
+    assert len(calls) == 2
+    assert fingerprint(path, feature_columns, extra='v1') != fingerprint(path, feature_columns[:1], extra='v1')
+    assert len([d for d in os.listdir(cache.cache_dir) if not d.startswith('.')]) == 2
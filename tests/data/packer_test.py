@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from deepctr.data import ColumnarPacker
+from deepctr.feature_column import SparseFeat, VarLenSparseFeat, DenseFeat
+from deepctr.models import DeepFM
+from ..utils import get_test_data, SAMPLE_SIZE
+
+
+@pytest.mark.parametrize(
+    'sparse_feature_num,dense_feature_num',
+    [(2, 1), (3, 0)]
+)
+def test_ColumnarPacker(sparse_feature_num, dense_feature_num):
+    x, y, feature_columns = get_test_data(SAMPLE_SIZE, sparse_feature_num=sparse_feature_num,
+                                          dense_feature_num=dense_feature_num)
+    packer = ColumnarPacker(feature_columns)
+    model_input = packer.pack(x)
+
+    model = DeepFM(feature_columns, feature_columns, dnn_hidden_units=(4,))
+    for name, tensor in zip(model.input_names, model.inputs):
+        assert model_input[name].dtype == tensor.dtype.as_numpy_dtype
+        assert model_input[name].shape[1:] == tuple(tensor.shape.as_list()[1:])
+        assert model_input[name].flags['C_CONTIGUOUS']
+    model.compile('adam', 'binary_crossentropy')
+    model.fit(model_input, y, batch_size=100, epochs=2, verbose=0)
+    assert np.allclose(model.predict(model_input), model.predict(x))
+
+
+def test_ColumnarPacker_dataframe():
+    pd = pytest.importorskip('pandas')
+    feature_columns = [SparseFeat('user_id', 4), DenseFeat('pic_vec', 2),
+                       VarLenSparseFeat(SparseFeat('genres', 5), maxlen=3, combiner='mean', length_name='genres_len')]
+    data = pd.DataFrame({'user_id': [1, 0, 3], 'pic_vec': [[0.1, 0.5], [0.2, 0.3], [0.0, 1.0]],
+                         'genres': [[1], [2, 3, 4, 1], [4, 2]], 'genres_len': [1, 3, 2]})
+    packer = ColumnarPacker(feature_columns)
+    model_input = packer.pack(data)
+
+    assert packer.feature_names == ['user_id', 'pic_vec', 'genres', 'genres_len']
+    assert model_input['user_id'].dtype == np.int32 and model_input['user_id'].shape == (3, 1)
+    assert model_input['pic_vec'].dtype == np.float32 and model_input['pic_vec'].shape == (3, 2)
+    assert np.array_equal(model_input['genres'], [[1, 0, 0], [2, 3, 4], [4, 2, 0]])
+    assert packer.report.bytes_saved > 0
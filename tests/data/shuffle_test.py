@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from deepctr.data import ExternalShuffler
+from deepctr.feature_column import SparseFeat, DenseFeat
+from deepctr.models import DeepFM
+
+pd = pytest.importorskip('pandas')
+
+NUM_ROWS = 103
+
+
+@pytest.mark.parametrize(
+    'rescatter',
+    [False, True]
+)
+def test_ExternalShuffler(tmpdir, rescatter):
+    path = str(tmpdir.join('data.csv'))
+    pd.DataFrame({'row_id': np.arange(NUM_ROWS), 'price': np.random.random(NUM_ROWS),
+                  'label': np.arange(NUM_ROWS) % 2}).to_csv(path, index=False)
+    feature_columns = [SparseFeat('row_id', NUM_ROWS), DenseFeat('price', 1)]
+    shuffler = ExternalShuffler(path, str(tmpdir.join('buckets')), num_buckets=4, rescatter=rescatter)
+
+    orders = []
+    for _ in range(2):
+        batches = list(shuffler.iter_batches(feature_columns, ['label'], batch_size=10))
+        assert [len(y) for _, y in batches] == [10] * 10 + [3]
+        order = np.concatenate([x['row_id'][:, 0] for x, _ in batches])
+        assert sorted(order) == list(range(NUM_ROWS))
+        assert all(np.array_equal(x['row_id'][:, 0] % 2, y) for x, y in batches)
+        orders.append(order)
+    assert not np.array_equal(orders[0], orders[1])
+    assert not np.array_equal(orders[0], np.arange(NUM_ROWS))
+
+    model = DeepFM(feature_columns, feature_columns, dnn_hidden_units=(4,))
+    model.compile('adam', 'binary_crossentropy')
+    model.fit(shuffler.to_dataset(feature_columns, ['label'], batch_size=10), epochs=2, verbose=0)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from deepctr.data import DenseStatistics
+from deepctr.feature_column import SparseFeat, DenseFeat
+from deepctr.models import DeepFM
+from ..utils import check_model, SAMPLE_SIZE
+
+
+def test_DenseStatistics():
+    values = np.random.exponential(10, 10000)
+    stats = DenseStatistics(sample_size=1000)
+    other = DenseStatistics(sample_size=1000)
+    for chunk in np.array_split(values[:6000], 7):
+        stats.update(chunk)
+    other.update(values[6000:])
+    stats.merge(other)
+
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, values.mean()) and np.isclose(stats.std, values.std())
+    assert stats.min == values.min() and stats.max == values.max()
+    assert len(stats.sample) == 1000
+    boundaries = stats.quantile_boundaries(4)
+    assert np.allclose(boundaries, np.quantile(values, [0.25, 0.5, 0.75]), rtol=0.2)
+
+
+def test_DenseStatistics_model():
+    x = {'user_id': np.random.randint(0, 4, SAMPLE_SIZE), 'price': np.random.exponential(10, SAMPLE_SIZE)}
+    y = np.random.randint(0, 2, SAMPLE_SIZE)
+    stats = DenseStatistics(log1p=True).update(x['price'])
+    feature_columns = [SparseFeat('user_id', 4),
+                       DenseFeat('price', 1, transform_fn=stats.build_layer('standard', num_buckets=4,
+                                                                            bucket_output='one_hot'))]
+    model = DeepFM(feature_columns, feature_columns, dnn_hidden_units=(4,))
+    check_model(model, 'DeepFM_DenseTransform', x, y)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from deepctr.data import SyntheticDataGenerator, avazu_feature_columns, behavior_feature_columns, \
+    criteo_feature_columns, movielens_feature_columns
+from deepctr.data.packer import get_input_specs
+from deepctr.models import DIN, DeepFM
+
+
+@pytest.mark.parametrize(
+    'feature_columns',
+    [criteo_feature_columns(vocabulary_scale=0.001), avazu_feature_columns(vocabulary_scale=0.001),
+     movielens_feature_columns(), behavior_feature_columns(1000, 1000, 10, maxlen=20, use_neg=True)[0]]
+)
+def test_SyntheticDataGenerator_chunks(feature_columns):
+    generator = SyntheticDataGenerator(feature_columns, num_rows=250, chunk_size=100)
+    chunks = list(generator.iter_chunks())
+    assert [len(chunk['label']) for chunk in chunks] == [100, 100, 50]
+    for name, spec in get_input_specs(feature_columns).items():
+        assert chunks[0][name].shape == (100,) + tuple(spec.shape)
+        assert chunks[0][name].dtype == spec.dtype
+    assert np.array_equal(chunks[1]['label'], generator.generate_chunk(1)['label'])
+
+
+def test_SyntheticDataGenerator_distributions():
+    feature_columns, _ = behavior_feature_columns(1000, 1000, 10, maxlen=20, use_neg=True)
+    chunk = SyntheticDataGenerator(feature_columns, zipf_a=1.2, mean_length=5).generate_chunk(0, 10000)
+
+    counts = np.bincount(chunk['item_id'][:, 0], minlength=1001)
+    assert counts[0] > 20 * counts[500:].mean()
+    assert chunk['item_id'].max() <= 1000
+
+    lengths = chunk['seq_length'][:, 0]
+    assert 1 <= lengths.min() and lengths.max() <= 20
+    assert 4 < lengths.mean() < 6
+    for name in ['hist_item_id', 'hist_cate_id', 'neg_hist_item_id', 'neg_hist_cate_id']:
+        assert np.array_equal((chunk[name] != 0).sum(axis=1), lengths)
+        assert np.array_equal((chunk[name] != 0).argmin(axis=1)[lengths < 20], lengths[lengths < 20])
+
+
+def test_SyntheticDataGenerator_dataset():
+    feature_columns, behavior_feature_list = behavior_feature_columns(100, 100, 10, maxlen=8)
+    model = DIN(feature_columns, behavior_feature_list, dnn_hidden_units=[4], att_activation='sigmoid')
+    model.compile('adam', 'binary_crossentropy')
+    generator = SyntheticDataGenerator(feature_columns, num_rows=64, chunk_size=32)
+    model.fit(generator.to_dataset(batch_size=16), epochs=1, verbose=0)
+
+    feature_columns = criteo_feature_columns(vocabulary_scale=0.0001)
+    model = DeepFM(feature_columns, feature_columns, dnn_hidden_units=(4,))
+    model.compile('adam', 'binary_crossentropy')
+    generator = SyntheticDataGenerator(feature_columns, chunk_size=32)
+    model.fit(generator.to_dataset(batch_size=16), steps_per_epoch=3, epochs=1, verbose=0)
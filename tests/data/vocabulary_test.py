@@ -0,0 +1,50 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from deepctr.data import build_vocabulary, count_features
+from deepctr.layers import Hash
+
+
+def write_csv(path, num_rows=200):
+    with open(path, 'w') as f:
+        f.write('user_id,item_id,genres\n')
+        for i in range(num_rows):
+            f.write('u%d,i%d,%s\n' % (i % 7, i % 3, 'a|b' if i % 2 else 'c'))
+
+
+@pytest.mark.parametrize(
+    'num_workers',
+    [1, 2]
+)
+def test_count_features(tmpdir, num_workers):
+    path = str(tmpdir.join('data.csv'))
+    write_csv(path)
+    counters = count_features(path, ['user_id', 'genres'], multi_value_sep={'genres': '|'},
+                              num_workers=num_workers, chunksize=16)
+    assert sum(counters['user_id'].values()) == 200
+    assert counters['user_id']['u0'] == 29
+    assert counters['genres'] == {'a': 100, 'b': 100, 'c': 100}
+
+
+def test_build_vocabulary(tmpdir):
+    path = str(tmpdir.join('data.csv'))
+    write_csv(path)
+    output_dir = str(tmpdir.join('vocabulary'))
+    vocabulary = build_vocabulary([path, path], ['user_id', 'item_id'], output_dir, min_freq={'user_id': 58},
+                                  top_k={'item_id': 2}, num_workers=2)
+
+    assert vocabulary['user_id'].vocabulary_size == 4 + 1
+    assert vocabulary['user_id'].num_dropped == 3
+    assert vocabulary['item_id'].vocabulary_size == 2 + 1
+    with open(os.path.join(output_dir, 'vocabulary_size.json')) as f:
+        assert json.load(f) == {'user_id': 5, 'item_id': 3}
+
+    if not hasattr(tf, 'version') or tf.version.VERSION < '2.0.0':
+        return
+    hash_layer = Hash(vocabulary['item_id'].vocabulary_size, vocabulary_path=vocabulary['item_id'].vocabulary_path)
+    ids = hash_layer(tf.constant([['i0'], ['i1'], ['i2']])).numpy()
+    assert np.array_equal(ids, [[1], [2], [0]])
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pytest
+
+from deepctr.data import SharedMemoryBatchLoader, benchmark_throughput
+from deepctr.feature_column import SparseFeat, VarLenSparseFeat, DenseFeat
+from deepctr.models import DeepFM
+
+BATCH_SIZE = 4
+NUM_BATCHES = 5
+FEATURE_COLUMNS = [SparseFeat('user_id', 10), DenseFeat('price', 1),
+                   VarLenSparseFeat(SparseFeat('genres', 5), maxlen=3, combiner='mean')]
+
+
+def batch_fn(epoch, index):
+    if index == NUM_BATCHES - 1 and epoch == 0:
+        time.sleep(0.2)  # the last batch is late
+    rows = 2 if index == NUM_BATCHES - 1 else BATCH_SIZE
+    x = {'user_id': np.full(rows, index), 'price': np.full(rows, epoch * 0.5),
+         'genres': np.tile([[1, 2, 0]], (rows, 1))}
+    return x, np.full(rows, index % 2)
+
+
+def failing_batch_fn(epoch, index):
+    raise ValueError("bad row")
+
+
+@pytest.mark.parametrize(
+    'ordered,copy',
+    [(True, True), (False, True), (True, False)]
+)
+def test_SharedMemoryBatchLoader(ordered, copy):
+    with SharedMemoryBatchLoader(batch_fn, NUM_BATCHES, BATCH_SIZE, FEATURE_COLUMNS, num_workers=2, num_slots=2,
+                                 ordered=ordered, num_epochs=2, copy=copy) as loader:
+        batches = []
+        for epoch in range(2):
+            epoch_batches = [(int(x['user_id'][0, 0]), float(x['price'][0, 0]), len(y)) for x, y in
+                             (loader.next_batch() for _ in range(NUM_BATCHES))]
+            if ordered:
+                assert epoch_batches == [(index, epoch * 0.5, BATCH_SIZE) for index in range(NUM_BATCHES - 1)] + \
+                       [(NUM_BATCHES - 1, epoch * 0.5, 2)]
+            batches += epoch_batches
+    # in unordered mode the late batch of epoch 0 is returned during epoch 1
+    assert sorted(batches) == sorted([(index, epoch * 0.5, 2 if index == NUM_BATCHES - 1 else BATCH_SIZE)
+                                      for epoch in range(2) for index in range(NUM_BATCHES)])
+
+
+def test_SharedMemoryBatchLoader_dataset():
+    model = DeepFM(FEATURE_COLUMNS, FEATURE_COLUMNS, dnn_hidden_units=(4,))
+    model.compile('adam', 'binary_crossentropy')
+    with SharedMemoryBatchLoader(batch_fn, NUM_BATCHES, BATCH_SIZE, FEATURE_COLUMNS, num_workers=2,
+                                 num_epochs=2) as loader:
+        model.fit(loader.to_dataset(), steps_per_epoch=NUM_BATCHES, epochs=2, verbose=0)
+
+
+def test_SharedMemoryBatchLoader_generator_copies():
+    # the batches of the generator outlive their slot even when next_batch returns views
+    with SharedMemoryBatchLoader(batch_fn, NUM_BATCHES, BATCH_SIZE, FEATURE_COLUMNS, num_workers=1, num_slots=1,
+                                 num_epochs=1, copy=False) as loader:
+        batches = list(loader.generator())
+    assert [int(x['user_id'][0, 0]) for x, _ in batches] == list(range(NUM_BATCHES))
+
+
+def test_SharedMemoryBatchLoader_error():
+    with SharedMemoryBatchLoader(failing_batch_fn, NUM_BATCHES, BATCH_SIZE, FEATURE_COLUMNS, num_workers=1) as loader:
+        with pytest.raises(RuntimeError, match="bad row"):
+            loader.next_batch()
+
+
+def test_benchmark_throughput():
+    result = benchmark_throughput(batch_fn, NUM_BATCHES, BATCH_SIZE, FEATURE_COLUMNS, num_workers_list=(1, 2))
+    assert list(result.keys()) == [0, 1, 2]
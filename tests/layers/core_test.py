@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import tensorflow as tf
 
@@ -42,6 +43,112 @@ def test_DNN(hidden_units, use_bn):
                        BATCH_SIZE, EMBEDDING_SIZE))
 
 
+@pytest.mark.parametrize(
+    'hidden_units,use_bn,per_expert_input',
+    [((3,), False, False), ((4, 3), True, True)]
+)
+def test_ExpertDNN(hidden_units, use_bn, per_expert_input):
+    num_experts = 3
+    input_shape = (BATCH_SIZE, num_experts, EMBEDDING_SIZE) if per_expert_input else (BATCH_SIZE, EMBEDDING_SIZE)
+    with CustomObjectScope({'ExpertDNN': layers.ExpertDNN}):
+        layer_test(layers.ExpertDNN, kwargs={'hidden_units': hidden_units, 'num_experts': num_experts,
+                                             'use_bn': use_bn, 'dropout_rate': 0.5}, input_shape=input_shape)
+
+    layer = layers.ExpertDNN(hidden_units, num_experts)
+    inputs = np.random.random(input_shape).astype('float32')
+    output = layer(inputs).numpy()
+    for e in range(num_experts):
+        x = inputs[:, e] if per_expert_input else inputs
+        for kernel, bias in zip(layer.kernels, layer.bias):
+            x = np.maximum(np.dot(x, kernel.numpy()[e]) + bias.numpy()[e], 0)
+        np.testing.assert_allclose(output[:, e], x, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    'activation',
+    [Dice, PReLU]
+)
+def test_ExpertDNN_activation_layer(activation):
+    layer = layers.ExpertDNN((4, 3), 2, activation=activation, use_bn=True)
+    output = layer(np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32'), training=True)
+    assert tuple(output.shape) == (BATCH_SIZE, 2, 3)
+
+
+def test_ExpertDNN_dice():
+    num_experts = 3
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    gates = layers.ExpertGate(num_experts, 2, top_k=1)(inputs).numpy()
+    layer = layers.ExpertDNN((4,), num_experts, activation='dice')
+    output = layer([inputs, gates], training=True).numpy()
+    assert len(layer.trainable_weights) == 2 + num_experts
+
+    # every expert has its own Dice, normalized once by the statistics of its outputs over the whole batch
+    fc = np.matmul(inputs, layer.kernels[0].numpy()) + layer.bias[0].numpy()[:, None]
+    expected = np.zeros((BATCH_SIZE, num_experts, 4), dtype='float32')
+    for e, dice in enumerate(layer.activation_layers[0]):
+        mean, var = fc[e].mean(axis=0), fc[e].var(axis=0)
+        p = 1 / (1 + np.exp(-(fc[e] - mean) / np.sqrt(var + dice.bn.epsilon)))
+        expected[:, e] = dice.alphas.numpy() * (1 - p) * fc[e] + p * fc[e]
+        np.testing.assert_allclose(dice.bn.moving_mean.numpy(), (1 - dice.bn.momentum) * mean, rtol=1e-4, atol=1e-6)
+    np.testing.assert_allclose(output, np.matmul(gates, expected), rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    'num_gates,per_gate_input',
+    [(1, False), (2, False), (2, True)]
+)
+def test_ExpertGate(num_gates, per_gate_input):
+    num_experts = 4
+    input_shape = (BATCH_SIZE, num_gates, EMBEDDING_SIZE) if per_gate_input else (BATCH_SIZE, EMBEDDING_SIZE)
+    with CustomObjectScope({'ExpertGate': layers.ExpertGate}):
+        layer_test(layers.ExpertGate, kwargs={'num_experts': num_experts, 'num_gates': num_gates},
+                   input_shape=input_shape)
+
+    layer = layers.ExpertGate(num_experts, num_gates)
+    inputs = np.random.random(input_shape).astype('float32')
+    output = layer(inputs).numpy()
+    for g in range(num_gates):
+        logits = np.dot(inputs[:, g] if per_gate_input else inputs, layer.kernel.numpy()[g])
+        expected = np.exp(logits) / np.exp(logits).sum(axis=-1, keepdims=True)
+        np.testing.assert_allclose(output[:, g], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_ExpertGate_top_k():
+    num_experts, num_gates = 4, 2
+    with CustomObjectScope({'ExpertGate': layers.ExpertGate}):
+        layer_test(layers.ExpertGate, kwargs={'num_experts': num_experts, 'num_gates': num_gates, 'top_k': 2,
+                                              'load_balance_weight': 0.01}, input_shape=(BATCH_SIZE, EMBEDDING_SIZE))
+
+    layer = layers.ExpertGate(num_experts, num_gates, top_k=2, load_balance_weight=0.01)
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    assert len(layer.losses) == 2  # the kernel regularization and the load balancing
+    np.testing.assert_array_equal((output > 0).sum(axis=-1), 2)
+    np.testing.assert_allclose(output.sum(axis=-1), 1, rtol=1e-5)
+    logits = np.einsum('bd,gde->bge', inputs, layer.kernel.numpy())
+    np.testing.assert_array_equal(output > 0, logits >= np.sort(logits, axis=-1)[..., -2:-1])
+
+
+def test_ExpertGate_invalid_top_k():
+    with pytest.raises(ValueError):
+        layers.ExpertGate(4, top_k=5)
+
+
+@pytest.mark.parametrize(
+    'per_expert_input',
+    [False, True]
+)
+def test_ExpertDNN_sparse_gates(per_expert_input):
+    num_experts, num_gates = 4, 2
+    input_shape = (BATCH_SIZE, num_experts, EMBEDDING_SIZE) if per_expert_input else (BATCH_SIZE, EMBEDDING_SIZE)
+    inputs = np.random.random(input_shape).astype('float32')
+    gates = layers.ExpertGate(num_experts, num_gates, top_k=2)(np.random.random(
+        (BATCH_SIZE, EMBEDDING_SIZE)).astype('float32'))
+    layer = layers.ExpertDNN((4, 3), num_experts)
+    output = layer([inputs, gates]).numpy()
+    np.testing.assert_allclose(output, np.matmul(gates.numpy(), layer(inputs).numpy()), rtol=1e-5, atol=1e-6)
+
+
 @pytest.mark.parametrize(
     'task,use_bias',
     [(task, use_bias)
@@ -1,3 +1,6 @@
+import itertools
+
+import numpy as np
 import pytest
 
 from keras.utils import CustomObjectScope
@@ -27,6 +30,16 @@ def test_FwFM(reg_strength):
                    input_shape=(BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE))
 
 
+def test_FwFM_pairwise():
+    layer = layers.FwFMLayer(num_fields=FIELD_SIZE)
+    inputs = np.random.random((BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    r = layer.field_strengths.numpy()
+    expected = sum(r[i, j] * np.sum(inputs[:, i] * inputs[:, j], axis=-1, keepdims=True)
+                   for i, j in itertools.combinations(range(FIELD_SIZE), 2))
+    np.testing.assert_allclose(output, expected, rtol=1e-5)
+
+
 @pytest.mark.parametrize(
 
     'layer_num',
@@ -40,6 +53,88 @@ def test_CrossNet(layer_num, ):
             'layer_num': layer_num, }, input_shape=(2, 3))
 
 
+@pytest.mark.parametrize(
+    'parameterization',
+    ['vector', 'matrix', 'low_rank']
+)
+def test_CrossNet_parameterization(parameterization):
+    with CustomObjectScope({'CrossNet': layers.CrossNet}):
+        layer_test(layers.CrossNet, kwargs={'layer_num': 2, 'parameterization': parameterization, 'low_rank': 2},
+                   input_shape=(BATCH_SIZE, EMBEDDING_SIZE))
+
+    layer = layers.CrossNet(2, parameterization=parameterization, low_rank=2)
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    x_l = inputs
+    for i in range(2):
+        bias = layer.bias[i].numpy()[:, 0]
+        if parameterization == 'vector':
+            x_l = inputs * np.dot(x_l, layer.kernels[i].numpy()) + bias + x_l
+        else:
+            if parameterization == 'matrix':
+                kernel = layer.kernels[i].numpy()
+            else:
+                kernel = np.dot(layer.U_list[i].numpy(), layer.V_list[i].numpy().T)
+            x_l = inputs * (np.dot(x_l, kernel.T) + bias) + x_l
+    np.testing.assert_allclose(output, x_l, rtol=1e-5, atol=1e-5)
+
+
+def test_CrossNet_invalid_parameterization():
+    with pytest.raises(ValueError):
+        layers.CrossNet(parameterization='tensor')
+
+
+@pytest.mark.parametrize(
+    'num_experts',
+    [1, 3]
+)
+def test_CrossNetMix(num_experts):
+    with CustomObjectScope({'CrossNetMix': layers.CrossNetMix}):
+        layer_test(layers.CrossNetMix, kwargs={'low_rank': 2, 'num_experts': num_experts, 'layer_num': 2},
+                   input_shape=(BATCH_SIZE, EMBEDDING_SIZE))
+
+    layer = layers.CrossNetMix(low_rank=2, num_experts=num_experts, layer_num=2)
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    x_l = inputs
+    for i in range(2):
+        gating = np.exp(np.dot(x_l, layer.gating_kernel.numpy()))
+        gating /= gating.sum(axis=1, keepdims=True)
+        moe_out = 0
+        for e in range(num_experts):
+            v_x = np.tanh(np.dot(x_l, layer.V_list[i].numpy()[e]))
+            v_x = np.tanh(np.dot(v_x, layer.C_list[i].numpy()[e].T))
+            expert_out = inputs * (np.dot(v_x, layer.U_list[i].numpy()[e].T) + layer.bias[i].numpy()[:, 0])
+            moe_out = moe_out + expert_out * gating[:, e:e + 1]
+        x_l = moe_out + x_l
+    np.testing.assert_allclose(output, x_l, rtol=1e-5, atol=1e-6)
+
+
+def test_CrossNetMix_top_k():
+    num_experts, top_k = 4, 2
+    with CustomObjectScope({'CrossNetMix': layers.CrossNetMix}):
+        layer_test(layers.CrossNetMix, kwargs={'low_rank': 2, 'num_experts': num_experts, 'layer_num': 2,
+                                               'top_k': top_k, 'load_balance_weight': 0.01},
+                   input_shape=(BATCH_SIZE, EMBEDDING_SIZE))
+
+    layer = layers.CrossNetMix(low_rank=2, num_experts=num_experts, layer_num=2, top_k=top_k)
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    x_l = inputs
+    for i in range(2):
+        logits = np.dot(x_l, layer.gating_kernel.numpy())
+        gating = np.where(logits >= np.sort(logits, axis=1)[:, -top_k:-top_k + 1], np.exp(logits), 0)
+        gating /= gating.sum(axis=1, keepdims=True)
+        moe_out = 0
+        for e in range(num_experts):
+            v_x = np.tanh(np.dot(x_l, layer.V_list[i].numpy()[e]))
+            v_x = np.tanh(np.dot(v_x, layer.C_list[i].numpy()[e].T))
+            expert_out = inputs * (np.dot(v_x, layer.U_list[i].numpy()[e].T) + layer.bias[i].numpy()[:, 0])
+            moe_out = moe_out + expert_out * gating[:, e:e + 1]
+        x_l = moe_out + x_l
+    np.testing.assert_allclose(output, x_l, rtol=1e-5, atol=1e-6)
+
+
 # def test_CrossNet_invalid():
 #     with pytest.raises(ValueError):
 #         with CustomObjectScope({'CrossNet': layers.CrossNet}):
@@ -71,12 +166,65 @@ def test_OutterProductLayer(kernel_type):
             'kernel_type': kernel_type}, input_shape=[(BATCH_SIZE, 1, EMBEDDING_SIZE)] * FIELD_SIZE)
 
 
+@pytest.mark.parametrize(
+    'kernel_type',
+    ['mat', 'vec', 'num']
+)
+def test_OutterProductLayer_pairwise(kernel_type):
+    layer = layers.OutterProductLayer(kernel_type)
+    inputs = [np.random.random((BATCH_SIZE, 1, EMBEDDING_SIZE)).astype('float32') for _ in range(FIELD_SIZE)]
+    output = layer(inputs).numpy()
+    kernel = layer.kernel.numpy()
+    expected = []
+    for pair, (i, j) in enumerate(itertools.combinations(range(FIELD_SIZE), 2)):
+        p, q = inputs[i][:, 0], inputs[j][:, 0]
+        if kernel_type == 'mat':
+            expected.append(np.sum(np.dot(p, kernel[:, pair].T) * q, axis=-1))
+        else:
+            expected.append(np.sum(p * q * kernel[pair], axis=-1))
+    np.testing.assert_allclose(output, np.stack(expected, axis=1), rtol=1e-5)
+    inner = layers.InnerProductLayer()(inputs).numpy()
+    expected = np.stack([np.sum(inputs[i][:, 0] * inputs[j][:, 0], axis=-1)
+                         for i, j in itertools.combinations(range(FIELD_SIZE), 2)], axis=1)
+    np.testing.assert_allclose(inner[:, :, 0], expected, rtol=1e-5)
+
+
 def test_BiInteractionPooling():
     with CustomObjectScope({'BiInteractionPooling': layers.BiInteractionPooling}):
         layer_test(layers.BiInteractionPooling, kwargs={},
                    input_shape=(BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE))
 
 
+@pytest.mark.parametrize(
+    'use_bias',
+    [True, False]
+)
+def test_FieldWiseBiInteraction(use_bias):
+    group_sizes = [1, 3, 2]
+    with CustomObjectScope({'FieldWiseBiInteraction': layers.FieldWiseBiInteraction}):
+        layer_test(layers.FieldWiseBiInteraction, kwargs={'use_bias': use_bias},
+                   input_shape=[(BATCH_SIZE, size, EMBEDDING_SIZE) for size in group_sizes])
+
+    groups = [np.random.random((BATCH_SIZE, size, EMBEDDING_SIZE)).astype('float32') for size in group_sizes]
+    layer = layers.FieldWiseBiInteraction(use_bias=use_bias)
+    layer(groups)
+    layer.set_weights([np.random.random(w.shape).astype('float32') for w in layer.get_weights()])
+    field_wise_vectors = [group.sum(axis=1) for group in groups]
+    kernel_mf, kernel_fm = layer.kernel_mf.numpy()[:, 0], layer.kernel_fm.numpy()[:, 0]
+    expected = sum(w * field_wise_vectors[i] * field_wise_vectors[j] for w, (i, j) in
+                   zip(kernel_mf, itertools.combinations(range(len(groups)), 2)))
+    expected += sum(w * (np.square(group.sum(axis=1)) - np.square(group).sum(axis=1))
+                    for w, group in zip(kernel_fm, groups))
+    if use_bias:
+        expected += layer.bias_mf.numpy() + layer.bias_fm.numpy()
+    np.testing.assert_allclose(layer(groups).numpy(), expected, rtol=1e-5)
+
+    # the dict of per feature embeddings returned by input_from_feature_columns(support_group=True)
+    group_dict = dict(('group_%d' % g, [group[:, i:i + 1] for i in range(group.shape[1])])
+                      for g, group in enumerate(groups))
+    np.testing.assert_allclose(layer(group_dict).numpy(), expected, rtol=1e-5)
+
+
 def test_FM():
     with CustomObjectScope({'FM': layers.FM}):
         layer_test(layers.FM, kwargs={}, input_shape=(
@@ -89,6 +237,24 @@ def test_AFMLayer():
             BATCH_SIZE, 1, EMBEDDING_SIZE)] * FIELD_SIZE)
 
 
+def test_AFMLayer_score():
+    inputs = [np.random.random((BATCH_SIZE, 1, EMBEDDING_SIZE)).astype('float32') for _ in range(FIELD_SIZE)]
+    layer = layers.AFMLayer()
+    output = layer(inputs).numpy()
+    score_layer = layers.AFMLayer(return_score=True)
+    score_layer(inputs)
+    score_layer.set_weights(layer.get_weights())
+    score = score_layer(inputs).numpy()
+    assert score.shape == (BATCH_SIZE, FIELD_SIZE * (FIELD_SIZE - 1) // 2, 1)
+    np.testing.assert_allclose(score.sum(axis=1), 1, rtol=1e-5)
+
+    bi_interaction = np.concatenate([inputs[i] * inputs[j] for i, j in itertools.combinations(range(FIELD_SIZE), 2)],
+                                    axis=1)
+    expected = np.dot(np.sum(score * bi_interaction, axis=1), layer.projection_p.numpy())
+    np.testing.assert_allclose(output, expected, rtol=1e-5)
+    assert not hasattr(layer, 'normalized_att_score')
+
+
 @pytest.mark.parametrize(
     'layer_size,split_half',
     [((10,), False), ((10, 8), True)
@@ -100,6 +266,34 @@ def test_CIN(layer_size, split_half):
             BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE))
 
 
+@pytest.mark.parametrize(
+    'layer_size,split_half,filter_rank',
+    [((10,), False, None), ((10, 8), True, None), ((10, 8), True, 2)
+     ]
+)
+def test_CIN_feature_maps(layer_size, split_half, filter_rank):
+    layer = layers.CIN(layer_size, activation='linear', split_half=split_half, filter_rank=filter_rank)
+    inputs = np.random.random((BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+
+    hidden, outputs = inputs, []
+    for idx, size in enumerate(layer_size):
+        if filter_rank is None:
+            kernel = layer.filters[idx].numpy()[0].reshape((FIELD_SIZE, hidden.shape[1], size))
+        else:
+            filter_u, filter_v = [w.numpy() for w in layer.filters[idx]]
+            kernel = np.einsum('mrs,hrs->mhs', filter_u.reshape((FIELD_SIZE, filter_rank, size)),
+                               filter_v.reshape((hidden.shape[1], filter_rank, size)))
+        # batch * size * embedding_size
+        feature_maps = np.einsum('bmd,bhd,mhs->bsd', inputs, hidden, kernel) + layer.bias[idx].numpy()[:, None]
+        if split_half and idx != len(layer_size) - 1:
+            hidden, direct_connect = feature_maps[:, :size // 2], feature_maps[:, size // 2:]
+        else:
+            hidden, direct_connect = feature_maps, feature_maps
+        outputs.append(direct_connect.sum(axis=-1))
+    np.testing.assert_allclose(output, np.concatenate(outputs, axis=1), rtol=1e-4, atol=1e-5)
+
+
 # @pytest.mark.parametrize(
 #     'layer_size',
 #     [(), (3, 10)
@@ -123,6 +317,49 @@ def test_InteractingLayer(head_num, use_res, ):
             BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE))
 
 
+@pytest.mark.parametrize(
+    'fused_qkv,field_rank',
+    [(False, None), (True, None), (True, 2)]
+)
+def test_InteractingLayer_heads(fused_qkv, field_rank):
+    head_num, att_embedding_size = 2, 3
+    with CustomObjectScope({'InteractingLayer': layers.InteractingLayer}):
+        layer_test(layers.InteractingLayer,
+                   kwargs={'head_num': head_num, 'att_embedding_size': att_embedding_size, 'scaling': True,
+                           'fused_qkv': fused_qkv, 'field_rank': field_rank},
+                   input_shape=(BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE))
+
+    layer = layers.InteractingLayer(att_embedding_size, head_num, scaling=True, fused_qkv=fused_qkv,
+                                    field_rank=field_rank)
+    inputs = np.random.random((BATCH_SIZE, FIELD_SIZE, EMBEDDING_SIZE)).astype('float32')
+    output = layer(inputs).numpy()
+    if fused_qkv:
+        w_q, w_k, w_v = np.split(layer.W_QKV.numpy().reshape((EMBEDDING_SIZE, 3, -1)), 3, axis=1)
+        w_q, w_k, w_v = w_q[:, 0], w_k[:, 0], w_v[:, 0]
+    else:
+        w_q, w_k, w_v = layer.W_Query.numpy(), layer.W_key.numpy(), layer.W_Value.numpy()
+    score_layer = layers.InteractingLayer(att_embedding_size, head_num, scaling=True, fused_qkv=fused_qkv,
+                                          field_rank=field_rank, return_score=True)
+    score_layer(inputs)
+    score_layer.set_weights(layer.get_weights())
+    score = score_layer(inputs).numpy()
+    assert score.shape == (BATCH_SIZE, head_num, FIELD_SIZE, field_rank or FIELD_SIZE)
+    assert not hasattr(layer, 'normalized_att_scores')
+    heads = []
+    for h in range(head_num):
+        cols = slice(h * att_embedding_size, (h + 1) * att_embedding_size)
+        q, k, v = np.dot(inputs, w_q[:, cols]), np.dot(inputs, w_k[:, cols]), np.dot(inputs, w_v[:, cols])
+        if field_rank is not None:
+            k = np.einsum('rf,bfd->brd', layer.key_projection.numpy(), k)
+            v = np.einsum('rf,bfd->brd', layer.value_projection.numpy(), v)
+        scores = np.exp(np.einsum('bfd,bgd->bfg', q, k) / np.sqrt(att_embedding_size))
+        scores /= scores.sum(axis=-1, keepdims=True)
+        np.testing.assert_allclose(score[:, h], scores, rtol=1e-5, atol=1e-6)
+        heads.append(np.einsum('bfg,bgd->bfd', scores, v))
+    expected = np.maximum(np.concatenate(heads, axis=-1) + np.dot(inputs, layer.W_Res.numpy()), 0)
+    np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-6)
+
+
 def test_FGCNNLayer():
     with CustomObjectScope({'FGCNNLayer': layers.FGCNNLayer}):
         layer_test(layers.FGCNNLayer, kwargs={'filters': (4, 6,), 'kernel_width': (7, 7,)}, input_shape=(
@@ -144,3 +381,51 @@ def test_BilinearInteraction(bilinear_type):
     with CustomObjectScope({'BilinearInteraction': layers.BilinearInteraction}):
         layer_test(layers.BilinearInteraction, kwargs={'bilinear_type': bilinear_type}, input_shape=[(
             BATCH_SIZE, 1, EMBEDDING_SIZE)] * FIELD_SIZE)
+
+
+@pytest.mark.parametrize(
+    'bilinear_type',
+    ['all', 'each', 'interaction'
+     ]
+)
+def test_BilinearInteraction_pairwise(bilinear_type):
+    layer = layers.BilinearInteraction(bilinear_type)
+    inputs = [np.random.random((BATCH_SIZE, 1, EMBEDDING_SIZE)).astype('float32') for _ in range(FIELD_SIZE)]
+    output = layer(inputs).numpy()
+    pairs = list(itertools.combinations(range(FIELD_SIZE), 2))
+    if bilinear_type == 'all':
+        weights = [layer.W.numpy()] * len(pairs)
+    elif bilinear_type == 'each':
+        weights = [layer.W.numpy()[i] for i, _ in pairs]
+    else:
+        weights = list(layer.W.numpy())
+    expected = np.concatenate([np.dot(inputs[i], w) * inputs[j] for (i, j), w in zip(pairs, weights)], axis=1)
+    np.testing.assert_allclose(output, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize(
+    'reduce_sum',
+    [True, False]
+)
+def test_FieldAwareEmbedding(reduce_sum):
+    vocabulary_sizes = [5, 7, 6]
+    layer = layers.FieldAwareEmbedding(['a', 'b', 'seq'], vocabulary_sizes, EMBEDDING_SIZE,
+                                       combiners=[None, None, 'mean'], reduce_sum=reduce_sum)
+    inputs = [np.random.randint(0, 5, (BATCH_SIZE, 1)), np.random.randint(0, 7, (BATCH_SIZE, 1)),
+              np.random.randint(0, 6, (BATCH_SIZE, SEQ_LENGTH))]
+    inputs[2][:, 0] = 1
+    output = layer(inputs).numpy()
+
+    tables = [table.numpy() for table in layer.tables]
+    copies = [tables[0][inputs[0][:, 0]], tables[1][inputs[1][:, 0]]]
+    mask = (inputs[2] != 0)[:, :, None, None]
+    copies.append((tables[2][inputs[2]] * mask).sum(axis=1) / mask.sum(axis=1))  # batch * 3 * embedding_size
+    expected = np.stack([copies[i][:, j] * copies[j][:, i] for i, j in itertools.combinations(range(3), 2)], axis=1)
+    if reduce_sum:
+        expected = expected.sum(axis=-1, keepdims=True)
+    np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-7)
+
+    config_layer = layers.FieldAwareEmbedding.from_config(layer.get_config())
+    config_layer(inputs)
+    config_layer.set_weights(layer.get_weights())
+    np.testing.assert_allclose(config_layer(inputs).numpy(), output, rtol=1e-6)
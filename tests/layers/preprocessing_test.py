@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from keras.utils import CustomObjectScope
+
+from deepctr import layers
+from tests.utils import layer_test
+
+BATCH_SIZE = 5
+DIMENSION = 2
+
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [{'log1p': True, 'clip_max': 2.0},
+     {'offset': 5.0, 'scale': 2.0},
+     {'boundaries': [2.0, 5.0, 8.0]},
+     {'offset': 5.0, 'scale': 5.0, 'boundaries': [-0.5, 0.5], 'bucket_output': 'one_hot'}]
+)
+def test_DenseTransform(kwargs):
+    with CustomObjectScope({'DenseTransform': layers.DenseTransform}):
+        layer_test(layers.DenseTransform, kwargs=kwargs, input_shape=(BATCH_SIZE, DIMENSION))
+
+
+def test_DenseTransform_values():
+    x = np.array([[-1.0], [0.0], [2.0], [9.0], [100.0]], dtype=np.float32)
+    with CustomObjectScope({'DenseTransform': layers.DenseTransform}):
+        layer_test(layers.DenseTransform, kwargs={'clip_max': 10.0, 'boundaries': [0.0, 2.0, 9.5]}, input_data=x,
+                   expected_output=np.array([[0.0], [1.0], [2.0], [2.0], [3.0]]))
+        layer_test(layers.DenseTransform, kwargs={'log1p': True, 'offset': 1.0, 'scale': 2.0}, input_data=x,
+                   expected_output=(np.log1p(np.maximum(x, 0)) - 1.0) / 2.0)
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from packaging import version
 
@@ -50,6 +51,47 @@ def test_SequencePoolingLayer(mode, supports_masking, input_shape):
                    input_shape=input_shape, supports_masking=supports_masking)
 
 
+@pytest.mark.parametrize(
+    'mode',
+    ['sum', 'mean', 'max']
+)
+def test_SequencePoolingLayer_lengths(mode):
+    seq = np.random.random((BATCH_SIZE, SEQ_LENGTH, EMBEDDING_SIZE)).astype('float32')
+    lengths = np.array([[0], [1], [SEQ_LENGTH // 2], [SEQ_LENGTH]])
+    output = sequence.SequencePoolingLayer(mode)([seq, lengths]).numpy()
+    masked = sequence.SequencePoolingLayer(mode, supports_masking=True)(
+        seq, mask=tf.constant(np.arange(SEQ_LENGTH)[None] < lengths)).numpy()
+
+    mask = (np.arange(SEQ_LENGTH)[None] < lengths)[:, :, None]
+    if mode == 'max':
+        expected = np.max(seq - (1 - mask) * 1e9, axis=1, keepdims=True)
+    else:
+        expected = np.sum(seq * mask, axis=1, keepdims=True)
+        if mode == 'mean':
+            expected /= lengths[:, :, None] + 1e-8
+    np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(masked, expected, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    'weight_normalization',
+    [True, False]
+)
+def test_WeightedSequenceLayer_lengths(weight_normalization):
+    seq = np.random.random((BATCH_SIZE, SEQ_LENGTH, EMBEDDING_SIZE)).astype('float32')
+    weight = np.random.random((BATCH_SIZE, SEQ_LENGTH, 1)).astype('float32')
+    lengths = np.random.randint(1, SEQ_LENGTH + 1, (BATCH_SIZE, 1))
+    output = sequence.WeightedSequenceLayer(weight_normalization)([seq, lengths, weight]).numpy()
+
+    mask = (np.arange(SEQ_LENGTH)[None] < lengths)[:, :, None]
+    if weight_normalization:
+        weight = np.where(mask, np.exp(weight), 0)
+        weight /= weight.sum(axis=1, keepdims=True)
+    else:
+        weight = weight * mask
+    np.testing.assert_allclose(output, seq * weight, rtol=1e-5, atol=1e-6)
+
+
 # @pytest.mark.parametrize(
 #
 #     'supports_masking,input_shape',
@@ -82,7 +124,7 @@ def test_BiLSTM(merge_mode):
 
 @pytest.mark.parametrize(
     'attention_type',
-    ['scaled_dot_product', 'cos', 'ln', 'additive']
+    ['scaled_dot_product', 'cos', 'ln', 'additive', 'linear']
 )
 def test_Transformer(attention_type):
     with CustomObjectScope({'Transformer': sequence.Transformer}):
@@ -93,6 +135,84 @@ def test_Transformer(attention_type):
                                 (BATCH_SIZE, 1), (BATCH_SIZE, 1)])
 
 
+@pytest.mark.parametrize(
+    'blinding,fused_qkv',
+    [(False, False), (True, False), (True, True)]
+)
+def test_Transformer_masks(blinding, fused_qkv):
+    head_num, att_embedding_size = 2, EMBEDDING_SIZE // 2
+    layer = sequence.Transformer(att_embedding_size, head_num, use_positional_encoding=False, use_res=False,
+                                 use_feed_forward=False, blinding=blinding, output_type=None, fused_qkv=fused_qkv)
+    seq = np.random.random((BATCH_SIZE, SEQ_LENGTH, EMBEDDING_SIZE)).astype('float32')
+    lengths = np.random.randint(1, SEQ_LENGTH + 1, (BATCH_SIZE, 1))
+    output = layer([seq, seq, lengths, lengths]).numpy()
+
+    if fused_qkv:
+        w_q, w_k, w_v = np.split(layer.W_QKV.numpy(), 3, axis=1)
+    else:
+        w_q, w_k, w_v = layer.W_Query.numpy(), layer.W_key.numpy(), layer.W_Value.numpy()
+    mask = np.arange(SEQ_LENGTH)[None] < lengths  # batch_size T
+    for h in range(head_num):
+        head = slice(h * att_embedding_size, (h + 1) * att_embedding_size)
+        scores = np.matmul(np.dot(seq, w_q[:, head]), np.dot(seq, w_k[:, head]).transpose((0, 2, 1)))
+        scores = np.where(mask[:, None, :], scores / att_embedding_size ** 0.5, -2 ** 32 + 1)
+        if blinding:
+            scores[:, np.arange(SEQ_LENGTH), np.arange(SEQ_LENGTH)] = -2 ** 32 + 1
+        att = np.exp(scores - scores.max(axis=-1, keepdims=True))
+        att /= att.sum(axis=-1, keepdims=True)
+        expected = np.matmul(att, np.dot(seq, w_v[:, head])) * mask[:, :, None]
+        np.testing.assert_allclose(output[:, :, head], expected, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    'blinding',
+    [False, True]
+)
+def test_Transformer_linear(blinding):
+    head_num, att_embedding_size = 2, EMBEDDING_SIZE // 2
+    layer = sequence.Transformer(att_embedding_size, head_num, use_positional_encoding=False, use_res=False,
+                                 use_feed_forward=False, blinding=blinding, output_type=None, attention_type='linear')
+    seq = np.random.random((BATCH_SIZE, SEQ_LENGTH, EMBEDDING_SIZE)).astype('float32')
+    lengths = np.random.randint(1, SEQ_LENGTH + 1, (BATCH_SIZE, 1))
+    lengths[0] = 1
+    output = layer([seq, seq, lengths, lengths]).numpy()
+
+    def phi(x):
+        return np.where(x > 0, x + 1, np.exp(x))
+
+    mask = np.arange(SEQ_LENGTH)[None] < lengths  # batch_size T
+    for h in range(head_num):
+        head = slice(h * att_embedding_size, (h + 1) * att_embedding_size)
+        # the quadratic form of the linear attention
+        scores = np.matmul(phi(np.dot(seq, layer.W_Query.numpy()[:, head])),
+                           phi(np.dot(seq, layer.W_key.numpy()[:, head])).transpose((0, 2, 1))) * mask[:, None, :]
+        if blinding:
+            scores[:, np.arange(SEQ_LENGTH), np.arange(SEQ_LENGTH)] = 0
+        # a query without other valid keys attends to nothing
+        total = scores.sum(axis=-1, keepdims=True)
+        att = np.divide(scores, total, out=np.zeros_like(scores), where=total > 0)
+        expected = np.matmul(att, np.dot(seq, layer.W_Value.numpy()[:, head])) * mask[:, :, None]
+        np.testing.assert_allclose(output[:, :, head], expected, rtol=1e-4, atol=1e-5)
+
+    # the outputs stay convex combinations of the values on large inputs
+    output = layer([seq * 30, seq * 30, lengths, lengths]).numpy()
+    values = np.dot(seq * 30, layer.W_Value.numpy())
+    assert np.all(np.isfinite(output))
+    assert np.abs(output).max() <= np.abs(values).max() * (1 + 1e-4)
+    if blinding:
+        np.testing.assert_array_equal(output[0], 0)
+
+
+def test_Transformer_linear_blinding_length():
+    layer = sequence.Transformer(EMBEDDING_SIZE // 2, 2, use_positional_encoding=False, blinding=True,
+                                 attention_type='linear')
+    queries = np.random.random((BATCH_SIZE, SEQ_LENGTH, EMBEDDING_SIZE)).astype('float32')
+    keys = np.random.random((BATCH_SIZE, SEQ_LENGTH + 1, EMBEDDING_SIZE)).astype('float32')
+    lengths = np.ones((BATCH_SIZE, 1), dtype='int32')
+    with pytest.raises(ValueError):
+        layer([queries, keys, lengths, lengths])
+
+
 def test_KMaxPooling():
     with CustomObjectScope({'KMaxPooling': sequence.KMaxPooling}):
         layer_test(sequence.KMaxPooling, kwargs={'k': 3, 'axis': 1},
@@ -2,7 +2,8 @@ import numpy as np
 import pytest
 import tensorflow as tf
 
-from deepctr.layers.utils import Hash, Linear
+from deepctr.layers.utils import Hash, Linear, dispatch_experts, length_mask, load_balancing_loss, masked_fill, \
+    masked_reduce_max, masked_reduce_sum, top_k_gating
 from tests.layers.interaction_test import BATCH_SIZE, EMBEDDING_SIZE
 from tests.utils import layer_test
 
@@ -34,3 +35,58 @@ def test_Linear():
     with CustomObjectScope({'Linear': Linear}):
         layer_test(Linear,
                    kwargs={'mode': 1, 'use_bias': True}, input_shape=(BATCH_SIZE, EMBEDDING_SIZE))
+
+
+@pytest.mark.parametrize(
+    'mode',
+    [0, 1, 2]
+)
+def test_Linear_units(mode):
+    units, feature_num = 3, 4
+    sparse_input = np.random.random((BATCH_SIZE, 1, feature_num * units)).astype('float32')
+    dense_input = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    inputs = [sparse_input, dense_input, [sparse_input, dense_input]][mode]
+    layer = Linear(mode=mode, units=units)
+    output = layer(inputs).numpy().reshape((BATCH_SIZE, units))
+
+    expected = np.zeros((BATCH_SIZE, units))
+    if mode != 1:
+        expected += sparse_input.reshape((BATCH_SIZE, feature_num, units)).sum(axis=1)
+    if mode != 0:
+        expected += np.dot(dense_input, layer.kernel.numpy())
+    np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_top_k_gating():
+    logits = np.random.random((BATCH_SIZE, 3, 5)).astype('float32')
+    gates = top_k_gating(tf.constant(logits), 2).numpy()
+    kept = logits >= np.sort(logits, axis=-1)[..., -2:-1]
+    expected = np.where(kept, np.exp(logits), 0)
+    np.testing.assert_allclose(gates, expected / expected.sum(axis=-1, keepdims=True), rtol=1e-5, atol=1e-6)
+
+    uniform = tf.constant(np.tile(np.eye(5, dtype='float32'), (2, 1)))
+    np.testing.assert_allclose(load_balancing_loss(uniform, top_k_gating(uniform, 1)).numpy(), 1, rtol=1e-5)
+
+
+def test_dispatch_experts():
+    num_experts = 4
+    inputs = np.random.random((BATCH_SIZE, EMBEDDING_SIZE)).astype('float32')
+    kernels = np.random.random((num_experts, EMBEDDING_SIZE, 3)).astype('float32')
+    gates = top_k_gating(tf.constant(np.random.random((BATCH_SIZE, 2, num_experts)).astype('float32')), 1)
+    output = dispatch_experts(gates, lambda e, index: tf.matmul(tf.gather(inputs, index), kernels[e]), num_experts)
+    expected = np.matmul(gates.numpy(), np.einsum('bd,edu->beu', inputs, kernels))
+    np.testing.assert_allclose(output.numpy(), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_masked_reductions():
+    x = np.random.random((BATCH_SIZE, 5, EMBEDDING_SIZE)).astype('float32')
+    lengths = np.random.randint(0, 6, (BATCH_SIZE, 1))
+    mask = length_mask(tf.constant(lengths), 5)
+    expected_mask = (np.arange(5)[None] < lengths)[:, :, None]
+    np.testing.assert_array_equal(mask.numpy(), expected_mask)
+
+    np.testing.assert_allclose(masked_reduce_sum(x, mask).numpy(), np.sum(x * expected_mask, axis=1, keepdims=True),
+                               rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(masked_reduce_max(x, mask).numpy(),
+                               np.max(x - (1 - expected_mask) * 1e9, axis=1, keepdims=True), rtol=1e-5)
+    np.testing.assert_array_equal(masked_fill(x, mask, 0).numpy(), x * expected_mask)
@@ -8,10 +8,10 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE, get_test_data_estim
 
 
 @pytest.mark.parametrize(
-    'att_layer_num,dnn_hidden_units,sparse_feature_num',
-    [(1, (), 1), (1, (4,), 1)]  # (0, (4,), 2), (2, (4, 4,), 2)
+    'att_layer_num,dnn_hidden_units,sparse_feature_num,att_fused_qkv,att_field_rank',
+    [(1, (), 1, False, None), (1, (4,), 1, False, None), (2, (4,), 2, True, 2)]  # (0, (4,), 2), (2, (4, 4,), 2)
 )
-def test_AutoInt(att_layer_num, dnn_hidden_units, sparse_feature_num):
+def test_AutoInt(att_layer_num, dnn_hidden_units, sparse_feature_num, att_fused_qkv, att_field_rank):
     if version.parse(tf.__version__) >= version.parse("1.14.0") and len(dnn_hidden_units) == 0:  # todo check version
         return
     model_name = "AutoInt"
@@ -20,7 +20,8 @@ def test_AutoInt(att_layer_num, dnn_hidden_units, sparse_feature_num):
                                           dense_feature_num=sparse_feature_num)
 
     model = AutoInt(feature_columns, feature_columns, att_layer_num=att_layer_num,
-                    dnn_hidden_units=dnn_hidden_units, dnn_dropout=0.5, )
+                    dnn_hidden_units=dnn_hidden_units, dnn_dropout=0.5, att_fused_qkv=att_fused_qkv,
+                    att_field_rank=att_field_rank)
     check_model(model, model_name, x, y)
 
 
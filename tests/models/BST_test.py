@@ -1,16 +1,22 @@
+import pytest
+
 from deepctr.models import BST
 from ..utils import check_model
 from .DIN_test import get_xy_fd
 
 
-def test_BST():
+@pytest.mark.parametrize(
+    'att_fused_qkv,attention_type',
+    [(False, 'scaled_dot_product'), (True, 'scaled_dot_product'), (False, 'linear')]
+)
+def test_BST(att_fused_qkv, attention_type):
     model_name = "BST"
 
     x, y, feature_columns, behavior_feature_list = get_xy_fd(hash_flag=True)
 
     model = BST(dnn_feature_columns=feature_columns,
                 history_feature_list=behavior_feature_list,
-                att_head_num=4)
+                att_head_num=4, att_fused_qkv=att_fused_qkv, attention_type=attention_type)
 
     check_model(model, model_name, x, y,
                 check_model_io=True)
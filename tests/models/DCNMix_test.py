@@ -5,18 +5,19 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE
 
 
 @pytest.mark.parametrize(
-    'cross_num,hidden_size,sparse_feature_num',
-    [(0, (8,), 2), (1, (), 1), (1, (8,), 3)
+    'cross_num,hidden_size,sparse_feature_num,gate_top_k',
+    [(0, (8,), 2, None), (1, (), 1, None), (1, (8,), 3, None), (2, (8,), 3, 2)
      ]
 )
-def test_DCNMix(cross_num, hidden_size, sparse_feature_num):
+def test_DCNMix(cross_num, hidden_size, sparse_feature_num, gate_top_k):
     model_name = "DCNMix"
 
     sample_size = SAMPLE_SIZE
     x, y, feature_columns = get_test_data(sample_size, sparse_feature_num=sparse_feature_num,
                                           dense_feature_num=sparse_feature_num)
 
-    model = DCNMix(feature_columns, feature_columns, cross_num=cross_num, dnn_hidden_units=hidden_size, dnn_dropout=0.5)
+    model = DCNMix(feature_columns, feature_columns, cross_num=cross_num, dnn_hidden_units=hidden_size, dnn_dropout=0.5,
+                   gate_top_k=gate_top_k, load_balance_weight=0.01)
     check_model(model, model_name, x, y)
 
 
@@ -8,6 +8,7 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE, get_test_data_estim
     'cross_num,hidden_size,sparse_feature_num,cross_parameterization',
     [(0, (8,), 2, 'vector'), (1, (), 1, 'vector'), (1, (8,), 3, 'vector'),
      (0, (8,), 2, 'matrix'), (1, (), 1, 'matrix'), (1, (8,), 3, 'matrix'),
+     (1, (), 1, 'low_rank'), (2, (8,), 3, 'low_rank'),
      ]
 )
 def test_DCN(cross_num, hidden_size, sparse_feature_num, cross_parameterization):
@@ -18,7 +19,7 @@ def test_DCN(cross_num, hidden_size, sparse_feature_num, cross_parameterization)
                                           dense_feature_num=sparse_feature_num)
 
     model = DCN(feature_columns, feature_columns, cross_num=cross_num, cross_parameterization=cross_parameterization,
-                dnn_hidden_units=hidden_size, dnn_dropout=0.5)
+                dnn_hidden_units=hidden_size, dnn_dropout=0.5, cross_low_rank=2)
     check_model(model, model_name, x, y)
 
 
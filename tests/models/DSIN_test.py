@@ -50,16 +50,16 @@ def get_xy_fd(hash_flag=False):
 
 
 @pytest.mark.parametrize(
-    'bias_encoding',
-    [True, False]
+    'bias_encoding,att_fused_qkv',
+    [(True, False), (False, False), (False, True)]
 )
-def test_DSIN(bias_encoding):
+def test_DSIN(bias_encoding, att_fused_qkv):
     model_name = "DSIN"
 
     x, y, feature_columns, behavior_feature_list = get_xy_fd(True)
 
     model = DSIN(feature_columns, behavior_feature_list, sess_max_count=2, bias_encoding=bias_encoding,
-                 dnn_hidden_units=[4, 4], dnn_dropout=0.5, )
+                 dnn_hidden_units=[4, 4], dnn_dropout=0.5, att_fused_qkv=att_fused_qkv)
     check_model(model, model_name, x, y)
 
 
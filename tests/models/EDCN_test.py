@@ -11,6 +11,7 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE
         ('hadamard_product', 2, 'vector', 4),
         ('concatenation', 1, 'vector', 5),
         ('attention_pooling', 2, 'matrix', 6),
+        ('concatenation', 2, 'low_rank', 3),
     ]
 )
 def test_EDCN(bridge_type, cross_num, cross_parameterization, sparse_feature_num):
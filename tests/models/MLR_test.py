@@ -46,5 +46,15 @@ def test_MLR():
     print(model_name + " test pass!")
 
 
+def test_MLR_single_lookup():
+    region_num = 12
+    _, _, feature_columns = get_test_data(SAMPLE_SIZE, sparse_feature_num=3, dense_feature_num=0, prefix='region')
+    model = MLR(feature_columns, region_num=region_num)
+    embeddings = [w for w in model.weights if 'emb' in w.name]
+    # one table per feature for the regions and one for the learners
+    assert len(embeddings) == 2 * len(feature_columns)
+    assert all(int(w.shape[-1]) == region_num for w in embeddings)
+
+
 if __name__ == "__main__":
     pass
@@ -27,7 +27,11 @@ def test_ESMM():
     check_mtl_model(model, model_name, x, y_list, task_types=['binary', 'binary'])
 
 
-def test_MMOE():
+@pytest.mark.parametrize(
+    'gate_dnn_hidden_units,gate_top_k',
+    [((), None), ((4,), None), ((), 2)]
+)
+def test_MMOE(gate_dnn_hidden_units, gate_top_k):
     if tf.__version__ == "1.15.0":  # slow in tf 1.15
         return
     model_name = "MMOE"
@@ -35,25 +39,28 @@ def test_MMOE():
 
     model = MMOE(dnn_feature_columns, num_experts=3, expert_dnn_hidden_units=(8,),
                  tower_dnn_hidden_units=(8,),
-                 gate_dnn_hidden_units=(), task_types=['binary', 'binary'],
-                 task_names=['income', 'marital'])
+                 gate_dnn_hidden_units=gate_dnn_hidden_units, task_types=['binary', 'binary'],
+                 task_names=['income', 'marital'], gate_top_k=gate_top_k, load_balance_weight=0.01)
     check_mtl_model(model, model_name, x, y_list, task_types=['binary', 'binary'])
 
 
 @pytest.mark.parametrize(
-    'num_levels,gate_dnn_hidden_units',
-    [(2, ()),
-     (1, (4,))]
+    'num_levels,gate_dnn_hidden_units,specific_expert_num,gate_top_k',
+    [(2, (), 1, None),
+     (1, (4,), 1, None),
+     (3, (4,), 2, None),
+     (2, (), 2, 2)]
 )
-def test_PLE(num_levels, gate_dnn_hidden_units):
+def test_PLE(num_levels, gate_dnn_hidden_units, specific_expert_num, gate_top_k):
     if tf.__version__ == "1.15.0":  # slow in tf 1.15
         return
     model_name = "PLE"
     x, y_list, dnn_feature_columns = get_mtl_test_data()
 
     model = PLE(dnn_feature_columns, num_levels=num_levels, expert_dnn_hidden_units=(8,), tower_dnn_hidden_units=(8,),
-                gate_dnn_hidden_units=gate_dnn_hidden_units,
-                task_types=['binary', 'binary'], task_names=['income', 'marital'])
+                gate_dnn_hidden_units=gate_dnn_hidden_units, specific_expert_num=specific_expert_num,
+                task_types=['binary', 'binary'], task_names=['income', 'marital'], gate_top_k=gate_top_k,
+                load_balance_weight=0.01)
     check_mtl_model(model, model_name, x, y_list, task_types=['binary', 'binary'])
 
 
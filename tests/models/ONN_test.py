@@ -1,6 +1,4 @@
 import pytest
-import tensorflow as tf
-from packaging import version
 
 from deepctr.models import ONN
 from ..utils import check_model, get_test_data, SAMPLE_SIZE
@@ -11,8 +9,6 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE
     [2]
 )
 def test_ONN(sparse_feature_num):
-    if version.parse(tf.__version__) >= version.parse('1.15.0'):
-        return
     model_name = "ONN"
 
     sample_size = SAMPLE_SIZE
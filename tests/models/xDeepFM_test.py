@@ -5,15 +5,17 @@ from ..utils import check_model, get_test_data, SAMPLE_SIZE, get_test_data_estim
 
 
 @pytest.mark.parametrize(
-    'dnn_hidden_units,cin_layer_size,cin_split_half,cin_activation,sparse_feature_num,dense_feature_dim',
+    'dnn_hidden_units,cin_layer_size,cin_split_half,cin_activation,sparse_feature_num,dense_feature_dim,'
+    'cin_filter_rank',
     [  # ((), (), True, 'linear', 1, 2),
-        ((8,), (), True, 'linear', 1, 1),
-        ((), (8,), True, 'linear', 2, 2),
-        ((8,), (8,), False, 'relu', 1, 0)
+        ((8,), (), True, 'linear', 1, 1, None),
+        ((), (8,), True, 'linear', 2, 2, None),
+        ((8,), (8,), False, 'relu', 1, 0, None),
+        ((8,), (8, 8), True, 'relu', 2, 1, 2)
     ]
 )
 def test_xDeepFM(dnn_hidden_units, cin_layer_size, cin_split_half, cin_activation, sparse_feature_num,
-                 dense_feature_dim):
+                 dense_feature_dim, cin_filter_rank):
     model_name = "xDeepFM"
 
     sample_size = SAMPLE_SIZE
@@ -21,7 +23,8 @@ def test_xDeepFM(dnn_hidden_units, cin_layer_size, cin_split_half, cin_activatio
                                           dense_feature_num=sparse_feature_num)
 
     model = xDeepFM(feature_columns, feature_columns, dnn_hidden_units=dnn_hidden_units, cin_layer_size=cin_layer_size,
-                    cin_split_half=cin_split_half, cin_activation=cin_activation, dnn_dropout=0.5)
+                    cin_split_half=cin_split_half, cin_activation=cin_activation, dnn_dropout=0.5,
+                    cin_filter_rank=cin_filter_rank)
     check_model(model, model_name, x, y)
 
 
@@ -1,6 +1,239 @@
-from deepctr.utils import check_version
+import itertools
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from keras.initializers import TruncatedNormal, glorot_normal
+from keras.layers import Concatenate
+from keras.layers import Dense, Flatten, Input, Lambda
+from keras.models import Model
+
+from deepctr.feature_column import build_input_features, input_from_feature_columns
+from deepctr.layers import BilinearInteraction, CrossNetMix, DNN, FEFMLayer, PredictionLayer
+from deepctr.layers.utils import combined_dnn_input
+from deepctr.models.multitask import MMOE, PLE
+from deepctr.utils import check_version, convert_bilinear_weights, convert_crossnetmix_weights, convert_fefm_weights, \
+    convert_mmoe_weights, convert_ple_weights
+from .utils_mtl import get_mtl_test_data
 
 
 def test_check_version():
     check_version('0.1.0')
     check_version(20191231)
+
+
+class PerPairFEFMLayer(FEFMLayer):
+    """FEFMLayer with the former one weight per field pair layout."""
+
+    def build(self, input_shape):
+        embedding_size = int(input_shape[2])
+        self.pairs = list(itertools.combinations(range(int(input_shape[1])), 2))
+        self.pair_weights = [self.add_weight(name='field_embeddings' + str(fi) + "-" + str(fj),
+                                             shape=(embedding_size, embedding_size), initializer=TruncatedNormal())
+                             for fi, fj in self.pairs]
+        self.built = True
+
+    def call(self, inputs, **kwargs):
+        return tf.concat([tf.reduce_sum(tf.matmul(inputs[:, fi], w + tf.transpose(w)) * inputs[:, fj], axis=-1,
+                                        keepdims=True) for (fi, fj), w in zip(self.pairs, self.pair_weights)], axis=1)
+
+
+def build_model(layer_cls):
+    inputs = Input((5, 3))
+    outputs = Dense(1)(Flatten()(layer_cls(regularizer=0.0)(inputs)))
+    return Model(inputs, outputs)
+
+
+def test_convert_fefm_weights(tmpdir):
+    x = np.random.random((4, 5, 3)).astype('float32')
+    legacy = build_model(PerPairFEFMLayer)
+    for path in [str(tmpdir.join('weights.h5')), str(tmpdir.join('model.h5'))]:
+        if path.endswith('weights.h5'):
+            legacy.save_weights(path)
+        else:
+            legacy.save(path)
+        assert convert_fefm_weights(path, path + '.converted') == 1
+        model = build_model(FEFMLayer)
+        model.load_weights(path + '.converted')
+        np.testing.assert_allclose(model.predict(x, verbose=0), legacy.predict(x, verbose=0), rtol=1e-5)
+
+
+class PerPairBilinearInteraction(BilinearInteraction):
+    """BilinearInteraction with the former one weight per field or per field pair layout."""
+
+    def build(self, input_shape):
+        embedding_size = int(input_shape[0][-1])
+        self.pairs = list(itertools.combinations(range(len(input_shape)), 2))
+        if self.bilinear_type == "each":
+            names = [str(i) for i in range(len(input_shape) - 1)]
+        else:
+            names = [str(i) + '_' + str(j) for i, j in self.pairs]
+        self.W_list = [self.add_weight(shape=(embedding_size, embedding_size), initializer=glorot_normal(),
+                                       name="bilinear_weight" + name) for name in names]
+        self.built = True
+
+    def call(self, inputs, **kwargs):
+        if self.bilinear_type == "each":
+            weights = [self.W_list[i] for i, _ in self.pairs]
+        else:
+            weights = self.W_list
+        return tf.concat([tf.matmul(inputs[i], w) * inputs[j] for (i, j), w in zip(self.pairs, weights)], axis=1)
+
+
+def build_bilinear_model(layer_cls, bilinear_type):
+    inputs = [Input((1, 3)) for _ in range(4)]
+    outputs = Dense(1)(Flatten()(Concatenate(axis=1)([layer_cls(bilinear_type)(inputs),
+                                                      BilinearInteraction('all')(inputs)])))
+    return Model(inputs, outputs)
+
+
+@pytest.mark.parametrize(
+    'bilinear_type',
+    ['each', 'interaction']
+)
+def test_convert_bilinear_weights(tmpdir, bilinear_type):
+    x = [np.random.random((4, 1, 3)).astype('float32') for _ in range(4)]
+    legacy = build_bilinear_model(PerPairBilinearInteraction, bilinear_type)
+    for path in [str(tmpdir.join('weights.h5')), str(tmpdir.join('model.h5'))]:
+        if path.endswith('weights.h5'):
+            legacy.save_weights(path)
+        else:
+            legacy.save(path)
+        # the 'all' layer holds a single bilinear_weight and is left as is
+        assert convert_bilinear_weights(path, path + '.converted') == 1
+        model = build_bilinear_model(BilinearInteraction, bilinear_type)
+        model.load_weights(path + '.converted')
+        np.testing.assert_allclose(model.predict(x, verbose=0), legacy.predict(x, verbose=0), rtol=1e-5)
+
+
+
+class PerExpertCrossNetMix(CrossNetMix):
+    """CrossNetMix with the former one gating Dense per expert layout."""
+
+    def build(self, input_shape):
+        super(PerExpertCrossNetMix, self).build(input_shape)
+        self._trainable_weights.remove(self.gating_kernel)
+        self.gating = [Dense(1, use_bias=False) for _ in range(self.num_experts)]
+
+    def call(self, inputs, **kwargs):
+        x_0 = inputs
+        x_l = x_0
+        for i in range(self.layer_num):
+            gating_score_of_experts = tf.nn.softmax(tf.concat([gating(x_l) for gating in self.gating], axis=1))
+            v_x = tf.nn.tanh(tf.einsum('bd,edr->ber', x_l, self.V_list[i]))
+            v_x = tf.nn.tanh(tf.einsum('ers,bes->ber', self.C_list[i], v_x))
+            uv_x = tf.einsum('ber,edr->bed', v_x, self.U_list[i]) + tf.transpose(self.bias[i])
+            x_l = tf.einsum('be,bed->bd', gating_score_of_experts, tf.expand_dims(x_0, axis=1) * uv_x) + x_l
+        return x_l
+
+
+def build_crossnetmix_model(layer_cls):
+    inputs = Input((6,))
+    outputs = Dense(1)(layer_cls(low_rank=2, num_experts=3)(inputs))
+    return Model(inputs, outputs)
+
+
+def test_convert_crossnetmix_weights(tmpdir):
+    x = np.random.random((4, 6)).astype('float32')
+    legacy = build_crossnetmix_model(PerExpertCrossNetMix)
+    for path in [str(tmpdir.join('weights.h5')), str(tmpdir.join('model.h5'))]:
+        if path.endswith('weights.h5'):
+            legacy.save_weights(path)
+        else:
+            legacy.save(path)
+        assert convert_crossnetmix_weights(path, path + '.converted') == 1
+        model = build_crossnetmix_model(CrossNetMix)
+        model.load_weights(path + '.converted')
+        np.testing.assert_allclose(model.predict(x, verbose=0), legacy.predict(x, verbose=0), rtol=1e-5)
+
+def legacy_mmoe(dnn_feature_columns, num_experts, gate_dnn_hidden_units, task_names):
+    """MMOE with the former one layer per expert and per gate layout."""
+    features = build_input_features(dnn_feature_columns)
+    sparse_embedding_list, dense_value_list = input_from_feature_columns(features, dnn_feature_columns, 0.00001, 1024)
+    dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
+    expert_concat = Lambda(lambda x: tf.stack(x, axis=1))(
+        [DNN((8, 4), name='expert_' + str(i))(dnn_input) for i in range(num_experts)])
+    task_outs = []
+    for task_name in task_names:
+        gate_input = DNN(gate_dnn_hidden_units, name='gate_' + task_name)(dnn_input)
+        gate_out = Dense(num_experts, use_bias=False, activation='softmax', name='gate_softmax_' + task_name)(
+            gate_input)
+        mmoe_out = Lambda(lambda x: tf.reduce_sum(x[0] * tf.expand_dims(x[1], axis=-1), axis=1))(
+            [expert_concat, gate_out])
+        tower_output = DNN((4,), name='tower_' + task_name)(mmoe_out)
+        task_outs.append(PredictionLayer('binary', name=task_name)(Dense(1, use_bias=False)(tower_output)))
+    return Model(list(features.values()), task_outs)
+
+
+def legacy_ple(dnn_feature_columns, specific_expert_num, shared_expert_num, num_levels, gate_dnn_hidden_units,
+               task_names):
+    """PLE with the former one layer per expert and per gate layout."""
+    features = build_input_features(dnn_feature_columns)
+    sparse_embedding_list, dense_value_list = input_from_feature_columns(features, dnn_feature_columns, 0.00001, 1024)
+    dnn_input = combined_dnn_input(sparse_embedding_list, dense_value_list)
+
+    def mix(experts, gate_input, name):
+        gate_out = Dense(len(experts), use_bias=False, activation='softmax', name=name)(gate_input)
+        return Lambda(lambda x: tf.reduce_sum(tf.stack(x[:-1], axis=1) * tf.expand_dims(x[-1], axis=-1), axis=1))(
+            experts + [gate_out])
+
+    inputs = [dnn_input] * (len(task_names) + 1)
+    for level in range(num_levels):
+        prefix = 'level_' + str(level) + '_'
+        specific = [[DNN((8, 4), name=prefix + 'task_' + task_name + '_expert_specific_' + str(j))(inputs[i])
+                     for j in range(specific_expert_num)] for i, task_name in enumerate(task_names)]
+        shared = [DNN((8, 4), name=prefix + 'expert_shared_' + str(k))(inputs[-1]) for k in range(shared_expert_num)]
+        outputs = [mix(specific[i] + shared,
+                       DNN(gate_dnn_hidden_units, name=prefix + 'gate_specific_' + task_name)(inputs[i]),
+                       prefix + 'gate_softmax_specific_' + task_name) for i, task_name in enumerate(task_names)]
+        if level < num_levels - 1:
+            outputs.append(mix(sum(specific, []) + shared,
+                               DNN(gate_dnn_hidden_units, name=prefix + 'gate_shared')(inputs[-1]),
+                               prefix + 'gate_softmax_shared'))
+        inputs = outputs
+    task_outs = []
+    for task_name, output in zip(task_names, inputs):
+        tower_output = DNN((4,), name='tower_' + task_name)(output)
+        task_outs.append(PredictionLayer('binary', name=task_name)(Dense(1, use_bias=False)(tower_output)))
+    return Model(list(features.values()), task_outs)
+
+
+def assert_converted(legacy, build, convert, x, tmpdir):
+    for path in [str(tmpdir.join('weights.h5')), str(tmpdir.join('model.h5'))]:
+        if path.endswith('weights.h5'):
+            legacy.save_weights(path)
+        else:
+            legacy.save(path)
+        assert convert(path, path + '.converted') > 0
+        model = build()
+        model.load_weights(path + '.converted')
+        for output, expected in zip(model.predict(x, verbose=0), legacy.predict(x, verbose=0)):
+            np.testing.assert_allclose(output, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize(
+    'gate_dnn_hidden_units',
+    [(), (4,)]
+)
+def test_convert_mmoe_weights(tmpdir, gate_dnn_hidden_units):
+    x, _, dnn_feature_columns = get_mtl_test_data()
+    task_names = ('click', 'buy_now')
+    legacy = legacy_mmoe(dnn_feature_columns, 3, gate_dnn_hidden_units, task_names)
+    assert_converted(legacy, lambda: MMOE(dnn_feature_columns, num_experts=3, expert_dnn_hidden_units=(8, 4),
+                                          tower_dnn_hidden_units=(4,), gate_dnn_hidden_units=gate_dnn_hidden_units,
+                                          task_names=task_names),
+                     lambda path, output_path: convert_mmoe_weights(path, output_path, task_names), x, tmpdir)
+
+
+@pytest.mark.parametrize(
+    'gate_dnn_hidden_units',
+    [(), (4,)]
+)
+def test_convert_ple_weights(tmpdir, gate_dnn_hidden_units):
+    x, _, dnn_feature_columns = get_mtl_test_data()
+    task_names = ('click', 'buy_now')
+    legacy = legacy_ple(dnn_feature_columns, 2, 1, 2, gate_dnn_hidden_units, task_names)
+    assert_converted(legacy, lambda: PLE(dnn_feature_columns, shared_expert_num=1, specific_expert_num=2, num_levels=2,
+                                         expert_dnn_hidden_units=(8, 4), tower_dnn_hidden_units=(4,),
+                                         gate_dnn_hidden_units=gate_dnn_hidden_units, task_names=task_names),
+                     lambda path, output_path: convert_ple_weights(path, output_path, task_names), x, tmpdir)